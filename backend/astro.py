@@ -0,0 +1,204 @@
+"""Moon phase, zodiac positions and planetary hours for the astro_widget block.
+
+Positions come from the memory-mapped tables built by ephemeris.py when they
+are present and cover the dates, and otherwise from low-precision series
+(about 0.01° for the Sun and 0.3° for the Moon, plenty for signs and phase
+names); either way they are evaluated with NumPy over a whole array of days
+at once. compute_days() turns a date range
+and a location into one record per local day; AstroDays keeps those records
+per (day, location), so a month view costs one vectorized call for the days
+not seen yet and nothing afterwards.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ephemeris import load_ephemeris
+from slot_times import SLOTS_TIMEZONE
+
+ASTRO_LATITUDE = float(os.getenv("ASTRO_LATITUDE", "55.7558"))
+ASTRO_LONGITUDE = float(os.getenv("ASTRO_LONGITUDE", "37.6173"))
+EPHEMERIS = load_ephemeris()
+
+SYNODIC_MONTH = 29.530588853
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+# Sun's altitude at rise/set: refraction plus the solar radius
+SUNRISE_ALTITUDE = -0.833
+# Degrees of elongation (about a day) around 0/90/180/270 named after the exact phase
+PRINCIPAL_PHASE_WIDTH = 12.0
+
+ZODIAC_SIGNS = ["Овен", "Телец", "Близнецы", "Рак", "Лев", "Дева",
+                "Весы", "Скорпион", "Стрелец", "Козерог", "Водолей", "Рыбы"]
+MOON_PHASES = ["Новолуние", "Растущий серп", "Первая четверть", "Растущая луна",
+               "Полнолуние", "Убывающая луна", "Последняя четверть", "Убывающий серп"]
+# Chaldean order, slowest to fastest
+PLANETS = ["Сатурн", "Юпитер", "Марс", "Солнце", "Венера", "Меркурий", "Луна"]
+# Ruler of the first hour for date.weekday() (Monday = Moon ... Sunday = Sun)
+DAY_RULERS = np.array([6, 2, 5, 1, 4, 0, 3])
+
+
+def julian_days(moments: np.ndarray) -> np.ndarray:
+    """Julian days of UTC datetime64 values"""
+    seconds = moments.astype("datetime64[s]").astype(np.float64)
+    return seconds / 86400.0 + UNIX_EPOCH_JD
+
+
+def sun_longitude(jd: np.ndarray) -> np.ndarray:
+    """Apparent ecliptic longitude of the Sun in degrees"""
+    n = jd - J2000
+    mean = 280.460 + 0.9856474 * n
+    anomaly = np.radians(357.528 + 0.9856003 * n)
+    return np.mod(mean + 1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly), 360.0)
+
+
+def moon_longitude(jd: np.ndarray) -> np.ndarray:
+    """Ecliptic longitude of the Moon in degrees (main periodic terms only)"""
+    n = jd - J2000
+    mean = 218.316 + 13.176396 * n
+    moon_anomaly = np.radians(134.963 + 13.064993 * n)
+    sun_anomaly = np.radians(357.529 + 0.985600 * n)
+    elongation = np.radians(297.850 + 12.190749 * n)
+    latitude_arg = np.radians(93.272 + 13.229350 * n)
+    return np.mod(
+        mean
+        + 6.289 * np.sin(moon_anomaly)
+        + 1.274 * np.sin(2 * elongation - moon_anomaly)
+        + 0.658 * np.sin(2 * elongation)
+        + 0.214 * np.sin(2 * moon_anomaly)
+        - 0.186 * np.sin(sun_anomaly)
+        - 0.114 * np.sin(2 * latitude_arg),
+        360.0,
+    )
+
+
+def positions(jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(Sun, Moon) ecliptic longitudes in degrees"""
+    if EPHEMERIS is not None and EPHEMERIS.covers(jd):
+        return EPHEMERIS.lookup(jd)
+    return sun_longitude(jd), moon_longitude(jd)
+
+
+def sun_events(jd_noon: np.ndarray, latitude: float, longitude: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Sunrise and sunset as Julian days for the days around jd_noon (UTC noon)
+
+    NaN where the Sun does not rise or set that day (polar day/night).
+    """
+    n = jd_noon - J2000
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+    sun = np.radians(sun_longitude(jd_noon))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(sun))
+    right_ascension = np.degrees(np.arctan2(np.cos(obliquity) * np.sin(sun), np.cos(sun)))
+    # Equation of time in degrees: mean minus apparent solar position
+    equation_of_time = np.mod(280.460 + 0.9856474 * n - right_ascension + 180.0, 360.0) - 180.0
+    phi = np.radians(latitude)
+    cos_hour_angle = (np.sin(np.radians(SUNRISE_ALTITUDE)) - np.sin(phi) * np.sin(declination)) / (
+        np.cos(phi) * np.cos(declination)
+    )
+    hour_angle = np.degrees(np.arccos(np.where(np.abs(cos_hour_angle) <= 1, cos_hour_angle, np.nan)))
+    transit = jd_noon - (longitude + equation_of_time) / 360.0
+    return transit - hour_angle / 360.0, transit + hour_angle / 360.0
+
+
+def _to_datetimes(jd: np.ndarray) -> List[datetime]:
+    return [
+        datetime.fromtimestamp(float(value - UNIX_EPOCH_JD) * 86400.0, timezone.utc).astimezone(SLOTS_TIMEZONE)
+        for value in jd
+    ]
+
+
+def compute_days(first: date, last: date, latitude: float, longitude: float) -> Dict[date, dict]:
+    """Astro data for every local day first..last (inclusive), computed in one pass"""
+    days = np.arange(np.datetime64(first), np.datetime64(last) + np.timedelta64(1, "D"))
+    # Positions at local noon, rise/set around UTC noon of the day and the next one
+    offset = datetime.combine(first, datetime.min.time(), SLOTS_TIMEZONE).utcoffset()
+    local_noon = days.astype("datetime64[s]") + np.timedelta64(12 * 3600 - int(offset.total_seconds()), "s")
+    jd = julian_days(local_noon)
+    sun, moon = positions(jd)
+    elongation = np.mod(moon - sun, 360.0)
+    illumination = (1 - np.cos(np.radians(elongation))) / 2
+    # New moon, quarters and full moon within about a day of the exact moment; the in-between phases otherwise
+    quarter = np.round(elongation / 90.0)
+    near_quarter = np.abs(elongation - quarter * 90.0) < PRINCIPAL_PHASE_WIDTH
+    phase_index = np.where(near_quarter, (quarter.astype(int) % 4) * 2, np.floor(elongation / 90.0).astype(int) * 2 + 1)
+    if EPHEMERIS is not None and EPHEMERIS.covers(jd - 0.5) and EPHEMERIS.covers(jd + 0.5):
+        # With the tables the principal phase is named on the local day its exact moment falls on
+        events = EPHEMERIS.phase_events(jd - 0.5, jd + 0.5)
+        phase_index = np.where(events >= 0, events * 2, np.floor(elongation / 90.0).astype(int) * 2 + 1)
+
+    utc_noon = julian_days(np.append(days, days[-1] + np.timedelta64(1, "D")).astype("datetime64[s]")) + 0.5
+    sunrise, sunset = sun_events(utc_noon, latitude, longitude)
+    next_sunrise = sunrise[1:]
+    sunrise, sunset = sunrise[:-1], sunset[:-1]
+    # 12 unequal hours from sunrise to sunset and 12 from sunset to the next sunrise
+    steps = np.arange(13) / 12.0
+    day_bounds = sunrise[:, None] + (sunset - sunrise)[:, None] * steps
+    night_bounds = sunset[:, None] + (next_sunrise - sunset)[:, None] * steps
+    bounds = np.concatenate([day_bounds, night_bounds[:, 1:]], axis=1)
+    weekdays = (days.astype("datetime64[D]").astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    rulers = (DAY_RULERS[weekdays][:, None] + np.arange(24)) % len(PLANETS)
+
+    results = {}
+    for i, day in enumerate(days.astype(object)):
+        hours = []
+        if not np.isnan(bounds[i]).any():
+            times = _to_datetimes(bounds[i])
+            hours = [
+                {"start": times[k], "end": times[k + 1], "planet": PLANETS[rulers[i, k]], "daytime": k < 12}
+                for k in range(24)
+            ]
+        results[day] = {
+            "date": day,
+            "sun_longitude": round(float(sun[i]), 2),
+            "sun_sign": ZODIAC_SIGNS[int(sun[i] // 30)],
+            "moon_longitude": round(float(moon[i]), 2),
+            "moon_sign": ZODIAC_SIGNS[int(moon[i] // 30)],
+            "moon_phase": MOON_PHASES[phase_index[i]],
+            "moon_illumination": round(float(illumination[i]), 3),
+            "moon_age": round(float(elongation[i]) / 360.0 * SYNODIC_MONTH, 1),
+            "sunrise": hours[0]["start"] if hours else None,
+            "sunset": hours[11]["end"] if hours else None,
+            "planetary_hours": hours,
+        }
+    return results
+
+
+class AstroDays:
+    """Per-day astro records for a location, computed in batches for the missing days"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._days: "OrderedDict[Tuple[date, float, float], dict]" = OrderedDict()
+
+    def get_range(self, first: date, last: date, latitude: float, longitude: float) -> List[dict]:
+        latitude, longitude = round(latitude, 2), round(longitude, 2)
+        span = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        missing = [day for day in span if (day, latitude, longitude) not in self._days]
+        self.hits += len(span) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for day, record in compute_days(missing[0], missing[-1], latitude, longitude).items():
+                self._store((day, latitude, longitude), record)
+        results = []
+        for day in span:
+            key = (day, latitude, longitude)
+            record = self._days.get(key)
+            if record is None:
+                # Evicted within this call (range larger than maxsize)
+                record = compute_days(day, day, latitude, longitude)[day]
+            else:
+                self._days.move_to_end(key)
+            results.append(record)
+        return results
+
+    def _store(self, key, record: dict):
+        self._days[key] = record
+        self._days.move_to_end(key)
+        while len(self._days) > self.maxsize:
+            self._days.popitem(last=False)
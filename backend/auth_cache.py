@@ -0,0 +1,71 @@
+"""Caches that keep admin authentication off the hot path.
+
+TokenCache remembers JWTs that already passed signature verification until
+their own ``exp``, so parallel admin calls with the same token skip HS256
+decoding; like the JWT itself, a cached token is not revoked before it
+expires. PrincipalCache keeps the user document behind a username for a short
+TTL. The server invalidates an entry when it creates that user; changes made
+elsewhere (scripts/create_admin.py, edits straight in MongoDB) reach the admin
+routes once the TTL runs out.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[str]:
+        """Username for a previously verified, still unexpired token"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        username, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return username
+
+    def put(self, token: str, username: str, expires_at: float):
+        self._entries[token] = (username, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = 60.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, username: str) -> Optional[dict]:
+        entry = self._entries.get(username)
+        if entry is None or entry[1] <= time.monotonic():
+            self._entries.pop(username, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, username: str, user: dict):
+        self._entries[username] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        self._entries.pop(username, None)
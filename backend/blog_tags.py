@@ -0,0 +1,60 @@
+"""Materialized tag counts for published blog posts.
+
+blog_tags holds one ``{tag, count}`` document per tag in use by a published
+post. Blog writes apply the difference between a post's published tags
+before and after the write with ``$inc``, so reading the tag cloud is a
+small indexed scan instead of an ``$unwind`` over the whole archive.
+rebuild_tag_counts() recomputes the collection from scratch and is run as a
+migration to seed it and to repair any drift.
+"""
+
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from pymongo import DeleteMany, UpdateOne
+
+# Tag cloud order: most used first, then alphabetical
+TAG_CLOUD_ORDER = (("count", -1), ("tag", 1))
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Tags as stored: stripped, empty ones dropped, duplicates removed in order"""
+    seen = []
+    for tag in tags or []:
+        tag = tag.strip()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def published_tags(post: Optional[dict]) -> Counter:
+    if not post or not post.get("published"):
+        return Counter()
+    return Counter(set(post.get("tags") or []))
+
+
+async def apply_tag_changes(db, before: Optional[dict], after: Optional[dict]):
+    """Update counts for a post written from before to after (None for create/delete)"""
+    old, new = published_tags(before), published_tags(after)
+    changes = {tag: new[tag] - old[tag] for tag in old.keys() | new.keys() if new[tag] != old[tag]}
+    if not changes:
+        return
+    requests = [UpdateOne({"tag": tag}, {"$inc": {"count": delta}}, upsert=True) for tag, delta in changes.items()]
+    requests.append(DeleteMany({"count": {"$lte": 0}}))
+    await db.blog_tags.bulk_write(requests, ordered=True)
+
+
+async def rebuild_tag_counts(db) -> int:
+    """Recompute blog_tags from the published posts; returns the number of tags"""
+    pipeline = [
+        {"$match": {"published": True}},
+        # Count each tag once per post, like apply_tag_changes
+        {"$project": {"_id": 0, "tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
+        {"$unwind": "$tags"},
+        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+    ]
+    counts = {row["_id"]: row["count"] async for row in db.blog_posts.aggregate(pipeline)}
+    requests = [UpdateOne({"tag": tag}, {"$set": {"count": count}}, upsert=True) for tag, count in counts.items()]
+    requests.append(DeleteMany({"tag": {"$nin": list(counts)}}))
+    await db.blog_tags.bulk_write(requests, ordered=True)
+    return len(counts)
@@ -0,0 +1,206 @@
+"""Response compression with brotli (when installed) or gzip.
+
+CompressionMiddleware picks an encoding from Accept-Encoding, leaves small
+bodies, binary media and already-encoded or partial responses alone, and
+streams compression for streaming responses (NDJSON exports).
+
+Public content responses carry an ETag that is derived from their bytes
+(ContentCache entries and ConditionalGetMiddleware both set one), so the
+compressed body is stored under (ETag, encoding) at a higher compression level
+and reused: a popular page or bootstrap payload is compressed once per content
+version, not per request. The compressed representation is sent with a weak
+ETag, which If-None-Match still matches.
+"""
+
+import asyncio
+import gzip
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Most preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml",
+)
+# Levels for bodies compressed on every request vs. once per ETag
+FAST_LEVEL = {"br": 4, "gzip": 6}
+STORED_LEVEL = {"br": 9, "gzip": 9}
+# Bodies above this are compressed on a worker thread
+THREAD_THRESHOLD = 64 * 1024
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred supported encoding the client accepts (q > 0), or None"""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=FAST_LEVEL["br"])
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(FAST_LEVEL["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+
+class CompressedBodies:
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded by total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._bodies: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        body = self._bodies.get((etag, encoding))
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._bodies.move_to_end((etag, encoding))
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._bodies.pop((etag, encoding), None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._bodies[(etag, encoding)] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._bodies.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._bodies), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, store_bytes: int = 32 * 1024 * 1024,
+                 stored: Optional[CompressedBodies] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stored = stored if stored is not None else CompressedBodies(store_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        streamer: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, streamer, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (message["status"] in (204, 206, 304) or "content-encoding" in headers
+                        or "content-range" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            if passthrough or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if streamer is None and not more_body:
+                await self._send_whole(send, start, headers, body, encoding)
+                start = None
+                return
+            if streamer is None:
+                # Streaming response: compress chunk by chunk
+                streamer = _StreamCompressor(encoding)
+                self._set_encoding(headers, encoding)
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send({**start, "headers": headers.raw})
+            chunk = streamer.compress(body)
+            if not more_body:
+                chunk += streamer.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+    @staticmethod
+    def _set_encoding(headers: MutableHeaders, encoding: str):
+        headers["content-encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # A different byte representation of the same content
+            headers["etag"] = f"W/{etag}"
+
+    async def _send_whole(self, send, start, headers: MutableHeaders, body: bytes, encoding: str):
+        if len(body) < self.minimum_size:
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+            return
+        etag = headers.get("etag")
+        compressed = self.stored.get(etag, encoding) if etag else None
+        if compressed is None:
+            level = (STORED_LEVEL if etag else FAST_LEVEL)[encoding]
+            if len(body) > THREAD_THRESHOLD:
+                compressed = await asyncio.to_thread(compress, body, encoding, level)
+            else:
+                compressed = compress(body, encoding, level)
+            if etag:
+                self.stored.put(etag, encoding, compressed)
+        if len(compressed) >= len(body):
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+            return
+        self._set_encoding(headers, encoding)
+        headers["content-length"] = str(len(compressed))
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": compressed})
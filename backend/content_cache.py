@@ -0,0 +1,141 @@
+"""In-process read-through cache for public content endpoints.
+
+Entries hold the already-encoded JSON body, so a hit skips both the MongoDB
+round-trip and response_model validation, plus an ETag of that body and,
+when the loader knows it, the newest modification time of the content. Every key carries a version that is
+bumped on invalidation; a load that started before an invalidation is never
+stored, so a racing admin write can't be overwritten by stale data.
+Concurrent misses on a key wait for one load; if the request running it is
+cancelled, a waiting request takes it over instead of failing with it.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+
+class LoadAbandoned(Exception):
+    """The request running a shared load went away before it finished"""
+
+
+@dataclass
+class CacheEntry:
+    body: Optional[bytes]  # None marks a cached "not found"
+    version: int
+    expires_at: float
+    created_at: float = field(default_factory=time.time)
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+
+
+class ContentCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != self.version(key) or entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get_or_load(
+        self, key: str,
+        loader: Callable[[], Awaitable[Union[Optional[bytes], Tuple[Optional[bytes], Optional[datetime]]]]]
+    ) -> CacheEntry:
+        """Return the cached entry for key, calling loader once on a miss
+
+        loader returns the body, or (body, last_modified).
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        # Concurrent misses on the same key share a single load
+        while (pending := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except LoadAbandoned:
+                # Its leader was cancelled; the first waiter to wake takes the load over
+                entry = self.get(key)
+                if entry is not None:
+                    return entry
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        version = self.version(key)
+        try:
+            body = await loader()
+            last_modified = None
+            if isinstance(body, tuple):
+                body, last_modified = body
+            entry = CacheEntry(
+                body=body, version=version, expires_at=time.monotonic() + self.ttl,
+                etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"' if body is not None else None,
+                last_modified=last_modified,
+            )
+            if version == self.version(key):
+                self._store(key, entry)
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            # Cancelling the shared future would cancel every waiter with it
+            future.set_exception(LoadAbandoned(key))
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _store(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._versions[key] = self.version(key) + 1
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str):
+        keys = {k for k in self._entries if k.startswith(prefix)}
+        keys.update(k for k in self._inflight if k.startswith(prefix))
+        keys.update(k for k in self._versions if k.startswith(prefix))
+        self.invalidate(*keys)
+
+    def clear(self):
+        self.invalidate(*set(self._entries) | set(self._inflight))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
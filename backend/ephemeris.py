@@ -0,0 +1,160 @@
+"""Precomputed Sun/Moon ephemeris tables, memory-mapped at runtime.
+
+``python ephemeris.py build`` evaluates fuller solar and lunar series (Meeus,
+Astronomical Algorithms ch. 25 and 47; a few arcseconds for the Sun, about
+10" for the Moon) once per hour over a span of years and writes:
+
+    positions.npy  float32 (hours, 2): Sun and Moon ecliptic longitude, degrees
+    phases.npy     float64 (events, 2): Julian day and kind (0 new, 1 first
+                   quarter, 2 full, 3 last quarter) of every principal phase
+    meta.json      start Julian day and step of positions.npy
+
+Ephemeris opens the .npy files with ``mmap_mode="r"``: nothing is read until a
+query touches it, every uvicorn worker shares the same page-cache pages, and a
+lookup is index arithmetic plus a linear interpolation between two rows.
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+STEP_HOURS = 1
+DEFAULT_DIR = Path(__file__).parent / "ephemeris"
+
+# Meeus table 47.A: (D, M, M', F, coefficient in 1e-6 degrees)
+_MOON_TERMS = np.array([
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314), (0, 0, 2, 0, 213618),
+    (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332), (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066),
+    (2, 0, 1, 0, 53322), (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528), (0, 0, 1, -2, 10980),
+    (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034), (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888),
+    (2, 1, 0, 0, -6766), (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+    (2, 0, 2, 0, 3994), (4, 0, 0, 0, 3861), (2, 0, -3, 0, 3665), (0, 1, -2, 0, -2689),
+    (2, 0, -1, 2, -2602), (2, -1, -2, 0, 2390), (1, 0, 1, 0, -2348), (2, -2, 0, 0, 2236),
+], dtype=np.float64)
+
+
+def sun_longitude_precise(jd: np.ndarray) -> np.ndarray:
+    """Apparent longitude of the Sun in degrees (Meeus ch. 25)"""
+    t = (jd - J2000) / 36525.0
+    mean = 280.46646 + 36000.76983 * t + 0.0003032 * t * t
+    anomaly = np.radians(357.52911 + 35999.05029 * t - 0.0001537 * t * t)
+    center = ((1.914602 - 0.004817 * t - 0.000014 * t * t) * np.sin(anomaly)
+              + (0.019993 - 0.000101 * t) * np.sin(2 * anomaly)
+              + 0.000289 * np.sin(3 * anomaly))
+    node = np.radians(125.04 - 1934.136 * t)
+    return np.mod(mean + center - 0.00569 - 0.00478 * np.sin(node), 360.0)
+
+
+def moon_longitude_precise(jd: np.ndarray) -> np.ndarray:
+    """Longitude of the Moon in degrees from the largest periodic terms (Meeus ch. 47)"""
+    t = (jd - J2000) / 36525.0
+    mean = 218.3164477 + 481267.88123421 * t
+    d = np.radians(297.8501921 + 445267.1114034 * t)
+    m = np.radians(357.5291092 + 35999.0502909 * t)
+    m_moon = np.radians(134.9633964 + 477198.8675055 * t)
+    f = np.radians(93.2720950 + 483202.0175233 * t)
+    eccentricity = 1 - 0.002516 * t
+    total = np.zeros_like(jd)
+    for cd, cm, cmm, cf, coefficient in _MOON_TERMS:
+        term = coefficient * np.sin(cd * d + cm * m + cmm * m_moon + cf * f)
+        if cm:
+            # Terms involving the Sun's anomaly shrink with the Earth's orbital eccentricity
+            term = term * eccentricity ** abs(cm)
+        total += term
+    return np.mod(mean + total / 1e6, 360.0)
+
+
+def _phase_events(jd: np.ndarray, sun: np.ndarray, moon: np.ndarray) -> np.ndarray:
+    """(Julian day, kind) of each time the elongation crosses a multiple of 90°"""
+    elongation = np.unwrap(np.radians(np.mod(moon - sun, 360.0)))
+    quarters = np.floor(np.degrees(elongation) / 90.0)
+    crossings = np.nonzero(np.diff(quarters) > 0)[0]
+    target = quarters[crossings + 1] * 90.0
+    before, after = np.degrees(elongation[crossings]), np.degrees(elongation[crossings + 1])
+    fraction = (target - before) / (after - before)
+    moments = jd[crossings] + fraction * (jd[crossings + 1] - jd[crossings])
+    return np.column_stack([moments, np.mod(quarters[crossings + 1], 4)])
+
+
+def build(out_dir: Path, first_year: int, last_year: int):
+    start = datetime(first_year, 1, 1, tzinfo=timezone.utc).timestamp() / 86400.0 + UNIX_EPOCH_JD
+    end = datetime(last_year + 1, 1, 1, tzinfo=timezone.utc).timestamp() / 86400.0 + UNIX_EPOCH_JD
+    jd = start + np.arange(0, (end - start) * 24 / STEP_HOURS + 1) * STEP_HOURS / 24.0
+    sun, moon = sun_longitude_precise(jd), moon_longitude_precise(jd)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "positions.npy", np.column_stack([sun, moon]).astype(np.float32))
+    np.save(out_dir / "phases.npy", _phase_events(jd, sun, moon))
+    (out_dir / "meta.json").write_text(json.dumps({
+        "start_jd": start, "step_hours": STEP_HOURS, "first_year": first_year, "last_year": last_year,
+    }))
+    return len(jd)
+
+
+def _interpolate_angle(a: np.ndarray, b: np.ndarray, fraction: np.ndarray) -> np.ndarray:
+    # Through the short way round, so 359° -> 1° passes 0°, not 180°
+    delta = np.mod(b - a + 180.0, 360.0) - 180.0
+    return np.mod(a + fraction * delta, 360.0)
+
+
+class Ephemeris:
+    def __init__(self, directory: Path):
+        meta = json.loads((directory / "meta.json").read_text())
+        self.start_jd = meta["start_jd"]
+        self.step = meta["step_hours"] / 24.0
+        self.positions = np.load(directory / "positions.npy", mmap_mode="r")
+        self.phases = np.load(directory / "phases.npy", mmap_mode="r")
+        self.end_jd = self.start_jd + (len(self.positions) - 1) * self.step
+
+    def covers(self, jd: np.ndarray) -> bool:
+        return bool(np.all((jd >= self.start_jd) & (jd < self.end_jd)))
+
+    def lookup(self, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(Sun, Moon) longitudes at jd, interpolated between the table rows around it"""
+        offset = (jd - self.start_jd) / self.step
+        row = np.floor(offset).astype(np.int64)
+        fraction = offset - row
+        before = np.asarray(self.positions[row], dtype=np.float64)
+        after = np.asarray(self.positions[row + 1], dtype=np.float64)
+        sun = _interpolate_angle(before[:, 0], after[:, 0], fraction)
+        moon = _interpolate_angle(before[:, 1], after[:, 1], fraction)
+        return sun, moon
+
+    def phase_events(self, start_jd: np.ndarray, end_jd: np.ndarray) -> np.ndarray:
+        """Kind of the principal phase in [start, end) for each interval, -1 if none"""
+        moments = self.phases[:, 0]
+        index = np.searchsorted(moments, start_jd)
+        index = np.minimum(index, len(moments) - 1)
+        inside = (moments[index] >= start_jd) & (moments[index] < end_jd)
+        return np.where(inside, np.asarray(self.phases[index, 1]).astype(int), -1)
+
+
+def load_ephemeris(directory: Optional[Path] = None) -> Optional[Ephemeris]:
+    """The table in directory (ASTRO_EPHEMERIS_DIR by default), or None if it has not been built"""
+    directory = directory or Path(os.getenv("ASTRO_EPHEMERIS_DIR", str(DEFAULT_DIR)))
+    try:
+        return Ephemeris(directory)
+    except FileNotFoundError:
+        logger.info(f"No ephemeris tables in {directory}, using the analytic series")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--from-year", type=int, default=1990)
+    parser.add_argument("--to-year", type=int, default=2060)
+    parser.add_argument("--out", type=Path, default=DEFAULT_DIR)
+    args = parser.parse_args()
+    rows = build(args.out, args.from_year, args.to_year)
+    print(f"Wrote {rows} hourly rows for {args.from_year}-{args.to_year} to {args.out}")
@@ -0,0 +1,59 @@
+"""Plain-text helpers for the HTML produced by the Tiptap editor."""
+
+import math
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+WORDS_PER_MINUTE = 200
+
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+               "blockquote", "pre", "tr", "td", "th", "table", "section", "article", "hr"}
+_SKIP_TAGS = {"script", "style"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def strip_html(html: str) -> str:
+    """Visible text of an HTML fragment with whitespace collapsed"""
+    if not html:
+        return ""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return _WHITESPACE.sub(" ", unescape("".join(parser.parts))).strip()
+
+
+def make_excerpt(text: str, length: int = 200) -> str:
+    """Cut text at a word boundary close to length characters"""
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0].rstrip(" ,.;:—-")
+    return f"{cut}…"
+
+
+def reading_time(text: str) -> int:
+    """Estimated reading time in whole minutes (at least one)"""
+    return max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
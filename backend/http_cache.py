@@ -0,0 +1,207 @@
+"""HTTP validators, conditional GET and byte ranges.
+
+file_response() serves a file from disk with a strong ETag, Last-Modified and
+the given Cache-Control, answers If-None-Match / If-Modified-Since with 304
+and single byte-range requests with 206 (or 416 when unsatisfiable). The file
+is stat'ed on a worker thread so a slow disk never blocks the event loop.
+
+ConditionalGetMiddleware does the same validation for JSON GET endpoints: it
+keeps an ETag the route already set (cached content carries one) or hashes
+the body, adds Cache-Control and turns matching conditional requests into
+bodiless 304s.
+"""
+
+import asyncio
+import hashlib
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[float] = None) -> bool:
+    """Whether the request headers' validators show the client already has this representation"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte of a single ``bytes=`` range; None if it should be ignored
+
+    Raises ValueError for a syntactically valid range that lies outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Other units and multipart ranges: answer with the whole file
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(0, size - int(last)), size - 1
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _read_range(path: Path, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def file_response(request: Request, path: Path, media_type: Optional[str] = None,
+                        cache_control: str = IMMUTABLE, headers: Optional[dict] = None) -> Response:
+    try:
+        st = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Upload names are unique per content, so name + size + mtime pins the bytes
+    validator = f"{path.name}:{st.st_size}:{st.st_mtime_ns}".encode()
+    etag = f'"{hashlib.sha256(validator).hexdigest()[:32]}"'
+    response_headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if not_modified(request.headers, etag, st.st_mtime):
+        return Response(status_code=304, headers=response_headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, st.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**response_headers, "Content-Range": f"bytes */{st.st_size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            response_headers.update({
+                "Content-Range": f"bytes {start}-{end}/{st.st_size}",
+                "Content-Length": str(end - start + 1),
+            })
+            # Starlette iterates sync generators on a worker thread
+            return StreamingResponse(_read_range(path, start, end), status_code=206,
+                                     media_type=media_type, headers=response_headers)
+
+    return FileResponse(path, media_type=media_type, headers=response_headers, stat_result=st)
+
+
+class ConditionalGetMiddleware:
+    """ETag, Cache-Control and 304 handling for GET requests under the given path prefixes
+
+    rules is a sequence of (path prefix, Cache-Control) pairs; the first match
+    wins. Requests carrying an Authorization header (the admin panel reading
+    public endpoints it just edited) get ``private, no-cache`` instead, so they
+    always revalidate.
+    """
+
+    def __init__(self, app, rules: Sequence[Tuple[str, str]]):
+        self.app = app
+        self.rules = list(rules)
+
+    def _cache_control(self, path: str) -> Optional[str]:
+        for prefix, cache_control in self.rules:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return cache_control
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        cache_control = self._cache_control(scope["path"])
+        if cache_control is None:
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        if "authorization" in request_headers:
+            cache_control = "private, no-cache"
+
+        start = None
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            etag = headers.get("etag") or body_etag(body)
+            headers["etag"] = etag
+            headers.setdefault("cache-control", cache_control)
+            last_modified = headers.get("last-modified")
+            try:
+                timestamp = parsedate_to_datetime(last_modified).timestamp() if last_modified else None
+            except (TypeError, ValueError):
+                timestamp = None
+            if not_modified(request_headers, etag, timestamp):
+                for name in ("content-length", "content-type", "content-encoding"):
+                    if name in headers:
+                        del headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
@@ -0,0 +1,336 @@
+"""MongoDB index bootstrap for the collections server.py queries.
+
+INDEXES declares every index the route handlers rely on; ensure_indexes()
+creates them at startup and drops OBSOLETE_INDEXES that earlier versions
+created. ROUTE_QUERIES mirrors the filter shape of each route's query (sorts
+are the same constants the routes use) so that ``python indexes.py --check``
+can explain() them all and fail if any of them still plans a COLLSCAN. Before
+that, --check reads the route handlers in server.py and fails if a route
+queries a collection that ROUTE_QUERIES has no entry for, so the list cannot
+silently fall behind the code.
+
+    python indexes.py           # create indexes
+    python indexes.py --check   # create indexes, then verify coverage and query plans
+"""
+
+import argparse
+import ast
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from blog_tags import TAG_CLOUD_ORDER
+from pagination import CREATED_DESC
+from slot_times import TIMESLOT_ORDER
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_id():
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+INDEXES = {
+    "users": [
+        _unique_id(),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "pages": [
+        _unique_id(),
+        IndexModel([("slug", ASCENDING), ("published", ASCENDING)], name="slug_published"),
+        IndexModel([("published", ASCENDING), ("order", ASCENDING)], name="published_order"),
+        IndexModel([("is_homepage", ASCENDING), ("published", ASCENDING)], name="homepage_published"),
+        IndexModel([("order", ASCENDING)], name="order"),
+        IndexModel([("title", TEXT), ("search_text", TEXT)], name="search_text",
+                   weights={"title": 10, "search_text": 1}, default_language="russian"),
+    ],
+    "menu_items": [
+        _unique_id(),
+        IndexModel([("order", ASCENDING)], name="order"),
+    ],
+    "settings": [_unique_id()],
+    "home_page_content": [_unique_id()],
+    "contacts": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "media": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("sha256", ASCENDING)], name="sha256_unique", unique=True,
+                   partialFilterExpression={"sha256": {"$exists": True}}),
+        IndexModel([("url", ASCENDING)], name="url"),
+        IndexModel([("variants_status", ASCENDING)], name="variants_status", sparse=True),
+    ],
+    "blog_posts": [
+        _unique_id(),
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="published_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        # Multikey: one entry per tag, for ?tags= listings in feed order
+        IndexModel([("published", ASCENDING), ("tags", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="published_tags_created_at_id"),
+        IndexModel([("title", TEXT), ("tags", TEXT), ("search_text", TEXT)], name="search_text",
+                   weights={"title": 10, "tags": 5, "search_text": 1}, default_language="russian"),
+    ],
+    "blog_tags": [
+        IndexModel([("tag", ASCENDING)], name="tag_unique", unique=True),
+        IndexModel([("count", DESCENDING), ("tag", ASCENDING)], name="count_tag"),
+    ],
+    "services": [
+        _unique_id(),
+        IndexModel([("visible", ASCENDING), ("order", ASCENDING)], name="visible_order"),
+        IndexModel([("order", ASCENDING)], name="order"),
+    ],
+    "user_preferences": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "time_slots": [
+        _unique_id(),
+        # date is included so the per-day availability count is a covered query
+        IndexModel([("available", ASCENDING), ("start", ASCENDING), ("date", ASCENDING)],
+                   name="available_start_date"),
+        IndexModel([("start", ASCENDING), ("id", ASCENDING)], name="start_id"),
+    ],
+    "email_outbox": [
+        _unique_id(),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        # Delivered messages are kept for a month for troubleshooting
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=30 * 24 * 3600),
+    ],
+    "appointments": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("slot_id", ASCENDING)], name="slot_id"),
+        IndexModel([("idempotency_key", ASCENDING)], name="idempotency_key_unique", unique=True,
+                   partialFilterExpression={"idempotency_key": {"$exists": True}}),
+    ],
+}
+
+# Indexes created by earlier versions and replaced since; dropped at startup so they stop costing writes
+OBSOLETE_INDEXES = {
+    "contacts": ["created_at"],
+    "media": ["created_at"],
+    "blog_posts": ["created_at", "published_created_at"],
+    "time_slots": ["available_date", "date", "date_start_id"],
+    "appointments": ["created_at"],
+}
+
+SITE_SETTINGS = {"id": "site_settings"}
+HOME_CONTENT = {"id": "home_page_content"}
+_NOW = datetime.now(timezone.utc)
+_MONTH = {"$gte": _NOW, "$lt": _NOW + timedelta(days=31)}
+
+# (route, collection, filter, sort, limit) for every query a route issues;
+# routes are "METHOD path" as declared on the router, anything after "?" or " (" is a variant
+ROUTE_QUERIES = [
+    ("POST /auth/register", "users", {"username": "x"}, None, 1),
+    ("POST /auth/login", "users", {"username": "x"}, None, 1),
+    ("GET /pages", "pages", {"published": True}, [("order", 1)], 100),
+    ("GET /pages/{slug}", "pages", {"slug": "x", "published": True}, None, 1),
+    ("GET /homepage-page", "pages", {"is_homepage": True, "published": True}, None, 1),
+    ("GET /menu", "menu_items", {}, [("order", 1)], 50),
+    ("GET /settings", "settings", SITE_SETTINGS, None, 1),
+    ("GET /bootstrap", "menu_items", {}, [("order", 1)], 50),
+    ("GET /bootstrap", "settings", SITE_SETTINGS, None, 1),
+    ("GET /bootstrap", "pages", {"published": True}, [("order", 1)], 100),
+    ("GET /bootstrap (slug)", "pages", {"slug": "x", "published": True}, None, 1),
+    ("GET /bootstrap (homepage)", "pages", {"is_homepage": True, "published": True}, None, 1),
+    ("GET /bootstrap", "services", {"visible": True}, [("order", 1)], 100),
+    ("GET /bootstrap", "home_page_content", HOME_CONTENT, None, 1),
+    ("POST /contact", "settings", SITE_SETTINGS, None, 1),
+    ("PUT /admin/settings", "settings", SITE_SETTINGS, None, 1),
+    ("GET /admin/pages", "pages", {}, [("order", 1)], 100),
+    ("POST /admin/pages", "pages", {"slug": "x"}, None, 1),
+    ("PUT /admin/pages/{page_id}", "pages", {"id": "x"}, None, 1),
+    ("DELETE /admin/pages/{page_id}", "pages", {"id": "x"}, None, 1),
+    ("DELETE /admin/menu/{item_id}", "menu_items", {"id": "x"}, None, 1),
+    ("GET /admin/contacts", "contacts", {}, CREATED_DESC, 51),
+    ("PUT /admin/contacts/{contact_id}/read", "contacts", {"id": "x"}, None, 1),
+    ("GET /admin/media", "media", {}, CREATED_DESC, 51),
+    ("POST /admin/upload-file", "media", {"sha256": "x"}, None, 1),
+    ("GET /media/{filename}", "media", {"url": "x"}, None, 1),
+    ("media derivative worker", "media", {"variants_status": "pending"}, None, 1),
+    ("GET /blog", "blog_posts", {"published": True}, CREATED_DESC, 21),
+    ("GET /blog?tags", "blog_posts", {"published": True, "tags": {"$all": ["x"]}}, CREATED_DESC, 21),
+    ("GET /blog/tags", "blog_tags", {}, TAG_CLOUD_ORDER, 500),
+    ("GET /blog/{post_id}", "blog_posts", {"id": "x", "published": True}, None, 1),
+    ("GET /admin/blog", "blog_posts", {}, CREATED_DESC, 51),
+    ("GET /admin/blog/{post_id}", "blog_posts", {"id": "x"}, None, 1),
+    ("PUT /admin/blog/{post_id}", "blog_posts", {"id": "x"}, None, 1),
+    ("DELETE /admin/blog/{post_id}", "blog_posts", {"id": "x"}, None, 1),
+    ("GET /search", "blog_posts", {"$text": {"$search": "x"}, "published": True}, None, 10),
+    ("GET /search", "pages", {"$text": {"$search": "x"}, "published": True}, None, 10),
+    ("GET /home-content", "home_page_content", HOME_CONTENT, None, 1),
+    ("PUT /admin/home-content", "home_page_content", HOME_CONTENT, None, 1),
+    ("GET /services", "services", {"visible": True}, [("order", 1)], 100),
+    ("GET /admin/services", "services", {}, [("order", 1)], 100),
+    ("PUT /admin/services/{service_id}", "services", {"id": "x"}, None, 1),
+    ("DELETE /admin/services/{service_id}", "services", {"id": "x"}, None, 1),
+    ("GET /admin/preferences", "user_preferences", {"user_id": "x"}, None, 1),
+    ("PUT /admin/preferences", "user_preferences", {"user_id": "x"}, None, 1),
+    ("GET /admin/timeslots", "time_slots", {}, TIMESLOT_ORDER, 101),
+    ("GET /admin/timeslots?from&to", "time_slots", {"start": _MONTH}, TIMESLOT_ORDER, 101),
+    ("POST /admin/timeslots/bulk", "time_slots", {"start": _MONTH}, [("start", 1)], 5000),
+    ("PUT /admin/timeslots/{slot_id}", "time_slots", {"id": "x"}, None, 1),
+    ("DELETE /admin/timeslots/{slot_id}", "time_slots", {"id": "x"}, None, 1),
+    ("GET /timeslots/available", "time_slots", {"available": True, "start": _MONTH}, TIMESLOT_ORDER, 501),
+    ("GET /timeslots/availability", "time_slots", {"available": True, "start": _MONTH}, None, 1000),
+    ("GET /admin/appointments", "appointments", {}, CREATED_DESC, 101),
+    ("PUT /admin/appointments/{appointment_id}", "appointments", {"id": "x"}, None, 1),
+    ("PUT /admin/appointments/{appointment_id} (release slot)", "time_slots",
+     {"id": "x", "appointment_id": {"$in": ["x", None]}}, None, 1),
+    ("DELETE /admin/appointments/{appointment_id}", "appointments", {"id": "x"}, None, 1),
+    ("DELETE /admin/appointments/{appointment_id} (release slot)", "time_slots",
+     {"id": "x", "appointment_id": {"$in": ["x", None]}}, None, 1),
+    ("POST /appointments", "time_slots", {"id": "x", "available": True}, None, 1),
+    ("POST /appointments (retry)", "appointments", {"idempotency_key": "x"}, None, 1),
+    ("POST /appointments (notification)", "settings", SITE_SETTINGS, None, 1),
+    ("email outbox worker", "email_outbox",
+     {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": _NOW}}, [("next_attempt_at", 1)], 1),
+]
+
+# Collection methods whose filter needs an index; db.<collection> passed to a helper counts too
+_QUERY_METHODS = {"find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+                  "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+                  "count_documents", "aggregate"}
+_ROUTER_PREFIXES = {"api_router": "", "admin_router": "/admin", "app": ""}
+_HTTP_METHODS = {"get", "post", "put", "patch", "delete"}
+
+
+def _db_collection(node):
+    """Collection name of an expression db.<name>, else None"""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "db":
+        return node.attr
+    return None
+
+
+def route_collections(source: str):
+    """{"METHOD path": collections queried} for the routes in server.py source
+
+    Follows calls to other module-level functions, so loaders such as
+    settings_entry() count for every route that uses them.
+    """
+    tree = ast.parse(source)
+    functions = {node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+
+    def collections(function, seen):
+        found = set()
+        for node in ast.walk(function):
+            if not isinstance(node, ast.Call):
+                continue
+            method_of = _db_collection(node.func.value) if isinstance(node.func, ast.Attribute) else None
+            if method_of and node.func.attr in _QUERY_METHODS:
+                found.add(method_of)
+            if method_of is None:
+                found.update(name for name in map(_db_collection, node.args) if name)
+            if isinstance(node.func, ast.Name) and node.func.id in functions and node.func.id not in seen:
+                seen.add(node.func.id)
+                found |= collections(functions[node.func.id], seen)
+        return found
+
+    routes = {}
+    for function in functions.values():
+        for decorator in function.decorator_list:
+            if (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                    and isinstance(decorator.func.value, ast.Name)
+                    and decorator.func.value.id in _ROUTER_PREFIXES and decorator.func.attr in _HTTP_METHODS):
+                path = _ROUTER_PREFIXES[decorator.func.value.id] + decorator.args[0].value
+                routes[f"{decorator.func.attr.upper()} {path}"] = collections(function, {function.name})
+    return routes
+
+
+def uncovered_route_queries(server_path: Path = Path(__file__).parent / "server.py"):
+    """(missing, stale): route queries ROUTE_QUERIES lacks, and its entries for routes that no longer exist"""
+    routes = route_collections(server_path.read_text())
+    listed = {(route.split("?")[0].split(" (")[0], collection) for route, collection, *_ in ROUTE_QUERIES}
+    missing = sorted((route, collection) for route, names in routes.items()
+                     for collection in names if (route, collection) not in listed)
+    stale = sorted({route for route, _ in listed
+                    if route.split(" ")[0].lower() in _HTTP_METHODS and route not in routes})
+    return missing, stale
+
+
+async def drop_obsolete_indexes(db):
+    for collection, names in OBSOLETE_INDEXES.items():
+        try:
+            existing = await db[collection].index_information()
+            for name in names:
+                if name in existing:
+                    await db[collection].drop_index(name)
+                    logger.info(f"Dropped obsolete index {collection}.{name}")
+        except OperationFailure as e:
+            logger.error(f"Failed to drop obsolete indexes on {collection}: {e}")
+
+
+async def ensure_indexes(db):
+    """Create all declared indexes and drop replaced ones; failures are logged, not raised"""
+    await drop_obsolete_indexes(db)
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. duplicate ids in legacy data blocking a unique index
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+
+
+def _plan_stages(plan):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def check_route_queries(db):
+    """Explain every route query and return the ones planning a COLLSCAN"""
+    offenders = []
+    for route, collection, query, sort, limit in ROUTE_QUERIES:
+        find = {"find": collection, "filter": query, "limit": limit}
+        if sort:
+            find["sort"] = dict(sort)
+        explain = await db.command("explain", find, verbosity="queryPlanner")
+        stages = set(_plan_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            offenders.append((route, collection, query, sort))
+    return offenders
+
+
+async def _main(check: bool):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        print("Indexes ensured")
+        if not check:
+            return 0
+        missing, stale = uncovered_route_queries()
+        for route, collection in missing:
+            print(f"NOT IN ROUTE_QUERIES: {route} -> {collection}")
+        for route in stale:
+            print(f"STALE ROUTE_QUERIES entry: {route}")
+        offenders = await check_route_queries(db)
+        for route, collection, query, sort in offenders:
+            print(f"COLLSCAN: {route} -> {collection} filter={query} sort={sort}")
+        print(f"{len(ROUTE_QUERIES) - len(offenders)}/{len(ROUTE_QUERIES)} route queries use an index")
+        return 1 if offenders or missing or stale else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="fail if a route query is unlisted or plans a COLLSCAN")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.check)))
@@ -0,0 +1,213 @@
+"""Background email delivery through a durable MongoDB outbox.
+
+Handlers only insert a message into the ``email_outbox`` collection; a worker
+task claims due messages in batches, hands them to a pluggable transport and
+retries failures with exponential backoff. A claim is a lease, so messages
+held by a worker that died mid-send are picked up again once it expires.
+
+Transports are selected with EMAIL_TRANSPORT:
+    sendgrid  SendGrid v3 HTTP API (default; needs SENDGRID_API_KEY and SENDER_EMAIL)
+    http      POST {"from", "to", "subject", "html"} as JSON to EMAIL_SINK_URL,
+              e.g. a local fake mail sink during tests
+    memory    keep messages in-process (MemoryTransport.sent)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+import requests
+from pymongo import ReturnDocument
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+
+
+class PermanentDeliveryError(Exception):
+    """The provider rejected the message; retrying won't help"""
+
+
+class MemoryTransport:
+    def __init__(self):
+        self.sent: List[dict] = []
+
+    async def send(self, message: dict):
+        self.sent.append(message)
+
+    async def close(self):
+        pass
+
+
+class HttpTransport:
+    """Posts messages with a pooled requests.Session on a worker thread"""
+
+    def __init__(self, url: str, sender: str, headers: Optional[dict] = None,
+                 pool_size: int = 10, timeout: float = 10.0):
+        self.url = url
+        self.sender = sender
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def payload(self, message: dict) -> dict:
+        return {"from": self.sender, "to": message["to"], "subject": message["subject"], "html": message["html"]}
+
+    async def send(self, message: dict):
+        response = await asyncio.to_thread(
+            self.session.post, self.url, json=self.payload(message), timeout=self.timeout
+        )
+        if response.status_code >= 500 or response.status_code == 429:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if response.status_code >= 400:
+            raise PermanentDeliveryError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def close(self):
+        self.session.close()
+
+
+class SendGridTransport(HttpTransport):
+    def __init__(self, api_key: str, sender: str, **kwargs):
+        super().__init__(SENDGRID_URL, sender, headers={"Authorization": f"Bearer {api_key}"}, **kwargs)
+
+    def payload(self, message: dict) -> dict:
+        return {
+            "personalizations": [{"to": [{"email": message["to"]}]}],
+            "from": {"email": self.sender},
+            "subject": message["subject"],
+            "content": [{"type": "text/html", "value": message["html"]}],
+        }
+
+
+def transport_from_env():
+    """Build the transport named by EMAIL_TRANSPORT, or None if it isn't configured"""
+    kind = os.getenv("EMAIL_TRANSPORT", "sendgrid")
+    sender = os.getenv("SENDER_EMAIL")
+    if kind == "memory":
+        return MemoryTransport()
+    if kind == "http":
+        url = os.getenv("EMAIL_SINK_URL")
+        return HttpTransport(url, sender or "noreply@localhost") if url else None
+    api_key = os.getenv("SENDGRID_API_KEY")
+    if not api_key or not sender:
+        return None
+    return SendGridTransport(api_key, sender)
+
+
+class EmailOutbox:
+    def __init__(self, db, transport, batch_size: int = 10, max_attempts: int = 6,
+                 base_delay: float = 30.0, lease: float = 300.0, poll_interval: float = 60.0):
+        self.collection = db.email_outbox
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, to: str, subject: str, html: str):
+        """Queue a message for delivery; returns its id, or None if email isn't configured"""
+        if self.transport is None:
+            logging.warning("Email transport not configured, skipping email")
+            return None
+        now = datetime.now(timezone.utc)
+        message = {
+            "id": str(uuid.uuid4()),
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        await self.collection.insert_one(message)
+        if self._wake is not None:
+            self._wake.set()
+        return message["id"]
+
+    def start(self):
+        if self.transport is None or self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.transport is not None:
+            await self.transport.close()
+
+    async def _run(self):
+        while True:
+            try:
+                batch = await self._claim_batch()
+                if batch:
+                    await asyncio.gather(*(self._deliver(message) for message in batch))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_batch(self) -> List[dict]:
+        batch = []
+        now = datetime.now(timezone.utc)
+        while len(batch) < self.batch_size:
+            message = await self.collection.find_one_and_update(
+                {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": now}},
+                {"$set": {"status": "sending", "next_attempt_at": now + timedelta(seconds=self.lease)}},
+                sort=[("next_attempt_at", 1)],
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER,
+            )
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    def backoff(self, attempts: int) -> float:
+        delay = self.base_delay * 2 ** (attempts - 1)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _deliver(self, message: dict):
+        attempts = message.get("attempts", 0) + 1
+        now = datetime.now(timezone.utc)
+        try:
+            await self.transport.send(message)
+        except Exception as e:
+            permanent = isinstance(e, PermanentDeliveryError) or attempts >= self.max_attempts
+            update = {"attempts": attempts, "last_error": str(e)[:500]}
+            if permanent:
+                update["status"] = "dead"
+                logger.error(f"Giving up on email {message['id']} to {message['to']}: {e}")
+            else:
+                update["status"] = "pending"
+                update["next_attempt_at"] = now + timedelta(seconds=self.backoff(attempts))
+                logger.warning(f"Email {message['id']} failed (attempt {attempts}), retrying: {e}")
+            await self.collection.update_one({"id": message["id"]}, {"$set": update})
+            return
+        await self.collection.update_one(
+            {"id": message["id"]},
+            {"$set": {"status": "sent", "attempts": attempts, "sent_at": now}, "$unset": {"last_error": ""}}
+        )
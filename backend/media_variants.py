@@ -0,0 +1,221 @@
+"""Responsive image derivatives for uploaded media.
+
+When an image is uploaded its media record is marked ``variants_status:
+pending``. DerivativeWorker claims pending records, resizes the image on a
+process pool (Pillow is CPU bound and holds the GIL) and records the results
+on the record as ``variants``. Every configured width narrower than the
+original is written as WebP, AVIF (when Pillow supports it) and the original
+format, with EXIF and other metadata stripped. Animated images get no
+variants, since a resize would keep only the first frame.
+
+get_media_file then picks the smallest variant at least as wide as ``?w=`` in
+the best format the client's Accept header allows.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name -> (file extension, mime type)
+FORMATS = {
+    "AVIF": ("avif", "image/avif"),
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+}
+# Most preferred first
+MODERN_FORMATS = ["AVIF", "WEBP"] if features.check("avif") else ["WEBP"]
+SAVE_OPTIONS = {
+    "AVIF": {"quality": 60},
+    "WEBP": {"quality": 80, "method": 4},
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+}
+
+
+def generate_variants(source: str, out_dir: str, stem: str, widths: Sequence[int]) -> dict:
+    """Write every derivative of source into out_dir; runs in a worker process"""
+    with Image.open(source) as original:
+        if getattr(original, "is_animated", False):
+            # Resizing would keep only the first frame: animated GIF/WebP/PNG are served as uploaded
+            return {"width": original.width, "height": original.height, "variants": []}
+        original_format = original.format if original.format in ("JPEG", "PNG") else "PNG"
+        # Apply the EXIF rotation before the EXIF data is dropped
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+    sizes = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    variants = []
+    for target in sizes:
+        resized = image if target >= width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for fmt in MODERN_FORMATS + [original_format]:
+            extension, mime = FORMATS[fmt]
+            frame = resized
+            if fmt == "JPEG" and frame.mode not in ("RGB", "L"):
+                frame = frame.convert("RGB")
+            name = f"{stem}.w{target}.{extension}"
+            path = Path(out_dir) / name
+            tmp = path.with_name(f".{name}.tmp")
+            # A fresh save without exif=/icc_profile= leaves all metadata behind
+            frame.save(tmp, fmt, **SAVE_OPTIONS[fmt])
+            os.replace(tmp, path)
+            variants.append({
+                "filename": name,
+                "width": frame.width,
+                "height": frame.height,
+                "format": mime,
+                "size": path.stat().st_size,
+            })
+    return {"width": width, "height": height, "variants": variants}
+
+
+def accepted_types(accept: Optional[str]) -> Dict[str, float]:
+    """Media types named in an Accept header with their q-values"""
+    accepted = {}
+    for item in (accept or "").split(","):
+        mime, *params = (part.strip() for part in item.split(";"))
+        if not mime:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[mime.lower()] = q
+    return accepted
+
+
+def choose_variant(variants: List[dict], width: Optional[int], accept: str) -> Optional[dict]:
+    """Best variant for a requested width and Accept header, or None to serve the original"""
+    if not variants:
+        return None
+    accepted = accepted_types(accept)
+    # The original format is always acceptable; modern ones only when advertised with q > 0
+    allowed = {v["format"] for v in variants if v["format"] not in ("image/avif", "image/webp")}
+    allowed |= {mime for mime in ("image/avif", "image/webp") if accepted.get(mime, 0) > 0}
+    candidates = [v for v in variants if v["format"] in allowed]
+    widths = sorted({v["width"] for v in candidates})
+    if width is None:
+        target = widths[-1]
+    else:
+        target = next((w for w in widths if w >= width), widths[-1])
+    preference = [FORMATS[fmt][1] for fmt in MODERN_FORMATS]
+    matching = [v for v in candidates if v["width"] == target]
+    matching.sort(key=lambda v: preference.index(v["format"]) if v["format"] in preference else len(preference))
+    return matching[0]
+
+
+class DerivativeWorker:
+    def __init__(self, db, upload_dir: Path, widths: Sequence[int], workers: int = 2,
+                 lease: float = 600.0, poll_interval: float = 60.0,
+                 on_done: Optional[Callable[[dict], None]] = None):
+        self.collection = db.media
+        self.upload_dir = upload_dir
+        self.variant_dir = upload_dir / "variants"
+        self.widths = list(widths)
+        self.workers = workers
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.on_done = on_done
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake the worker after marking a record pending"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self.variant_dir.mkdir(parents=True, exist_ok=True)
+        # spawn rather than fork: the server process already runs Motor and executor threads
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self):
+        while True:
+            try:
+                batch = await self._claim_batch()
+                if batch:
+                    await asyncio.gather(*(self._process(media) for media in batch))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Media derivative worker error: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_batch(self) -> List[dict]:
+        batch = []
+        now = datetime.now(timezone.utc)
+        while len(batch) < self.workers:
+            media = await self.collection.find_one_and_update(
+                {"$or": [
+                    {"variants_status": "pending"},
+                    # A worker died mid-job
+                    {"variants_status": "processing", "variants_lease_until": {"$lte": now}},
+                ]},
+                {"$set": {"variants_status": "processing", "variants_lease_until": now + timedelta(seconds=self.lease)}},
+                projection={"_id": 0, "id": 1, "url": 1},
+            )
+            if media is None:
+                break
+            batch.append(media)
+        return batch
+
+    async def _process(self, media: dict):
+        filename = media["url"].rsplit("/", 1)[-1]
+        stem = os.path.splitext(filename)[0]
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, generate_variants,
+                str(self.upload_dir / filename), str(self.variant_dir), stem, self.widths
+            )
+        except Exception as e:
+            logger.warning(f"Could not generate variants for {filename}: {e}")
+            await self.collection.update_one(
+                {"id": media["id"]},
+                {"$set": {"variants_status": "failed", "variants_error": str(e)[:500]},
+                 "$unset": {"variants_lease_until": ""}}
+            )
+        else:
+            await self.collection.update_one(
+                {"id": media["id"]},
+                {"$set": {"variants_status": "done", **result},
+                 "$unset": {"variants_lease_until": "", "variants_error": ""}}
+            )
+        # Failed jobs too: the record is final either way
+        if self.on_done is not None:
+            self.on_done(media)
@@ -0,0 +1,205 @@
+"""Process metrics in the Prometheus text format, served at /metrics.
+
+Metrics holds the series the backend exports:
+
+    http_request_duration_seconds    histogram per route template, method and status
+    http_requests_in_flight          gauge of requests being handled
+    event_loop_lag_seconds           histogram of how late a periodic sleep wakes up
+    mongodb_command_duration_seconds histogram per collection, command and outcome
+    cache_hits_total / cache_misses_total / cache_hit_ratio, per in-memory cache
+
+Recording is a lock, a bisect and two additions, and the route label is the
+matched route's template (``/api/pages/{slug}``), never the raw path, so the
+number of series stays bounded. MongoDB timings come from a pymongo
+CommandListener, which runs on Motor's executor threads; that is why the
+histograms lock. Every uvicorn worker keeps its own numbers.
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMAND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        # Per series: one count per bucket (non-cumulative), then +Inf, sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cumulative)}"
+
+
+class Gauge:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_number(self.value)}"
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command, labelled by collection and command name"""
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            # getMore names its collection separately; admin commands have none
+            target = event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = target
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        self.histogram.observe(event.duration_micros / 1e6, collection, event.command_name, outcome)
+
+
+class Metrics:
+    def __init__(self, lag_interval: float = 0.5):
+        self.requests = Histogram(
+            "http_request_duration_seconds", "Time to handle an HTTP request.",
+            ("route", "method", "status"), REQUEST_BUCKETS,
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+        self.loop_lag = Histogram(
+            "event_loop_lag_seconds", "How late the event loop ran a periodic timer.", (), LAG_BUCKETS,
+        )
+        self.commands = Histogram(
+            "mongodb_command_duration_seconds", "Time for MongoDB to answer a command.",
+            ("collection", "command", "outcome"), COMMAND_BUCKETS,
+        )
+        self.command_listener = CommandMetrics(self.commands)
+        self.lag_interval = lag_interval
+        self._caches: Dict[str, object] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def watch_cache(self, name: str, cache):
+        """Export hits and misses of an object counting them in .hits and .misses"""
+        self._caches[name] = cache
+
+    def render(self) -> str:
+        lines = [*self.requests.render(), *self.in_flight.render(), *self.loop_lag.render(), *self.commands.render()]
+        counts = {name: (cache.hits, cache.misses) for name, cache in self._caches.items()}
+        for metric, kind, help, value in (
+            ("cache_hits_total", "counter", "Lookups answered from an in-memory cache.", lambda h, m: h),
+            ("cache_misses_total", "counter", "Lookups an in-memory cache had to load.", lambda h, m: m),
+            ("cache_hit_ratio", "gauge", "Share of cache lookups that were hits since start.",
+             lambda h, m: h / (h + m) if h + m else 0),
+        ):
+            lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{_labels(('cache',), (name,))} {_number(value(*hm))}" for name, hm in counts.items()]
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe(max(0.0, loop.time() - before - self.lag_interval))
+
+
+class MetricsMiddleware:
+    """Counts in-flight requests and times each one under its route template"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            self.metrics.in_flight.value -= 1
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            self.metrics.requests.observe(
+                time.perf_counter() - start,
+                getattr(route, "path", "unmatched"), scope["method"], str(status),
+            )
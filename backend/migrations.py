@@ -0,0 +1,149 @@
+"""Idempotent data migrations for existing MongoDB documents.
+
+    python migrations.py
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+from html_text import strip_html, make_excerpt, reading_time
+from search import page_search_text
+from blog_tags import rebuild_tag_counts
+from slot_times import slot_bounds
+
+
+# Timestamp fields that used to be stored as ISO strings
+DATETIME_FIELDS = {
+    "users": ["created_at"],
+    "pages": ["created_at", "updated_at"],
+    "menu_items": ["created_at"],
+    "contacts": ["created_at"],
+    "settings": ["updated_at"],
+    "media": ["created_at"],
+    "blog_posts": ["created_at", "updated_at"],
+    "home_page_content": ["updated_at"],
+    "services": ["created_at"],
+    "user_preferences": ["updated_at"],
+    "time_slots": ["created_at"],
+    "appointments": ["created_at"],
+}
+
+
+def _parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def convert_string_datetimes(db):
+    """Rewrite ISO-string timestamps as native BSON dates"""
+    updated = 0
+    for collection, fields in DATETIME_FIELDS.items():
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        requests = []
+        async for doc in db[collection].find(query, {field: 1 for field in fields}):
+            update = {}
+            for field in fields:
+                if isinstance(doc.get(field), str):
+                    try:
+                        update[field] = _parse_datetime(doc[field])
+                    except ValueError:
+                        print(f"{collection} {doc['_id']}: unparseable {field}={doc[field]!r}")
+            if update:
+                requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if requests:
+            await db[collection].bulk_write(requests, ordered=False)
+            updated += len(requests)
+    return updated
+
+
+async def backfill_blog_summaries(db):
+    """Store excerpt/reading_time on posts written before they were computed on save"""
+    requests = []
+    async for post in db.blog_posts.find({"reading_time": {"$exists": False}}, {"id": 1, "content": 1, "excerpt": 1}):
+        text = strip_html(post.get("content", ""))
+        update = {"reading_time": reading_time(text), "excerpt_auto": not post.get("excerpt")}
+        if not post.get("excerpt"):
+            update["excerpt"] = make_excerpt(text)
+        requests.append(UpdateOne({"_id": post["_id"]}, {"$set": update}))
+    if requests:
+        await db.blog_posts.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+async def backfill_slot_times(db):
+    """Store start/end datetimes on slots created with only date/start_time/end_time strings"""
+    requests = []
+    async for slot in db.time_slots.find({"start": {"$exists": False}}, {"date": 1, "start_time": 1, "end_time": 1}):
+        try:
+            start, end = slot_bounds(slot["date"], slot["start_time"], slot["end_time"])
+        except (KeyError, ValueError) as e:
+            print(f"time_slots {slot['_id']}: cannot compute start/end: {e}")
+            continue
+        requests.append(UpdateOne({"_id": slot["_id"]}, {"$set": {"start": start, "end": end}}))
+    if requests:
+        await db.time_slots.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+async def queue_image_variants(db):
+    """Queue derivative generation for images uploaded before variants existed"""
+    result = await db.media.update_many(
+        {"type": "image", "url": {"$regex": "^/api/media/"}, "variants_status": {"$exists": False}},
+        {"$set": {"variants_status": "pending"}}
+    )
+    return result.modified_count
+
+
+async def backfill_search_text(db):
+    """Store the plain text the full-text index covers on posts and pages written before search"""
+    updated = 0
+    for collection, source in (("blog_posts", "content"), ("pages", "blocks")):
+        requests = []
+        async for doc in db[collection].find({"search_text": {"$exists": False}}, {source: 1}):
+            if source == "content":
+                text = strip_html(doc.get("content", ""))
+            else:
+                text = page_search_text(doc.get("blocks") or [])
+            requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_text": text}}))
+        if requests:
+            await db[collection].bulk_write(requests, ordered=False)
+            updated += len(requests)
+    return updated
+
+
+MIGRATIONS = [
+    convert_string_datetimes,
+    backfill_blog_summaries,
+    backfill_slot_times,
+    queue_image_variants,
+    backfill_search_text,
+    rebuild_tag_counts,
+]
+
+
+async def run_all(db):
+    for migration in MIGRATIONS:
+        count = await migration(db)
+        print(f"{migration.__name__}: {count} documents updated")
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        await run_all(client[os.environ['DB_NAME']])
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
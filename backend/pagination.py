@@ -0,0 +1,96 @@
+"""Keyset (cursor) pagination and NDJSON streaming over Motor cursors.
+
+A cursor is the opaque, URL-safe encoding of the sort-key values of the last
+document on a page. The next page is fetched with a range filter on those
+keys instead of skip(), so every page costs one index seek regardless of depth.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+import orjson
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+SortSpec = Sequence[Tuple[str, int]]
+
+CREATED_DESC: SortSpec = (("created_at", -1), ("id", -1))
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort: SortSpec) -> str:
+    values = [_encode_value(doc.get(field)) for field, _ in sort]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> List[Any]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Invalid cursor")
+    return [_decode_value(v) for v in values]
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """Filter matching documents strictly after values in sort order"""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: values[j] for j, (f, _) in enumerate(sort[:i])}
+        clause[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+async def paginate(collection, query: Dict[str, Any], sort: SortSpec, limit: int,
+                   after: Optional[str] = None, projection: Optional[Dict[str, Any]] = None):
+    """Fetch one page of documents; returns (items, next_cursor)"""
+    if after:
+        query = {"$and": [query, keyset_filter(sort, decode_cursor(after, sort))]}
+    forced = []
+    if projection is None:
+        projection = {"_id": 0}
+    elif any(v for k, v in projection.items() if k != "_id"):
+        # Inclusion projections must still carry the sort keys for the cursor
+        forced = [field for field, _ in sort if not projection.get(field)]
+        projection = {**projection, **{field: 1 for field in forced}}
+    # Fetch one extra document to learn whether another page exists
+    docs = await collection.find(query, projection).sort(list(sort)).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort)
+    # ...but only the requested fields go back to the caller
+    for field in forced:
+        for doc in docs:
+            doc.pop(field, None)
+    return docs, next_cursor
+
+
+async def stream_ndjson(cursor) -> AsyncIterator[bytes]:
+    """Yield one JSON line per document straight from a Motor cursor"""
+    async for doc in cursor:
+        yield orjson.dumps(doc, option=orjson.OPT_APPEND_NEWLINE)
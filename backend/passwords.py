@@ -0,0 +1,144 @@
+"""bcrypt hashing off the event loop, with bounded queueing and login throttling.
+
+Each bcrypt call burns a few hundred milliseconds of CPU. PasswordHasher runs
+them on a small dedicated thread pool (bcrypt releases the GIL) and rejects new
+work once PASSWORD_HASH_QUEUE calls are already pending, so a login flood
+degrades into fast 503s instead of stalling every other request. The cost
+factor is either fixed with BCRYPT_ROUNDS or calibrated at startup so that one
+hash takes about BCRYPT_TARGET_MS on this machine. Calibration starts from
+passlib's default of 12 rounds and only ever raises it.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+class HasherOverloaded(Exception):
+    """Too many hash/verify calls are already queued"""
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many login attempts, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 12, max_rounds: int = 14) -> int:
+    """Highest bcrypt cost whose hash time stays under target_ms, never below min_rounds"""
+    salt = bcrypt.gensalt(rounds=min_rounds)
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration-password", salt)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rounds = min_rounds
+    # Every extra round doubles the work
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = 2, max_pending: int = 16, rounds: Optional[int] = None,
+                 target_ms: float = 250.0, min_rounds: int = 12, max_rounds: int = 14):
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.target_ms = target_ms
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._context: Optional[CryptContext] = None
+
+    def _build_context(self):
+        if self.rounds is None:
+            self.rounds = calibrate_rounds(self.target_ms, self.min_rounds, self.max_rounds)
+            logger.info(f"Calibrated bcrypt cost: {self.rounds} rounds (target {self.target_ms:.0f} ms)")
+        # Hashes below the configured cost are upgraded on the next successful login
+        self._context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto",
+            bcrypt__rounds=self.rounds, bcrypt__min_rounds=self.rounds
+        )
+
+    async def calibrate(self):
+        if self._context is None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._build_context)
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HasherOverloaded()
+        self.pending += 1
+        try:
+            await self.calibrate()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(lambda p: self._context.hash(p), password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash should be upgraded"""
+        return await self._run(lambda p, h: self._context.verify_and_update(p, h), password, password_hash)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginThrottle:
+    """Per-username sliding window of failed logins plus a cap on concurrent attempts"""
+
+    def __init__(self, max_failures: int = 5, window: float = 300.0, max_concurrent: int = 2,
+                 max_tracked: int = 10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_concurrent = max_concurrent
+        self.max_tracked = max_tracked
+        self._failures: "OrderedDict[str, deque]" = OrderedDict()
+        self._inflight = {}
+
+    def _recent_failures(self, username: str, now: float) -> deque:
+        failures = self._failures.get(username)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[username]
+        return failures
+
+    def acquire(self, username: str):
+        """Start a login attempt; raises LoginThrottled if the username is locked out or busy"""
+        now = time.monotonic()
+        failures = self._recent_failures(username, now)
+        if len(failures) >= self.max_failures:
+            raise LoginThrottled(max(1, int(failures[0] + self.window - now)))
+        if self._inflight.get(username, 0) >= self.max_concurrent:
+            raise LoginThrottled(1)
+        self._inflight[username] = self._inflight.get(username, 0) + 1
+
+    def release(self, username: str, success: Optional[bool]):
+        """Finish an attempt; success=None records neither a success nor a failure"""
+        count = self._inflight.get(username, 1) - 1
+        if count:
+            self._inflight[username] = count
+        else:
+            self._inflight.pop(username, None)
+        if success is None:
+            return
+        if success:
+            self._failures.pop(username, None)
+            return
+        failures = self._failures.setdefault(username, deque())
+        failures.append(time.monotonic())
+        self._failures.move_to_end(username)
+        while len(self._failures) > self.max_tracked:
+            self._failures.popitem(last=False)
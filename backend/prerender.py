@@ -0,0 +1,384 @@
+"""Static HTML snapshots of the public site for nginx to serve directly.
+
+Each snapshot is the built CRA index.html with the page already rendered into
+``#root`` (same markup and Tailwind classes as the React components), a real
+<title>/description, and the data the React view needs inlined as
+``window.__PRERENDERED__`` so the app takes over without refetching:
+
+    index.html            /             (bootstrap payload)
+    page/<slug>.html      /page/<slug>  (bootstrap payload)
+    blog.html             /blog         (bootstrap + first page of summaries)
+    blog/<id>.html        /blog/<id>    (bootstrap + post)
+
+Writes mark snapshots dirty through Prerenderer.schedule(); a background task
+regenerates them after a short debounce, so a burst of admin edits costs one
+render. The template is copied into PRERENDER_DIR by the frontend container
+(``_template.html``) on start, which also drops the old snapshots since they
+reference the previous build's bundles; until a template exists nothing is
+written and nginx falls back to the plain SPA. A changed template is picked up
+by polling its mtime.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from html import escape
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+import orjson
+
+from pagination import CREATED_DESC, paginate
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = "_template.html"
+DESCRIPTION_META = re.compile(r'<meta name="description"[^>]*>')
+BLOG_POST_FIELDS = ("id", "title", "content", "excerpt", "image_url", "tags", "published",
+                    "reading_time", "created_at", "updated_at")
+
+
+def _attr(value) -> str:
+    return escape(str(value or ""), quote=True)
+
+
+def _text(value) -> str:
+    return escape(str(value or ""))
+
+
+def render_block(block: dict, services: List[dict]) -> str:
+    """Static markup for one page block; interactive blocks are left for React"""
+    content = block.get("content") or {}
+    kind = block.get("type")
+    if kind == "heading":
+        return f'<h2 class="text-3xl font-bold mb-4" style="color: var(--text-primary)">{_text(content.get("text"))}</h2>'
+    if kind == "text":
+        # Rich text from the admin editor is trusted HTML, as in the React view
+        return f'<div class="prose prose-lg mb-6" style="color: var(--text-primary)">{content.get("html") or ""}</div>'
+    if kind == "html":
+        return f'<div class="mb-6">{content.get("code") or ""}</div>'
+    if kind == "image":
+        caption = content.get("caption")
+        return (
+            f'<div class="mb-6"><img src="{_attr(content.get("url"))}" alt="{_attr(content.get("alt"))}" '
+            f'class="w-full rounded-lg shadow-lg" />'
+            + (f'<p class="text-center mt-2 text-sm" style="color: var(--text-secondary)">{_text(caption)}</p>' if caption else "")
+            + "</div>"
+        )
+    if kind == "quote":
+        author = content.get("author")
+        return (
+            '<blockquote class="border-l-4 pl-4 italic mb-6" style="border-color: var(--text-accent); color: var(--text-secondary)">'
+            f'<p class="text-lg">{_text(content.get("text"))}</p>'
+            + (f'<footer class="mt-2" style="color: var(--text-accent)">— {_text(author)}</footer>' if author else "")
+            + "</blockquote>"
+        )
+    if kind == "video":
+        return (
+            f'<div class="mb-6 aspect-video"><iframe src="{_attr(content.get("url"))}" class="w-full h-full rounded-lg" '
+            'allowfullscreen></iframe></div>'
+        )
+    if kind == "button":
+        return (
+            f'<div class="mb-6 text-center"><a href="{_attr(content.get("url") or "#")}" class="btn-primary inline-block">'
+            f'{_text(content.get("text") or "Кнопка")}</a></div>'
+        )
+    if kind == "divider":
+        return '<hr class="my-8" style="border-color: var(--border-color); border-width: 1px" />'
+    if kind == "cards":
+        cards = "".join(
+            f'<div class="glass-card"><h4 class="text-lg font-semibold mb-3" style="color: var(--text-accent)">{_text(card.get("title"))}</h4>'
+            f'<p style="color: var(--text-secondary)">{_text(card.get("text"))}</p></div>'
+            for card in content.get("items") or []
+        )
+        return f'<div class="grid md:grid-cols-3 gap-6 mb-6">{cards}</div>'
+    if kind == "accordion":
+        items = "".join(
+            f'<details class="glass-card"><summary class="font-semibold cursor-pointer" style="color: var(--text-accent)">'
+            f'{_text(item.get("title"))}</summary><p class="mt-3" style="color: var(--text-secondary)">{_text(item.get("content"))}</p></details>'
+            for item in content.get("items") or []
+        )
+        return f'<div class="space-y-3 mb-6">{items}</div>'
+    if kind == "tarot_card" and content.get("mode") != "card_of_the_day":
+        return (
+            '<div class="glass-card mb-6 text-center">'
+            f'<h3 class="text-2xl font-bold mb-3" style="color: var(--text-primary)">{_text(content.get("card_name") or "Карта Таро")}</h3>'
+            f'<p style="color: var(--text-secondary)">{_text(content.get("description"))}</p></div>'
+        )
+    if kind == "services":
+        return render_services(services)
+    # calendar, astro_widget, contact_info, card of the day: rendered once React loads
+    return ""
+
+
+def render_services(services: List[dict]) -> str:
+    cards = "".join(
+        f'<div class="glass-card"><h4 class="text-xl font-semibold mb-3" style="color: var(--text-accent)">{_text(s.get("title"))}</h4>'
+        f'<p style="color: var(--text-secondary)">{_text(s.get("description"))}</p></div>'
+        for s in services
+    )
+    return f'<div class="grid md:grid-cols-3 gap-6 mb-12">{cards}</div>'
+
+
+def render_blocks(blocks: Iterable[dict], services: List[dict]) -> str:
+    return "".join(render_block(block, services) for block in sorted(blocks, key=lambda b: b.get("order", 0)))
+
+
+def render_layout(bootstrap: dict, main: str) -> str:
+    settings = bootstrap.get("settings") or {}
+    links = "".join(
+        f'<a href="/page/{_attr(page["slug"])}" style="color: var(--text-primary)">{_text(page["title"])}</a>'
+        for page in bootstrap.get("pages") or []
+    )
+    return (
+        '<div class="min-h-screen">'
+        '<nav class="px-6 py-4"><div class="container mx-auto flex flex-wrap gap-6 items-center">'
+        f'<a href="/" class="text-2xl font-bold" style="color: var(--text-primary)">{_text(settings.get("site_title"))}</a>'
+        f'<a href="/blog" style="color: var(--text-primary); font-weight: 600">Блог</a>{links}'
+        '</div></nav>'
+        f'<main class="container mx-auto max-w-6xl px-6 py-12">{main}</main></div>'
+    )
+
+
+def render_home(bootstrap: dict) -> str:
+    services = bootstrap.get("services") or []
+    page = bootstrap.get("page")
+    if page:
+        return (
+            f'<h1 class="text-4xl font-bold mb-8" style="color: var(--text-primary)">{_text(page.get("title"))}</h1>'
+            + render_blocks(page.get("blocks") or [], services)
+        )
+    home = bootstrap.get("home_content") or {}
+    sections = "".join(
+        '<div class="glass-card">'
+        + (f'<h3 class="text-3xl font-bold mb-4" style="color: var(--text-primary)">{_text(section.get("title"))}</h3>' if section.get("title") else "")
+        + (f'<p class="text-lg mb-4" style="color: var(--text-secondary)">{_text(section.get("content"))}</p>' if section.get("content") else "")
+        + "</div>"
+        for section in home.get("sections") or []
+    )
+    return (
+        f'<section class="text-center py-12"><h2 class="text-5xl font-bold mb-6" style="color: var(--text-primary)">{_text(home.get("hero_title"))}</h2>'
+        f'<p class="text-xl" style="color: var(--text-secondary)">{_text(home.get("hero_subtitle"))}</p></section>'
+        f'<section class="space-y-16">{sections}</section>'
+        f'<section class="py-20"><h3 class="text-3xl font-bold text-center mb-12" style="color: var(--text-primary)">Мои Услуги</h3>'
+        f'{render_services(services)}</section>'
+    )
+
+
+def render_blog_list(items: List[dict]) -> str:
+    cards = "".join(
+        f'<a href="/blog/{_attr(post["id"])}" class="glass-card">'
+        + (f'<img src="{_attr(post["image_url"])}" alt="{_attr(post.get("title"))}" class="w-full h-48 object-cover rounded-t-lg mb-4" />' if post.get("image_url") else "")
+        + f'<div class="p-6"><h2 class="text-2xl font-bold mb-3" style="color: var(--text-primary)">{_text(post.get("title"))}</h2>'
+        f'<p style="color: var(--text-secondary)">{_text(post.get("excerpt"))}</p></div></a>'
+        for post in items
+    )
+    return (
+        '<h1 class="text-4xl font-bold mb-8" style="color: var(--text-primary)">Блог</h1>'
+        f'<div class="grid md:grid-cols-2 lg:grid-cols-3 gap-8">{cards}</div>'
+    )
+
+
+def render_post(post: dict) -> str:
+    return (
+        f'<article class="max-w-4xl mx-auto"><h1 class="text-4xl font-bold mb-6" style="color: var(--text-primary)">{_text(post.get("title"))}</h1>'
+        + (f'<img src="{_attr(post["image_url"])}" alt="{_attr(post.get("title"))}" class="w-full rounded-lg mb-8" />' if post.get("image_url") else "")
+        + f'<div class="prose prose-lg max-w-none" style="color: var(--text-primary)">{post.get("content") or ""}</div></article>'
+    )
+
+
+def fill_template(template: str, title: str, description: str, root: str, data: dict) -> Optional[str]:
+    """The SPA shell with a title, description, rendered #root and inlined data"""
+    if '<div id="root"></div>' not in template or "</head>" not in template:
+        return None
+    # </script> inside the JSON must not end the inline script
+    payload = orjson.dumps(data).decode().replace("</", "<\\/")
+    html = DESCRIPTION_META.sub("", template)
+    html = html.replace('<div id="root"></div>', f'<div id="root">{root}</div>', 1)
+    html = html.replace("</head>", (
+        f'<meta name="description" content="{_attr(description)}" />'
+        f"<script>window.__PRERENDERED__={payload}</script></head>"
+    ), 1)
+    start, end = html.find("<title>"), html.find("</title>")
+    if start != -1 and end > start:
+        html = html[:start] + f"<title>{_text(title)}</title>" + html[end + len("</title>"):]
+    return html
+
+
+class Prerenderer:
+    def __init__(self, db, out_dir: Path, bootstrap: Callable[[Optional[str]], Awaitable[Optional[bytes]]],
+                 blog_projection: dict, debounce: float = 2.0, poll_interval: float = 60.0):
+        self.db = db
+        self.out_dir = out_dir
+        self.bootstrap = bootstrap
+        self.blog_projection = blog_projection
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._template_mtime: Optional[int] = None
+        self._dirty_all = False
+        self._dirty_posts = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, post_id: Optional[str] = None):
+        """Mark one blog post (and the blog index) or, without post_id, every snapshot as stale"""
+        if post_id is None:
+            self._dirty_all = True
+        else:
+            self._dirty_posts.add(post_id)
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        self.schedule()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                # A frontend deploy replaced the template
+                if await self._template_mtime_now() == self._template_mtime:
+                    continue
+                self._dirty_all = True
+            # Let a burst of writes settle into a single render
+            await asyncio.sleep(self.debounce)
+            self._wake.clear()
+            render_all, self._dirty_all = self._dirty_all, False
+            posts, self._dirty_posts = self._dirty_posts, set()
+            try:
+                if render_all:
+                    await self.render_all()
+                elif posts:
+                    await self.render_posts(posts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Prerendering failed: {e}")
+
+    async def _template_mtime_now(self) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(os.stat, self.out_dir / TEMPLATE_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    async def _template(self) -> Optional[str]:
+        mtime = await self._template_mtime_now()
+        try:
+            template = await asyncio.to_thread((self.out_dir / TEMPLATE_NAME).read_text, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        self._template_mtime = mtime
+        return template
+
+    async def _write(self, relative: str, html: str):
+        path = self.out_dir / relative
+
+        def write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.tmp")
+            tmp.write_text(html, encoding="utf-8")
+            os.replace(tmp, path)
+
+        await asyncio.to_thread(write)
+
+    async def _render_into(self, template: str, relative: str, title: str, description: str,
+                           root: str, data: dict, written: set):
+        html = fill_template(template, title, description, root, data)
+        if html is not None:
+            await self._write(relative, html)
+            written.add(relative)
+
+    async def render_all(self) -> int:
+        """Regenerate every snapshot and remove those of pages/posts no longer published"""
+        template = await self._template()
+        if template is None:
+            logger.info("No prerender template yet, skipping snapshots")
+            return 0
+        written = set()
+        home = orjson.loads(await self.bootstrap(None))
+        await self._render_page_snapshots(template, home, written)
+        await self.render_posts(None, template=template, bootstrap=home, written=written)
+        await asyncio.to_thread(self._prune, written)
+        return len(written)
+
+    async def _render_page_snapshots(self, template: str, home: dict, written: set):
+        settings = home.get("settings") or {}
+        site_title = settings.get("site_title") or ""
+        await self._render_into(
+            template, "index.html", site_title, settings.get("site_description"),
+            render_layout(home, render_home(home)), {"path": "/", "bootstrap": home}, written
+        )
+        for nav_page in home.get("pages") or []:
+            if "/" in nav_page["slug"] or nav_page["slug"].startswith("."):
+                # Not a single file name under page/
+                continue
+            body = await self.bootstrap(nav_page["slug"])
+            if body is None:
+                continue
+            bootstrap = orjson.loads(body)
+            page = bootstrap["page"]
+            await self._render_into(
+                template, f"page/{page['slug']}.html", f"{page['title']} — {site_title}",
+                settings.get("site_description"),
+                render_layout(bootstrap, f'<h1 class="text-4xl font-bold mb-8" style="color: var(--text-primary)">{_text(page["title"])}</h1>'
+                              + render_blocks(page.get("blocks") or [], bootstrap.get("services") or [])),
+                {"path": f"/page/{page['slug']}", "bootstrap": bootstrap}, written
+            )
+
+    async def render_posts(self, post_ids: Optional[Iterable[str]], template: Optional[str] = None,
+                           bootstrap: Optional[dict] = None, written: Optional[set] = None):
+        """Regenerate the blog index and the given posts (all published posts for None)"""
+        template = template or await self._template()
+        if template is None:
+            return
+        written = written if written is not None else set()
+        chrome = bootstrap or orjson.loads(await self.bootstrap(None))
+        chrome = {key: value for key, value in chrome.items() if key not in ("page", "home_content")}
+        settings = chrome.get("settings") or {}
+        site_title = settings.get("site_title") or ""
+
+        items, next_cursor = await paginate(self.db.blog_posts, {"published": True}, CREATED_DESC, 20, None,
+                                            self.blog_projection)
+        await self._render_into(
+            template, "blog.html", f"Блог — {site_title}", settings.get("site_description"),
+            render_layout(chrome, render_blog_list(items)),
+            {"path": "/blog", "bootstrap": chrome, "blog": {"items": items, "next_cursor": next_cursor}}, written
+        )
+
+        query = {"published": True}
+        if post_ids is not None:
+            query["id"] = {"$in": list(post_ids)}
+        projection = {"_id": 0, **{name: 1 for name in BLOG_POST_FIELDS}}
+        seen = set()
+        async for post in self.db.blog_posts.find(query, projection):
+            seen.add(post["id"])
+            await self._render_into(
+                template, f"blog/{post['id']}.html", f"{post.get('title')} — {site_title}",
+                post.get("excerpt") or settings.get("site_description"),
+                render_layout(chrome, render_post(post)),
+                {"path": f"/blog/{post['id']}", "bootstrap": chrome, "post": post}, written
+            )
+        # Posts that were unpublished or deleted
+        for post_id in set(post_ids or ()) - seen:
+            await asyncio.to_thread((self.out_dir / "blog" / f"{post_id}.html").unlink, missing_ok=True)
+
+    def _prune(self, written: set):
+        for path in list(self.out_dir.rglob("*.html")):
+            relative = path.relative_to(self.out_dir).as_posix()
+            if relative != TEMPLATE_NAME and relative not in written:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,239 @@
+"""Slow MongoDB command log, attributed to the route that issued it.
+
+QueryProfiler is a pymongo CommandListener on the application's client. Each
+command slower than the threshold becomes a record with the route template of
+the request (read from a context variable that QueryRouteMiddleware sets;
+Motor copies the context into its executor threads), the collection, the
+command, the shape of its filter with values replaced by "?", the duration
+and nReturned. Records go to the log and to a fixed-size ring buffer read by
+the admin panel.
+
+Ordinary replies don't say how many documents were examined, so slow reads
+(find, aggregate, count, distinct) are re-run as ``explain`` with
+executionStats by a background task, at most once per shape per
+explain_interval, filling in docsExamined and the winning plan (COLLSCAN,
+IXSCAN, ...). A command examining far more documents than it returns is the
+missing index.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# Where each command keeps its filter
+_FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+_WRITE_FILTERS = {"update": ("updates", "q"), "delete": ("deletes", "q")}
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def query_shape(value: Any) -> Any:
+    """value with every literal replaced by "?", keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return ["?"]
+    return "?"
+
+
+def command_shape(name: str, command: dict) -> Any:
+    if name in _FILTER_FIELDS:
+        shape = {"filter": query_shape(command.get(_FILTER_FIELDS[name]) or {})}
+        if command.get("sort"):
+            shape["sort"] = dict(command["sort"])
+        return shape
+    if name in _WRITE_FILTERS:
+        field, key = _WRITE_FILTERS[name]
+        statements = command.get(field) or [{}]
+        return {"filter": query_shape(statements[0].get(key) or {})}
+    if name == "aggregate":
+        # $match is what an index serves; the other stages by name only
+        return [
+            query_shape(stage) if "$match" in stage or "$sort" in stage else next(iter(stage), "?")
+            for stage in command.get("pipeline") or []
+        ]
+    return None
+
+
+def returned_count(name: str, reply: dict) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch is not None else None
+    if name == "distinct":
+        return len(reply.get("values") or [])
+    if isinstance(reply.get("n"), int):
+        return reply["n"]
+    return None
+
+
+def _explain_summary(explain: dict) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """(docsExamined, nReturned, winning plan stage) from an explain reply"""
+    planner, stats = explain.get("queryPlanner"), explain.get("executionStats")
+    if stats is None:
+        # Aggregations that don't push everything down report the first stage's cursor
+        for stage in explain.get("stages") or []:
+            cursor = stage.get("$cursor")
+            if cursor:
+                planner, stats = cursor.get("queryPlanner"), cursor.get("executionStats")
+                break
+    plan = (planner or {}).get("winningPlan") or {}
+    plan = plan.get("queryPlan", plan)
+    while "inputStage" in plan:
+        plan = plan["inputStage"]
+    if stats is None:
+        return None, None, plan.get("stage")
+    return stats.get("totalDocsExamined"), stats.get("nReturned"), plan.get("stage")
+
+
+class QueryProfiler(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = 100.0, size: int = 200,
+                 explain: bool = True, explain_interval: float = 60.0):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.records: "deque[Dict[str, Any]]" = deque(maxlen=size)
+        self._started: Dict[Tuple, Tuple[dict, Optional[str]]] = {}
+        self._explained: Dict[str, float] = {}
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- CommandListener, called on Motor's executor threads ----
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        scope = _request_scope.get()
+        route = None
+        if scope is not None:
+            matched = scope.get("route")
+            route = f"{scope['method']} {getattr(matched, 'path', scope['path'])}"
+        self._started[(event.connection_id, event.request_id)] = (event.command, route)
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, None)
+
+    def _finish(self, event, reply: Optional[dict]):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+        command, route = started
+        name = event.command_name
+        collection = command.get(name)
+        if not isinstance(collection, str):
+            collection = command.get("collection", "")
+        record = {
+            "time": datetime.now(timezone.utc),
+            "route": route or "background",
+            "database": event.database_name,
+            "collection": collection,
+            "command": name,
+            "shape": command_shape(name, command),
+            "duration_ms": round(duration_ms, 1),
+            "n_returned": returned_count(name, reply) if reply is not None else None,
+            "docs_examined": None,
+            "plan": None,
+            "error": None if reply is not None else str(event.failure.get("errmsg", "")),
+        }
+        self.records.append(record)
+        logger.warning(
+            f"Slow query {record['duration_ms']} ms: {collection}.{name} {orjson.dumps(record['shape']).decode()} "
+            f"from {record['route']}, returned {record['n_returned']}"
+        )
+        if self.explain and name in EXPLAINABLE and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._queue_explain, record, command)
+
+    # ---- explain worker, on the event loop ----
+
+    def _queue_explain(self, record: Dict[str, Any], command: dict):
+        key = f"{record['database']}.{record['collection']}.{record['command']}:{orjson.dumps(record['shape']).decode()}"
+        now = time.monotonic()
+        if now - self._explained.get(key, float("-inf")) < self.explain_interval:
+            return
+        self._explained[key] = now
+        try:
+            self._queue.put_nowait((record, command))
+        except asyncio.QueueFull:
+            pass
+
+    def start(self, client):
+        if self._task is not None:
+            return
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=100)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+
+    async def _run(self):
+        while True:
+            record, command = await self._queue.get()
+            # Session and cluster-time fields belong to the original command
+            inner = {key: value for key, value in command.items() if not key.startswith("$") and key != "lsid"}
+            try:
+                explain = await self._client[record["database"]].command(
+                    {"explain": inner, "verbosity": "executionStats"}
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Could not explain slow {record['collection']}.{record['command']}: {e}")
+                continue
+            docs_examined, n_returned, plan = _explain_summary(explain)
+            record["docs_examined"] = docs_examined
+            record["plan"] = plan
+            if record["n_returned"] is None:
+                record["n_returned"] = n_returned
+            logger.warning(
+                f"Slow query {record['collection']}.{record['command']} from {record['route']}: "
+                f"{plan} examined {docs_examined} documents, returned {n_returned}"
+            )
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Newest records first"""
+        return list(reversed(self.records))[:limit]
+
+
+class QueryRouteMiddleware:
+    """Makes the current request visible to QueryProfiler through a context variable"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The router adds the matched route to this same dict before any query runs
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
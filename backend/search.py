@@ -0,0 +1,104 @@
+"""Full-text search over published blog posts and pages.
+
+Both collections keep a plain-text ``search_text`` field, written together
+with the document: the stripped HTML of a post, or the visible text of a
+page's blocks. A MongoDB text index over title, tags and search_text with
+Russian stemming (see indexes.py) answers the queries, so "карты" also finds
+"карта" and "картам"; search() runs the two collections concurrently, merges
+them by text score and cuts a snippet around the first matching word.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, Iterable, List
+
+from html_text import strip_html
+
+SNIPPET_LENGTH = 160
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Block content fields holding visible text; "html" fields are stripped
+_BLOCK_TEXT_FIELDS = ("title", "card_name", "text", "description", "caption", "alt", "author",
+                      "address", "phone", "email")
+_BLOCK_HTML_FIELDS = ("html", "code")
+
+
+def _block_parts(content: Dict[str, Any]) -> Iterable[str]:
+    for field in _BLOCK_TEXT_FIELDS:
+        if isinstance(content.get(field), str):
+            yield content[field]
+    for field in _BLOCK_HTML_FIELDS:
+        if isinstance(content.get(field), str):
+            yield strip_html(content[field])
+    # cards ({title, text}) and accordion ({title, content}) items
+    for item in content.get("items") or []:
+        if isinstance(item, dict):
+            yield from _block_parts(item)
+            if isinstance(item.get("content"), str):
+                yield item["content"]
+
+
+def page_search_text(blocks: Iterable[Dict[str, Any]]) -> str:
+    """Visible text of a page's blocks, in block order"""
+    ordered = sorted(blocks, key=lambda block: block.get("order", 0))
+    parts = (part.strip() for block in ordered for part in _block_parts(block.get("content") or {}))
+    return " ".join(part for part in parts if part)
+
+
+def query_terms(query: str) -> List[str]:
+    return [word.lower() for word in _WORD.findall(query)]
+
+
+def make_snippet(text: str, terms: List[str], length: int = SNIPPET_LENGTH) -> str:
+    """About length characters of text around the earliest occurrence of a query term"""
+    if len(text) <= length:
+        return text
+    lowered = text.lower()
+    # Compare stems loosely: the index matched "карты" for "карта", so look for "карт"
+    positions = [lowered.find(term[:max(4, len(term) - 2)]) for term in terms]
+    positions = [position for position in positions if position != -1]
+    if not positions:
+        cut = text[:length].rsplit(" ", 1)[0]
+        return f"{cut}…"
+    start = max(0, min(positions) - length // 3)
+    if start:
+        # Begin at a word boundary
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < min(positions) else start
+    end = start + length
+    snippet = text[start:end]
+    if end < len(text):
+        snippet = snippet.rsplit(" ", 1)[0] + "…"
+    return ("…" if start else "") + snippet
+
+
+async def _search_collection(collection, query: str, fields: Dict[str, int], limit: int, max_time_ms: int):
+    projection = {"_id": 0, "search_text": 1, **fields, "score": {"$meta": "textScore"}}
+    cursor = collection.find({"$text": {"$search": query}, "published": True}, projection)
+    cursor = cursor.sort([("score", {"$meta": "textScore"})]).limit(limit).max_time_ms(max_time_ms)
+    return await cursor.to_list(limit)
+
+
+async def search(db, query: str, limit: int = 10, max_time_ms: int = 200) -> List[Dict[str, Any]]:
+    """Best matching published posts and pages, highest text score first
+
+    Raises pymongo.errors.ExecutionTimeout when a query exceeds max_time_ms.
+    """
+    posts, pages = await asyncio.gather(
+        _search_collection(db.blog_posts, query, {"id": 1, "title": 1, "excerpt": 1}, limit, max_time_ms),
+        _search_collection(db.pages, query, {"id": 1, "title": 1, "slug": 1}, limit, max_time_ms),
+    )
+    terms = query_terms(query)
+    results = [
+        {"type": "post", "id": post["id"], "title": post["title"], "url": f"/blog/{post['id']}",
+         "snippet": make_snippet(post.get("search_text") or post.get("excerpt") or "", terms),
+         "score": post["score"]}
+        for post in posts
+    ] + [
+        {"type": "page", "id": page["id"], "title": page["title"], "url": f"/page/{page['slug']}",
+         "snippet": make_snippet(page.get("search_text") or "", terms),
+         "score": page["score"]}
+        for page in pages
+    ]
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
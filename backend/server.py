@@ -1,40 +1,134 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Query, Header, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import FileResponse
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout
 import os
 import logging
 from pathlib import Path
-import shutil
-import uuid as uuid_lib
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
+from typing import List, Optional, Dict, Any, Literal
 import uuid
-from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
+from datetime import date, datetime, timezone, timedelta
 import jwt
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import base64
+import asyncio
+import hashlib
+import time
+import orjson
+from email.utils import formatdate
+from bisect import bisect_left
+from itertools import accumulate
+from content_cache import CacheEntry, ContentCache
+from indexes import ensure_indexes
+from migrations import backfill_slot_times
+from pagination import CREATED_DESC, CursorPage, paginate, stream_ndjson
+from html_text import strip_html, make_excerpt, reading_time
+from mailer import EmailOutbox, transport_from_env
+from passwords import PasswordHasher, HasherOverloaded, LoginThrottle, LoginThrottled
+from auth_cache import TokenCache, PrincipalCache
+from uploads import UploadSizeLimit, UploadTooLarge, store_upload
+from media_variants import DerivativeWorker, choose_variant
+from http_cache import IMMUTABLE, ConditionalGetMiddleware, file_response
+from compression import CompressedBodies, CompressionMiddleware
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from query_profiler import QueryProfiler, QueryRouteMiddleware
+from slot_times import SLOTS_TIMEZONE, TIMESLOT_ORDER, slot_bounds, local_today, day_range, expand_schedule
+from prerender import Prerenderer
+from search import search as search_content, page_search_text
+from blog_tags import TAG_CLOUD_ORDER, apply_tag_changes, normalize_tags
+from astro import ASTRO_LATITUDE, ASTRO_LONGITUDE, AstroDays
+from tarot import CARDS, DECK, SPREADS, CardOfTheDay, card_payload, draw as draw_tarot
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Prometheus-style metrics, served at /metrics
+metrics = Metrics(lag_interval=float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5")))
+
+# Commands slower than SLOW_QUERY_MS are logged and kept for /api/admin/slow-queries
+query_profiler = QueryProfiler(
+    threshold_ms=float(os.getenv("SLOW_QUERY_MS", "100")),
+    size=int(os.getenv("SLOW_QUERY_LOG_SIZE", "200")),
+    explain=os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true",
+)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[metrics.command_listener, query_profiler])
 db = client[os.environ['DB_NAME']]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_QUEUE", "16")),
+    rounds=int(os.environ["BCRYPT_ROUNDS"]) if os.getenv("BCRYPT_ROUNDS") else None,
+    target_ms=float(os.getenv("BCRYPT_TARGET_MS", "250")),
+)
+token_cache = TokenCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "1024")))
+principal_cache = PrincipalCache(ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")))
+login_throttle = LoginThrottle(
+    max_failures=int(os.getenv("LOGIN_MAX_FAILURES", "5")),
+    window=float(os.getenv("LOGIN_FAILURE_WINDOW", "300")),
+)
 security = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY", "my_secret_key")
 ALGORITHM = "HS256"
 
+# Public content cache (pages, menu, settings, services, home content)
+content_cache = ContentCache(
+    maxsize=int(os.getenv("CONTENT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("CONTENT_CACHE_TTL", "300")),
+)
+
+# Uploaded files are stored under their SHA-256 in backend/uploads
+UPLOAD_DIR = ROOT_DIR / "uploads"
+UPLOAD_DIR.mkdir(exist_ok=True)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+
+# Resized WebP/AVIF copies of uploaded images, generated in the background
+def forget_media_variants(media: dict):
+    media_cache.invalidate(media["url"])
+
+media_cache = ContentCache(maxsize=int(os.getenv("MEDIA_CACHE_SIZE", "2048")), ttl=3600)
+# on_done only reaches the worker process that ran the job, so records still
+# pending are re-read this often to notice jobs finished elsewhere
+MEDIA_PENDING_TTL = float(os.getenv("MEDIA_PENDING_TTL", "10"))
+derivative_worker = DerivativeWorker(
+    db,
+    UPLOAD_DIR,
+    widths=[int(w) for w in os.getenv("MEDIA_VARIANT_WIDTHS", "320,640,1280,1920").split(",")],
+    workers=int(os.getenv("MEDIA_WORKERS", "2")),
+    on_done=forget_media_variants,
+)
+
+# Full-text search queries are cut off after this many milliseconds
+SEARCH_TIMEOUT_MS = int(os.getenv("SEARCH_TIMEOUT_MS", "200"))
+
+# Astro widget data, computed per day and location and kept in memory
+astro_days = AstroDays(maxsize=int(os.getenv("ASTRO_CACHE_DAYS", "4096")))
+MAX_ASTRO_DAYS = 62
+
+# Tarot deck and the card of the day live in memory; the salt makes this site's daily cards its own
+card_of_the_day = CardOfTheDay(salt=os.getenv("TAROT_DAY_SALT", ""))
+TAROT_DECK_BODY = orjson.dumps([card_payload(card) for card in DECK])
+
+# Static HTML snapshots of public pages, served by the frontend nginx
+PRERENDER_DIR = Path(os.getenv("PRERENDER_DIR", str(ROOT_DIR / "prerendered")))
+
+# Outgoing email is queued and delivered by a background worker
+email_outbox = EmailOutbox(
+    db,
+    transport_from_env(),
+    batch_size=int(os.getenv("EMAIL_BATCH_SIZE", "10")),
+    max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", "6")),
+    base_delay=float(os.getenv("EMAIL_RETRY_BASE_DELAY", "30")),
+)
+
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # ============= MODELS =============
@@ -97,6 +191,13 @@ class PageUpdate(BaseModel):
     is_homepage: Optional[bool] = None
     order: Optional[int] = None
 
+class NavPage(BaseModel):
+    """Published page as listed in site navigation"""
+    id: str
+    title: str
+    slug: str
+    order: int = 0
+
 class MenuItem(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -143,6 +244,13 @@ class SettingsUpdate(BaseModel):
     social_links: Optional[Dict[str, str]] = None
     enabled_themes: Optional[List[str]] = None
 
+class MediaVariant(BaseModel):
+    filename: str  # inside uploads/variants
+    width: int
+    height: int
+    format: str  # mime type
+    size: int
+
 class MediaItem(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -150,6 +258,11 @@ class MediaItem(BaseModel):
     url: str
     type: str  # image, file
     size: int
+    sha256: Optional[str] = None  # set for files uploaded to disk
+    width: Optional[int] = None  # images only, filled in with the variants
+    height: Optional[int] = None
+    variants: List[MediaVariant] = []
+    variants_status: Optional[str] = None  # pending, processing, done, failed
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class BlogPost(BaseModel):
@@ -161,9 +274,103 @@ class BlogPost(BaseModel):
     image_url: Optional[str] = ""
     tags: List[str] = []
     published: bool = False
+    reading_time: int = 0  # Minutes, computed on write
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class BlogPostSummary(BaseModel):
+    """Blog list item without the HTML body"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: Optional[str] = None
+    excerpt: Optional[str] = ""
+    image_url: Optional[str] = ""
+    tags: List[str] = []
+    published: bool = False
+    reading_time: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class BlogTag(BaseModel):
+    tag: str
+    count: int
+
+class MoonDay(BaseModel):
+    date: date
+    moon_phase: str
+    moon_illumination: float  # 0..1
+    moon_age: float  # days since new moon
+    moon_sign: str
+
+class ZodiacDay(BaseModel):
+    date: date
+    sun_sign: str
+    sun_longitude: float
+    moon_sign: str
+    moon_longitude: float
+
+class PlanetaryHour(BaseModel):
+    start: datetime
+    end: datetime
+    planet: str
+    daytime: bool
+
+class PlanetaryHoursDay(BaseModel):
+    date: date
+    sunrise: Optional[datetime] = None  # None during polar day/night
+    sunset: Optional[datetime] = None
+    planetary_hours: List[PlanetaryHour] = []
+
+class TarotCard(BaseModel):
+    id: str
+    name: str
+    arcana: Literal["major", "minor"]
+    suit: Optional[Literal["wands", "cups", "swords", "pentacles"]] = None
+    rank: int
+    upright: str
+    reversed: str
+
+class TarotSpread(BaseModel):
+    id: str
+    name: str
+    positions: List[str]
+
+class DrawnCard(BaseModel):
+    position: str
+    card: TarotCard
+    reversed: bool
+    meaning: str
+
+class TarotReading(BaseModel):
+    spread: str
+    name: str
+    seed: int
+    cards: List[DrawnCard]
+
+class TarotCardOfTheDay(DrawnCard):
+    date: date
+
+class SlowQuery(BaseModel):
+    time: datetime
+    route: str  # "GET /api/pages/{slug}", or "background" outside a request
+    database: str
+    collection: str
+    command: str
+    shape: Any = None  # filter (or pipeline) with values replaced by "?"
+    duration_ms: float
+    n_returned: Optional[int] = None
+    docs_examined: Optional[int] = None  # from explain, filled in shortly after
+    plan: Optional[str] = None  # COLLSCAN, IXSCAN, ...
+    error: Optional[str] = None
+
+class SearchResult(BaseModel):
+    type: Literal["post", "page"]
+    id: str
+    title: str
+    url: str
+    snippet: str
+    score: float
+
 class BlogPostCreate(BaseModel):
     title: str
     content: str
@@ -239,6 +446,8 @@ class TimeSlot(BaseModel):
     date: str  # YYYY-MM-DD
     start_time: str  # HH:MM
     end_time: str  # HH:MM
+    start: Optional[datetime] = None  # date + start_time in SLOTS_TIMEZONE, as UTC
+    end: Optional[datetime] = None
     available: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -251,6 +460,26 @@ class TimeSlotCreate(BaseModel):
 class TimeSlotUpdate(BaseModel):
     available: Optional[bool] = None
 
+class TimeSlotSchedule(BaseModel):
+    """Recurring schedule expanded into individual slots"""
+    date_from: date
+    date_to: date
+    weekdays: List[int] = [0, 1, 2, 3, 4]  # 0 = Monday
+    start_time: str  # HH:MM, first slot of the day starts here
+    end_time: str  # HH:MM, last slot of the day ends by here
+    duration: int = Field(60, ge=5, le=720)  # minutes
+    step: Optional[int] = Field(None, ge=5, le=1440)  # minutes between slot starts, defaults to duration
+    exclude_dates: List[date] = []
+    available: bool = True
+
+class TimeSlotBulkResult(BaseModel):
+    created: int
+    skipped: int  # overlapped an existing slot
+
+class DayAvailability(BaseModel):
+    date: str  # YYYY-MM-DD
+    available: int
+
 class Appointment(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -280,40 +509,143 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    username = token_cache.get(token)
+    if username is not None:
+        return username
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        # Without exp a token could never be dropped from token_cache
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp"]})
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
+        token_cache.put(token, username, payload["exp"])
         return username
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def send_email_notification(to_email: str, subject: str, content: str):
-    """Send email via SendGrid"""
-    sendgrid_key = os.getenv('SENDGRID_API_KEY')
-    sender_email = os.getenv('SENDER_EMAIL')
-    
-    if not sendgrid_key or not sender_email:
-        logging.warning("SendGrid not configured, skipping email")
-        return False
-    
+async def get_current_principal(username: str = Depends(verify_token)):
+    """The authenticated user document (without password hash)"""
+    user = principal_cache.get(username)
+    if user is None:
+        user = await db.users.find_one({"username": username}, {"_id": 0, "password_hash": 0})
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.put(username, user)
+    return user
+
+async def send_email_notification(to_email: str, subject: str, content: str):
+    """Queue an email for background delivery"""
     try:
-        message = Mail(
-            from_email=sender_email,
-            to_emails=to_email,
-            subject=subject,
-            html_content=content
-        )
-        sg = SendGridAPIClient(sendgrid_key)
-        response = sg.send(message)
-        return response.status_code == 202
+        return await email_outbox.enqueue(to_email, subject, content)
     except Exception as e:
-        logging.error(f"Failed to send email: {str(e)}")
-        return False
+        logging.error(f"Failed to queue email: {str(e)}")
+        return None
+
+# updated_at of the built-in defaults served before the admin saves anything; fixed so their ETag is stable
+DEFAULT_CONTENT_UPDATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def latest_update(value) -> Optional[datetime]:
+    """Newest updated_at (falling back to created_at) among the models of a response"""
+    items = value if isinstance(value, list) else [value]
+    stamps = [getattr(item, "updated_at", None) or getattr(item, "created_at", None) for item in items]
+    return max((stamp for stamp in stamps if stamp), default=None)
+
+async def content_entry(key: str, loader, response_type, allow_missing: bool = False) -> CacheEntry:
+    """content_cache entry for a public content view, loading it on a miss
+
+    The body is None when loader finds nothing, unless allow_missing makes that a JSON null.
+    """
+    async def load():
+        data = await loader()
+        if data is None and not allow_missing:
+            return None
+        adapter = TypeAdapter(response_type)
+        value = adapter.validate_python(data)
+        return adapter.dump_json(value), latest_update(value)
+
+    return await content_cache.get_or_load(key, load)
+
+def cached_response(entry: CacheEntry, not_found: str = "Not found") -> Response:
+    """Cached JSON body with its validators"""
+    if entry.body is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    headers = {"ETag": entry.etag}
+    if entry.last_modified:
+        headers["Last-Modified"] = formatdate(entry.last_modified.timestamp(), usegmt=True)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+MAX_BULK_SLOTS = int(os.getenv("MAX_BULK_SLOTS", "2000"))
+# Public slot listing: at most this many days and slots per request
+MAX_AVAILABLE_SLOT_DAYS = 62
+MAX_AVAILABLE_SLOTS = 500
+
+def timeslot_range(first: Optional[date], last: Optional[date], upcoming: bool = False) -> dict:
+    """Filter on slot start for the local days first..last; upcoming also drops slots already started"""
+    if first and last and last < first:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    condition = day_range(first, last)
+    if upcoming:
+        now = datetime.now(timezone.utc)
+        condition["$gte"] = max(condition.get("$gte", now), now)
+    return {"start": condition} if condition else {}
+
+async def fetch_page(collection, query: dict, sort, limit: int, after: Optional[str], projection: Optional[dict] = None):
+    """One keyset page as a CursorPage payload, serialized straight from the Motor documents"""
+    try:
+        items, next_cursor = await paginate(collection, query, sort, limit, after, projection)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+# Stored only for search and excerpt bookkeeping; left out of admin listings and exports
+INTERNAL_FIELDS = {"search_text": 0, "excerpt_auto": 0}
+
+def export_ndjson(collection, query: dict, sort, filename: str, projection: Optional[dict] = None):
+    """Stream a whole collection query as NDJSON for admin exports"""
+    cursor = collection.find(query, {"_id": 0, **(projection or {})}).sort(list(sort))
+    return StreamingResponse(
+        stream_ndjson(cursor),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'}
+    )
+
+BLOG_SUMMARY_FIELDS = tuple(BlogPostSummary.model_fields)
+
+def blog_summary_projection(fields: Optional[str]) -> dict:
+    """Projection for blog list endpoints, optionally narrowed by ?fields=a,b"""
+    names = BLOG_SUMMARY_FIELDS
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(BLOG_SUMMARY_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {"_id": 0, "id": 1, **{name: 1 for name in names}}
+
+def blog_summary_fields(content: str, excerpt: Optional[str]) -> dict:
+    """Excerpt, reading time and search text stored alongside a post's HTML"""
+    text = strip_html(content)
+    fields = {"reading_time": reading_time(text), "search_text": text}
+    if excerpt:
+        fields.update(excerpt=excerpt, excerpt_auto=False)
+    else:
+        fields.update(excerpt=make_excerpt(text), excerpt_auto=True)
+    return fields
+
+def invalidate_page_cache(*pages: Optional[dict]):
+    """Drop cached public views that may include the given page documents"""
+    keys = {"pages", "nav_pages"}
+    for page in pages:
+        if not page:
+            continue
+        keys.add(f"page:{page.get('slug')}")
+        if page.get("is_homepage"):
+            keys.add("homepage_page")
+    content_cache.invalidate(*keys)
+    prerenderer.schedule()
 
 # ============= AUTH ROUTES =============
 
@@ -325,7 +657,10 @@ async def register(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Hash password
-    password_hash = pwd_context.hash(user_data.password)
+    try:
+        password_hash = await password_hasher.hash(user_data.password)
+    except HasherOverloaded:
+        raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
     
     # Create user
     user = User(
@@ -335,8 +670,8 @@ async def register(user_data: UserCreate):
     )
     
     doc = user.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.users.insert_one(doc)
+    principal_cache.invalidate(user.username)
     
     # Create token
     access_token = create_access_token(data={"sub": user.username})
@@ -344,82 +679,99 @@ async def register(user_data: UserCreate):
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
-    user_doc = await db.users.find_one({"username": credentials.username})
-    if not user_doc:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        login_throttle.acquire(credentials.username)
+    except LoginThrottled as e:
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers={"Retry-After": str(e.retry_after)})
     
-    if not pwd_context.verify(credentials.password, user_doc["password_hash"]):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    success = False
+    try:
+        user_doc = await db.users.find_one({"username": credentials.username})
+        if not user_doc:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(credentials.password, user_doc["password_hash"])
+        except HasherOverloaded:
+            success = None
+            raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+        if not valid:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        success = True
+        if new_hash:
+            await db.users.update_one({"username": credentials.username}, {"$set": {"password_hash": new_hash}})
+    finally:
+        login_throttle.release(credentials.username, success=success)
     
     access_token = create_access_token(data={"sub": credentials.username})
     return Token(access_token=access_token)
 
 @api_router.get("/auth/me")
-async def get_current_user(username: str = Depends(verify_token)):
-    user_doc = await db.users.find_one({"username": username}, {"_id": 0, "password_hash": 0})
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user_doc
+async def get_current_user(user: dict = Depends(get_current_principal)):
+    return user
 
 # ============= PUBLIC ROUTES =============
 
+async def published_pages_entry() -> CacheEntry:
+    async def load():
+        return await db.pages.find({"published": True}, {"_id": 0}).sort("order", 1).to_list(100)
+    return await content_entry("pages", load, List[Page])
+
+async def nav_pages_entry() -> CacheEntry:
+    async def load():
+        projection = {"_id": 0, "id": 1, "title": 1, "slug": 1, "order": 1}
+        return await db.pages.find({"published": True}, projection).sort("order", 1).to_list(100)
+    return await content_entry("nav_pages", load, List[NavPage])
+
+async def page_entry(slug: str) -> CacheEntry:
+    async def load():
+        return await db.pages.find_one({"slug": slug, "published": True}, {"_id": 0})
+    return await content_entry(f"page:{slug}", load, Page)
+
+async def homepage_page_entry() -> CacheEntry:
+    async def load():
+        return await db.pages.find_one({"is_homepage": True, "published": True}, {"_id": 0})
+    # null if no homepage page set
+    return await content_entry("homepage_page", load, Optional[Page], allow_missing=True)
+
+async def menu_entry() -> CacheEntry:
+    async def load():
+        return await db.menu_items.find({}, {"_id": 0}).sort("order", 1).to_list(50)
+    return await content_entry("menu", load, List[MenuItem])
+
+async def settings_entry() -> CacheEntry:
+    async def load():
+        settings = await db.settings.find_one({"id": "site_settings"}, {"_id": 0})
+        # Fall back to default settings
+        return settings or Settings(updated_at=DEFAULT_CONTENT_UPDATED_AT)
+    return await content_entry("settings", load, Settings)
+
 @api_router.get("/pages", response_model=List[Page])
 async def get_published_pages():
-    pages = await db.pages.find({"published": True}, {"_id": 0}).sort("order", 1).to_list(100)
-    for page in pages:
-        if isinstance(page.get('created_at'), str):
-            page['created_at'] = datetime.fromisoformat(page['created_at'])
-        if isinstance(page.get('updated_at'), str):
-            page['updated_at'] = datetime.fromisoformat(page['updated_at'])
-    return pages
+    return cached_response(await published_pages_entry())
 
 @api_router.get("/pages/{slug}", response_model=Page)
 async def get_page_by_slug(slug: str):
-    page = await db.pages.find_one({"slug": slug, "published": True}, {"_id": 0})
-    if not page:
-        raise HTTPException(status_code=404, detail="Page not found")
-    if isinstance(page.get('created_at'), str):
-        page['created_at'] = datetime.fromisoformat(page['created_at'])
-    if isinstance(page.get('updated_at'), str):
-        page['updated_at'] = datetime.fromisoformat(page['updated_at'])
-    return page
+    return cached_response(await page_entry(slug), not_found="Page not found")
 
 @api_router.get("/homepage-page")
 async def get_homepage_page():
     """Get the page marked as homepage, if any"""
-    page = await db.pages.find_one({"is_homepage": True, "published": True}, {"_id": 0})
-    if page:
-        if isinstance(page.get('created_at'), str):
-            page['created_at'] = datetime.fromisoformat(page['created_at'])
-        if isinstance(page.get('updated_at'), str):
-            page['updated_at'] = datetime.fromisoformat(page['updated_at'])
-    return page  # Returns None if no homepage page set
+    return cached_response(await homepage_page_entry())
 
 @api_router.get("/menu", response_model=List[MenuItem])
 async def get_menu_items():
-    items = await db.menu_items.find({}, {"_id": 0}).sort("order", 1).to_list(50)
-    for item in items:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return items
+    return cached_response(await menu_entry())
 
 @api_router.get("/settings", response_model=Settings)
 async def get_settings():
-    settings = await db.settings.find_one({"id": "site_settings"}, {"_id": 0})
-    if not settings:
-        # Return default settings
-        default_settings = Settings()
-        return default_settings
-    if isinstance(settings.get('updated_at'), str):
-        settings['updated_at'] = datetime.fromisoformat(settings['updated_at'])
-    return settings
+    return cached_response(await settings_entry())
 
 @api_router.post("/contact", response_model=Contact)
 async def create_contact(contact_data: ContactCreate):
     contact = Contact(**contact_data.model_dump())
     
     doc = contact.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.contacts.insert_one(doc)
     
     # Send email notification to admin
@@ -436,7 +788,7 @@ async def create_contact(contact_data: ContactCreate):
             </body>
         </html>
         """
-        send_email_notification(
+        await send_email_notification(
             to_email=settings['admin_email'],
             subject="Новое сообщение с сайта",
             content=email_content
@@ -446,17 +798,15 @@ async def create_contact(contact_data: ContactCreate):
 
 # ============= ADMIN ROUTES =============
 
-@api_router.get("/admin/pages", response_model=List[Page])
+# Every /api/admin/* route requires a valid token for an existing user
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(get_current_principal)])
+
+@admin_router.get("/pages", response_model=List[Page])
 async def get_all_pages():
-    pages = await db.pages.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    for page in pages:
-        if isinstance(page.get('created_at'), str):
-            page['created_at'] = datetime.fromisoformat(page['created_at'])
-        if isinstance(page.get('updated_at'), str):
-            page['updated_at'] = datetime.fromisoformat(page['updated_at'])
-    return pages
+    pages = await db.pages.find({}, {"_id": 0, **INTERNAL_FIELDS}).sort("order", 1).to_list(100)
+    return ORJSONResponse(pages)
 
-@api_router.post("/admin/pages", response_model=Page)
+@admin_router.post("/pages", response_model=Page)
 async def create_page(page_data: PageCreate):
     # Check if slug exists
     existing = await db.pages.find_one({"slug": page_data.slug})
@@ -465,19 +815,21 @@ async def create_page(page_data: PageCreate):
     
     page = Page(**page_data.model_dump())
     doc = page.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    doc["search_text"] = page_search_text(doc["blocks"])
     await db.pages.insert_one(doc)
+    invalidate_page_cache(doc)
     return page
 
-@api_router.put("/admin/pages/{page_id}", response_model=Page)
+@admin_router.put("/pages/{page_id}", response_model=Page)
 async def update_page(page_id: str, page_data: PageUpdate):
     existing = await db.pages.find_one({"id": page_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Page not found")
     
     update_dict = {k: v for k, v in page_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
+    if "blocks" in update_dict:
+        update_dict["search_text"] = page_search_text(update_dict["blocks"])
     
     # If setting this page as homepage, unset all other pages
     if update_dict.get("is_homepage") is True:
@@ -489,64 +841,71 @@ async def update_page(page_id: str, page_data: PageUpdate):
     await db.pages.update_one({"id": page_id}, {"$set": update_dict})
     
     updated_page = await db.pages.find_one({"id": page_id}, {"_id": 0})
-    if isinstance(updated_page.get('created_at'), str):
-        updated_page['created_at'] = datetime.fromisoformat(updated_page['created_at'])
-    if isinstance(updated_page.get('updated_at'), str):
-        updated_page['updated_at'] = datetime.fromisoformat(updated_page['updated_at'])
+    invalidate_page_cache(existing, updated_page)
+    if update_dict.get("is_homepage") is True:
+        # Other pages just lost their is_homepage flag
+        content_cache.invalidate_prefix("page:")
+        content_cache.invalidate("homepage_page")
     return updated_page
 
-@api_router.delete("/admin/pages/{page_id}")
+@admin_router.delete("/pages/{page_id}")
 async def delete_page(page_id: str):
-    result = await db.pages.delete_one({"id": page_id})
-    if result.deleted_count == 0:
+    deleted = await db.pages.find_one_and_delete({"id": page_id}, {"_id": 0, "slug": 1, "is_homepage": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Page not found")
+    invalidate_page_cache(deleted)
     return {"message": "Page deleted successfully"}
 
-@api_router.post("/admin/menu", response_model=MenuItem)
+@admin_router.post("/menu", response_model=MenuItem)
 async def create_menu_item(item_data: MenuItemCreate):
     item = MenuItem(**item_data.model_dump())
     doc = item.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.menu_items.insert_one(doc)
+    content_cache.invalidate("menu")
+    prerenderer.schedule()
     return item
 
-@api_router.delete("/admin/menu/{item_id}")
+@admin_router.delete("/menu/{item_id}")
 async def delete_menu_item(item_id: str):
     result = await db.menu_items.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Menu item not found")
+    content_cache.invalidate("menu")
+    prerenderer.schedule()
     return {"message": "Menu item deleted successfully"}
 
-@api_router.get("/admin/contacts", response_model=List[Contact])
-async def get_contacts():
-    contacts = await db.contacts.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for contact in contacts:
-        if isinstance(contact.get('created_at'), str):
-            contact['created_at'] = datetime.fromisoformat(contact['created_at'])
-    return contacts
-
-@api_router.put("/admin/contacts/{contact_id}/read")
+@admin_router.get("/contacts", response_model=CursorPage[Contact])
+async def get_contacts(
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    if format == "ndjson":
+        return export_ndjson(db.contacts, {}, CREATED_DESC, "contacts")
+    return await fetch_page(db.contacts, {}, CREATED_DESC, limit, after)
+
+@admin_router.put("/contacts/{contact_id}/read")
 async def mark_contact_read(contact_id: str):
     await db.contacts.update_one({"id": contact_id}, {"$set": {"read": True}})
     return {"message": "Contact marked as read"}
 
-@api_router.put("/admin/settings", response_model=Settings)
+@admin_router.put("/settings", response_model=Settings)
 async def update_settings(settings_data: SettingsUpdate):
     update_dict = {k: v for k, v in settings_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
     
     await db.settings.update_one(
         {"id": "site_settings"},
         {"$set": update_dict},
         upsert=True
     )
+    content_cache.invalidate("settings")
+    prerenderer.schedule()
     
     settings = await db.settings.find_one({"id": "site_settings"}, {"_id": 0})
-    if isinstance(settings.get('updated_at'), str):
-        settings['updated_at'] = datetime.fromisoformat(settings['updated_at'])
     return settings
 
-@api_router.post("/admin/media", response_model=MediaItem)
+@admin_router.post("/media", response_model=MediaItem)
 async def upload_media(file_data: Dict[str, Any]):
     """Upload media as base64"""
     media_item = MediaItem(
@@ -557,72 +916,127 @@ async def upload_media(file_data: Dict[str, Any]):
     )
     
     doc = media_item.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.media.insert_one(doc)
     return media_item
 
-@api_router.post("/admin/upload-file")
+@admin_router.post("/upload-file")
 async def upload_file(file: UploadFile = File(...)):
-    """Upload file to server disk"""
+    """Upload file to server disk; identical content reuses the stored file and media record"""
     try:
-        # Generate unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{str(uuid_lib.uuid4())}{file_extension}"
-        file_path = ROOT_DIR / "uploads" / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Create media record
-        file_size = os.path.getsize(file_path)
+        stored = await store_upload(file, UPLOAD_DIR, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+    
+    media = await db.media.find_one({"sha256": stored.sha256}, {"_id": 0})
+    if media is None:
+        is_image = bool(file.content_type and file.content_type.startswith("image/"))
         media_item = MediaItem(
             filename=file.filename,
-            url=f"/api/media/{unique_filename}",
-            type="image" if file.content_type and file.content_type.startswith("image/") else "file",
-            size=file_size
+            url=f"/api/media/{stored.name}",
+            type="image" if is_image else "file",
+            size=stored.size,
+            sha256=stored.sha256,
+            variants_status="pending" if is_image else None
         )
-        
-        doc = media_item.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.media.insert_one(doc)
-        
-        return {
-            "url": media_item.url,
-            "filename": file.filename,
-            "id": media_item.id
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
+        media = media_item.model_dump()
+        try:
+            await db.media.insert_one(media)
+            derivative_worker.notify()
+        except DuplicateKeyError:
+            # A concurrent upload of the same content created the record first
+            media = await db.media.find_one({"sha256": stored.sha256}, {"_id": 0})
+    if stored.created and media["url"] != f"/api/media/{stored.name}":
+        # Same bytes already stored under another extension
+        (UPLOAD_DIR / stored.name).unlink(missing_ok=True)
+    
+    return {
+        "url": media["url"],
+        "filename": media["filename"],
+        "id": media["id"]
+    }
+
+async def media_variants(filename: str) -> dict:
+    """Derivatives recorded for an uploaded file and whether they are final, cached per URL"""
+    url = f"/api/media/{filename}"
+    
+    async def load():
+        media = await db.media.find_one({"url": url}, {"_id": 0, "variants": 1, "variants_status": 1}) or {}
+        return orjson.dumps({
+            "variants": media.get("variants", []),
+            "final": media.get("variants_status") not in ("pending", "processing"),
+        })
+    
+    entry = await media_cache.get_or_load(url, load)
+    known = orjson.loads(entry.body)
+    if not known["final"] and time.time() - entry.created_at > MEDIA_PENDING_TTL:
+        media_cache.invalidate(url)
+        known = orjson.loads((await media_cache.get_or_load(url, load)).body)
+    return known
 
 @api_router.get("/media/{filename}")
-async def get_media_file(filename: str):
-    """Serve uploaded media files"""
-    file_path = ROOT_DIR / "uploads" / filename
-    if not file_path.exists():
+async def get_media_file(
+    request: Request,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, le=10000),
+    accept: str = Header("")
+):
+    """Serve uploaded media files, as the best fitting resized/WebP/AVIF variant when there is one"""
+    if filename.startswith("."):
+        # In-progress uploads and variants
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
-
-@api_router.get("/admin/media", response_model=List[MediaItem])
-async def get_media():
-    media = await db.media.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for item in media:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return media
+    known = await media_variants(filename)
+    # Upload names never get reused, but until its variants exist an image's
+    # negotiated representation may still change
+    cache_control = IMMUTABLE if known["final"] else "public, max-age=60"
+    variant = choose_variant(known["variants"], w, accept)
+    if variant:
+        return await file_response(
+            request, UPLOAD_DIR / "variants" / variant["filename"],
+            media_type=variant["format"], cache_control=cache_control, headers={"Vary": "Accept"}
+        )
+    return await file_response(request, UPLOAD_DIR / filename, cache_control=cache_control)
+
+@admin_router.get("/media", response_model=CursorPage[MediaItem])
+async def get_media(
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    if format == "ndjson":
+        return export_ndjson(db.media, {}, CREATED_DESC, "media")
+    return await fetch_page(db.media, {}, CREATED_DESC, limit, after)
 
 # ============= BLOG ROUTES =============
 
-@api_router.get("/blog", response_model=List[BlogPost])
-async def get_published_blog_posts():
-    """Get all published blog posts for public view"""
-    posts = await db.blog_posts.find({"published": True}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    return posts
+@api_router.get("/blog", response_model=CursorPage[BlogPostSummary], response_model_exclude_unset=True)
+async def get_published_blog_posts(
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    tags: Optional[str] = None
+):
+    """Get published blog post summaries for public view, newest first
+
+    tags=a,b keeps only posts carrying all of the given tags.
+    """
+    projection = blog_summary_projection(fields)
+    query = {"published": True}
+    names = normalize_tags((tags or "").split(","))
+    if names:
+        query["tags"] = {"$all": names}
+    return await fetch_page(db.blog_posts, query, CREATED_DESC, limit, after, projection)
+
+async def blog_tags_entry() -> CacheEntry:
+    async def load():
+        return await db.blog_tags.find({}, {"_id": 0, "tag": 1, "count": 1}).sort(list(TAG_CLOUD_ORDER)).to_list(500)
+    return await content_entry("blog_tags", load, List[BlogTag])
+
+@api_router.get("/blog/tags", response_model=List[BlogTag])
+async def get_blog_tags():
+    """Tags of published posts with post counts, most used first"""
+    return cached_response(await blog_tags_entry())
 
 @api_router.get("/blog/{post_id}", response_model=BlogPost)
 async def get_blog_post(post_id: str):
@@ -630,34 +1044,46 @@ async def get_blog_post(post_id: str):
     post = await db.blog_posts.find_one({"id": post_id, "published": True}, {"_id": 0})
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    if isinstance(post.get('created_at'), str):
-        post['created_at'] = datetime.fromisoformat(post['created_at'])
-    if isinstance(post.get('updated_at'), str):
-        post['updated_at'] = datetime.fromisoformat(post['updated_at'])
     return post
 
-@api_router.get("/admin/blog", response_model=List[BlogPost])
-async def get_all_blog_posts():
-    """Get all blog posts (including drafts) for admin"""
-    posts = await db.blog_posts.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    return posts
-
-@api_router.post("/admin/blog", response_model=BlogPost)
+@admin_router.get("/blog", response_model=CursorPage[BlogPostSummary], response_model_exclude_unset=True)
+async def get_all_blog_posts(
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    """Get blog post summaries (including drafts) for admin"""
+    if format == "ndjson":
+        return export_ndjson(db.blog_posts, {}, CREATED_DESC, "blog_posts", INTERNAL_FIELDS)
+    projection = blog_summary_projection(fields)
+    return await fetch_page(db.blog_posts, {}, CREATED_DESC, limit, after, projection)
+
+@admin_router.get("/blog/{post_id}", response_model=BlogPost)
+async def get_blog_post_for_edit(post_id: str):
+    """Get a single blog post (including drafts) for the editor"""
+    post = await db.blog_posts.find_one({"id": post_id}, {"_id": 0})
+    if not post:
+        raise HTTPException(status_code=404, detail="Blog post not found")
+    return post
+
+@admin_router.post("/blog", response_model=BlogPost)
 async def create_blog_post(post_data: BlogPostCreate):
     """Create a new blog post"""
-    post = BlogPost(**post_data.model_dump())
+    data = post_data.model_dump()
+    data["tags"] = normalize_tags(data["tags"])
+    summary = blog_summary_fields(data["content"], data["excerpt"])
+    post = BlogPost(**{**data, **summary})
     doc = post.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    doc['excerpt_auto'] = summary['excerpt_auto']
+    doc['search_text'] = summary['search_text']
     await db.blog_posts.insert_one(doc)
+    await apply_tag_changes(db, None, doc)
+    content_cache.invalidate("blog_tags")
+    prerenderer.schedule(post.id)
     return post
 
-@api_router.put("/admin/blog/{post_id}", response_model=BlogPost)
+@admin_router.put("/blog/{post_id}", response_model=BlogPost)
 async def update_blog_post(post_id: str, post_data: BlogPostUpdate):
     """Update a blog post"""
     existing = await db.blog_posts.find_one({"id": post_id})
@@ -665,86 +1091,190 @@ async def update_blog_post(post_id: str, post_data: BlogPostUpdate):
         raise HTTPException(status_code=404, detail="Blog post not found")
     
     update_dict = {k: v for k, v in post_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
+    if "tags" in update_dict:
+        update_dict["tags"] = normalize_tags(update_dict["tags"])
+    if "content" in update_dict or "excerpt" in update_dict:
+        excerpt = update_dict.get("excerpt", existing.get("excerpt"))
+        if existing.get("excerpt_auto") and excerpt == existing.get("excerpt"):
+            # Unchanged auto excerpt: regenerate it from the new content
+            excerpt = None
+        update_dict.update(blog_summary_fields(update_dict.get("content", existing.get("content", "")), excerpt))
     
     await db.blog_posts.update_one({"id": post_id}, {"$set": update_dict})
     
     updated_post = await db.blog_posts.find_one({"id": post_id}, {"_id": 0})
-    if isinstance(updated_post.get('created_at'), str):
-        updated_post['created_at'] = datetime.fromisoformat(updated_post['created_at'])
-    if isinstance(updated_post.get('updated_at'), str):
-        updated_post['updated_at'] = datetime.fromisoformat(updated_post['updated_at'])
+    await apply_tag_changes(db, existing, updated_post)
+    content_cache.invalidate("blog_tags")
+    prerenderer.schedule(post_id)
     return updated_post
 
-@api_router.delete("/admin/blog/{post_id}")
+@admin_router.delete("/blog/{post_id}")
 async def delete_blog_post(post_id: str):
     """Delete a blog post"""
-    result = await db.blog_posts.delete_one({"id": post_id})
-    if result.deleted_count == 0:
+    deleted = await db.blog_posts.find_one_and_delete({"id": post_id}, {"_id": 0, "published": 1, "tags": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    await apply_tag_changes(db, deleted, None)
+    content_cache.invalidate("blog_tags")
+    prerenderer.schedule(post_id)
     return {"message": "Blog post deleted successfully"}
 
+# ============= SEARCH ROUTES =============
+
+@api_router.get("/search", response_model=List[SearchResult])
+async def search_site(q: str = Query(..., min_length=2, max_length=200), limit: int = Query(10, ge=1, le=50)):
+    """Published blog posts and pages matching q, best first, each with a snippet around the match"""
+    try:
+        results = await search_content(db, q, limit, SEARCH_TIMEOUT_MS)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=503, detail="Search timed out")
+    return ORJSONResponse(results)
+
+# ============= ASTRO ROUTES =============
+
+def astro_range(first: Optional[date], last: Optional[date], lat: Optional[float], lon: Optional[float]) -> List[dict]:
+    """Per-day astro records for first..last (default: today) at lat/lon (default: the site's location)"""
+    first = first or local_today()
+    last = last or first
+    if last < first:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (last - first).days >= MAX_ASTRO_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_ASTRO_DAYS} days")
+    return astro_days.get_range(
+        first, last,
+        ASTRO_LATITUDE if lat is None else lat,
+        ASTRO_LONGITUDE if lon is None else lon,
+    )
+
+@api_router.get("/astro/moon", response_model=List[MoonDay])
+async def get_moon_phases(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None
+):
+    """Moon phase, illumination and sign for each day"""
+    return astro_range(from_, to, None, None)
+
+@api_router.get("/astro/zodiac", response_model=List[ZodiacDay])
+async def get_zodiac_positions(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None
+):
+    """Sun and Moon zodiac signs for each day"""
+    return astro_range(from_, to, None, None)
+
+@api_router.get("/astro/planetary-hours", response_model=List[PlanetaryHoursDay])
+async def get_planetary_hours(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    """Sunrise, sunset and the 24 planetary hours of each day at a location"""
+    return astro_range(from_, to, lat, lon)
+
+# ============= TAROT ROUTES =============
+
+@api_router.get("/tarot/deck", response_model=List[TarotCard])
+async def get_tarot_deck():
+    """All 78 cards with their upright and reversed meanings"""
+    return Response(content=TAROT_DECK_BODY, media_type="application/json")
+
+@api_router.get("/tarot/cards/{card_id}", response_model=TarotCard)
+async def get_tarot_card(card_id: str):
+    card = CARDS.get(card_id)
+    if card is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return card_payload(card)
+
+@api_router.get("/tarot/spreads", response_model=List[TarotSpread])
+async def get_tarot_spreads():
+    return [{"id": spread.id, "name": spread.name, "positions": list(spread.positions)} for spread in SPREADS.values()]
+
+@api_router.get("/tarot/draw", response_model=TarotReading)
+async def draw_tarot_spread(
+    spread: Literal["single", "three_card", "celtic_cross"] = "single",
+    seed: Optional[int] = Query(None, ge=0, le=2**63 - 1),
+    reversals: bool = True
+):
+    """Lay out a spread; the same seed always gives the same reading"""
+    reading = draw_tarot(spread, seed, reversals)
+    # Unseeded draws are a new reading every time; seeded ones never change
+    cache_control = "no-store" if seed is None else "public, max-age=86400"
+    return ORJSONResponse(reading, headers={"Cache-Control": cache_control})
+
+@api_router.get("/tarot/card-of-the-day", response_model=TarotCardOfTheDay)
+async def get_card_of_the_day():
+    """Today's card, the same for every visitor; encoded once per local day"""
+    today = local_today()
+    body, etag = card_of_the_day.get(today)
+    # Fresh until local midnight, when the card changes
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(), SLOTS_TIMEZONE)
+    max_age = max(0, int((midnight - datetime.now(timezone.utc)).total_seconds()))
+    return Response(content=body, media_type="application/json", headers={
+        "ETag": etag, "Cache-Control": f"public, max-age={max_age}",
+    })
+
 # ============= HOME PAGE CONTENT ROUTES =============
 
+async def home_content_entry() -> CacheEntry:
+    async def load():
+        content = await db.home_page_content.find_one({"id": "home_page_content"}, {"_id": 0})
+        # Fall back to default content
+        return content or HomePageContent(updated_at=DEFAULT_CONTENT_UPDATED_AT)
+    return await content_entry("home_content", load, HomePageContent)
+
 @api_router.get("/home-content", response_model=HomePageContent)
 async def get_home_content():
     """Get home page content"""
-    content = await db.home_page_content.find_one({"id": "home_page_content"}, {"_id": 0})
-    if not content:
-        # Return default content
-        default_content = HomePageContent()
-        return default_content
-    if isinstance(content.get('updated_at'), str):
-        content['updated_at'] = datetime.fromisoformat(content['updated_at'])
-    return content
+    return cached_response(await home_content_entry())
 
-@api_router.put("/admin/home-content", response_model=HomePageContent)
+@admin_router.put("/home-content", response_model=HomePageContent)
 async def update_home_content(content_data: HomePageContentUpdate):
     """Update home page content"""
     update_dict = {k: v for k, v in content_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
     
     await db.home_page_content.update_one(
         {"id": "home_page_content"},
         {"$set": update_dict},
         upsert=True
     )
+    content_cache.invalidate("home_content")
+    prerenderer.schedule()
     
     content = await db.home_page_content.find_one({"id": "home_page_content"}, {"_id": 0})
-    if isinstance(content.get('updated_at'), str):
-        content['updated_at'] = datetime.fromisoformat(content['updated_at'])
     return content
 
 # ============= SERVICES ROUTES =============
 
+async def services_entry() -> CacheEntry:
+    async def load():
+        return await db.services.find({"visible": True}, {"_id": 0}).sort("order", 1).to_list(100)
+    return await content_entry("services", load, List[Service])
+
 @api_router.get("/services", response_model=List[Service])
 async def get_visible_services():
     """Get all visible services for public view"""
-    services = await db.services.find({"visible": True}, {"_id": 0}).sort("order", 1).to_list(100)
-    for service in services:
-        if isinstance(service.get('created_at'), str):
-            service['created_at'] = datetime.fromisoformat(service['created_at'])
-    return services
+    return cached_response(await services_entry())
 
-@api_router.get("/admin/services", response_model=List[Service])
+@admin_router.get("/services", response_model=List[Service])
 async def get_all_services():
     """Get all services (including hidden) for admin"""
     services = await db.services.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    for service in services:
-        if isinstance(service.get('created_at'), str):
-            service['created_at'] = datetime.fromisoformat(service['created_at'])
-    return services
+    return ORJSONResponse(services)
 
-@api_router.post("/admin/services", response_model=Service)
+@admin_router.post("/services", response_model=Service)
 async def create_service(service_data: ServiceCreate):
     """Create a new service"""
     service = Service(**service_data.model_dump())
     doc = service.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.services.insert_one(doc)
+    content_cache.invalidate("services")
+    prerenderer.schedule()
     return service
 
-@api_router.put("/admin/services/{service_id}", response_model=Service)
+@admin_router.put("/services/{service_id}", response_model=Service)
 async def update_service(service_id: str, service_data: ServiceUpdate):
     """Update a service"""
     existing = await db.services.find_one({"id": service_id})
@@ -754,23 +1284,25 @@ async def update_service(service_id: str, service_data: ServiceUpdate):
     update_dict = {k: v for k, v in service_data.model_dump().items() if v is not None}
     
     await db.services.update_one({"id": service_id}, {"$set": update_dict})
+    content_cache.invalidate("services")
+    prerenderer.schedule()
     
     updated_service = await db.services.find_one({"id": service_id}, {"_id": 0})
-    if isinstance(updated_service.get('created_at'), str):
-        updated_service['created_at'] = datetime.fromisoformat(updated_service['created_at'])
     return updated_service
 
-@api_router.delete("/admin/services/{service_id}")
+@admin_router.delete("/services/{service_id}")
 async def delete_service(service_id: str):
     """Delete a service"""
     result = await db.services.delete_one({"id": service_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
+    content_cache.invalidate("services")
+    prerenderer.schedule()
     return {"message": "Service deleted successfully"}
 
 # ============= USER PREFERENCES ROUTES =============
 
-@api_router.get("/admin/preferences", response_model=UserPreferences)
+@admin_router.get("/preferences", response_model=UserPreferences)
 async def get_user_preferences(username: str = Depends(verify_token)):
     """Get user preferences"""
     preferences = await db.user_preferences.find_one({"user_id": username}, {"_id": 0})
@@ -778,15 +1310,13 @@ async def get_user_preferences(username: str = Depends(verify_token)):
         # Return default preferences
         default_prefs = UserPreferences(user_id=username)
         return default_prefs
-    if isinstance(preferences.get('updated_at'), str):
-        preferences['updated_at'] = datetime.fromisoformat(preferences['updated_at'])
     return preferences
 
-@api_router.put("/admin/preferences", response_model=UserPreferences)
+@admin_router.put("/preferences", response_model=UserPreferences)
 async def update_user_preferences(prefs_data: UserPreferencesUpdate, username: str = Depends(verify_token)):
     """Update user preferences"""
     update_dict = {k: v for k, v in prefs_data.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
     
     await db.user_preferences.update_one(
         {"user_id": username},
@@ -795,31 +1325,143 @@ async def update_user_preferences(prefs_data: UserPreferencesUpdate, username: s
     )
     
     preferences = await db.user_preferences.find_one({"user_id": username}, {"_id": 0})
-    if isinstance(preferences.get('updated_at'), str):
-        preferences['updated_at'] = datetime.fromisoformat(preferences['updated_at'])
     return preferences
 
-# ============= CALENDAR & APPOINTMENTS ROUTES =============
+# ============= BOOTSTRAP ROUTES =============
+
+async def bootstrap_payload(slug: Optional[str] = None, include_page: bool = True):
+    """(body, version, last_modified) of the bootstrap response, or None if slug's page is missing"""
+    loaders = {
+        "menu": menu_entry(),
+        "settings": settings_entry(),
+        "pages": nav_pages_entry(),
+        "services": services_entry(),
+    }
+    if include_page and slug:
+        loaders["page"] = page_entry(slug)
+    elif include_page:
+        loaders["page"] = homepage_page_entry()
+        loaders["home_content"] = home_content_entry()
+    # Cache misses among the parts are loaded from MongoDB concurrently
+    entries = dict(zip(loaders, await asyncio.gather(*loaders.values())))
+    if "page" in entries and entries["page"].body is None:
+        return None
+    
+    # The parts are already-encoded JSON; the version changes whenever any of them does
+    version = hashlib.sha256("".join(entry.etag for entry in entries.values()).encode()).hexdigest()[:32]
+    body = b"".join(
+        [b'{"version":"' + version.encode() + b'"']
+        + [b',"' + name.encode() + b'":' + entry.body for name, entry in entries.items()]
+        + [b"}"]
+    )
+    stamps = [entry.last_modified for entry in entries.values() if entry.last_modified]
+    return body, version, max(stamps) if stamps else None
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(slug: Optional[str] = None, include_page: bool = True):
+    """Menu, settings, nav pages, services and one page in a single response
+
+    Without slug the page is the homepage page (null if none is set) and the
+    home content is included as well. include_page=false leaves both out, for
+    views that only need the site chrome.
+    """
+    payload = await bootstrap_payload(slug, include_page)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    body, version, last_modified = payload
+    headers = {"ETag": f'"{version}"'}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified.timestamp(), usegmt=True)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def prerender_bootstrap(slug: Optional[str]) -> Optional[bytes]:
+    payload = await bootstrap_payload(slug)
+    return payload[0] if payload else None
+
+prerenderer = Prerenderer(
+    db,
+    PRERENDER_DIR,
+    prerender_bootstrap,
+    blog_projection=blog_summary_projection(None),
+    debounce=float(os.getenv("PRERENDER_DEBOUNCE", "2")),
+)
 
-@api_router.get("/admin/timeslots", response_model=List[TimeSlot])
-async def get_all_timeslots():
-    """Get all time slots for admin"""
-    slots = await db.time_slots.find({}, {"_id": 0}).sort("date", 1).to_list(500)
-    for slot in slots:
-        if isinstance(slot.get('created_at'), str):
-            slot['created_at'] = datetime.fromisoformat(slot['created_at'])
-    return slots
+# ============= CALENDAR & APPOINTMENTS ROUTES =============
 
-@api_router.post("/admin/timeslots", response_model=TimeSlot)
+@admin_router.get("/timeslots", response_model=CursorPage[TimeSlot])
+async def get_all_timeslots(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    """Get all time slots for admin, optionally limited to the days from..to"""
+    query = timeslot_range(from_, to)
+    if format == "ndjson":
+        return export_ndjson(db.time_slots, query, TIMESLOT_ORDER, "time_slots")
+    return await fetch_page(db.time_slots, query, TIMESLOT_ORDER, limit, after)
+
+@admin_router.post("/timeslots", response_model=TimeSlot)
 async def create_timeslot(slot_data: TimeSlotCreate):
     """Create a new time slot"""
-    slot = TimeSlot(**slot_data.model_dump())
+    try:
+        start, end = slot_bounds(slot_data.date, slot_data.start_time, slot_data.end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time slot: {e}")
+    slot = TimeSlot(**slot_data.model_dump(), start=start, end=end)
     doc = slot.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.time_slots.insert_one(doc)
     return slot
 
-@api_router.put("/admin/timeslots/{slot_id}", response_model=TimeSlot)
+@admin_router.post("/timeslots/bulk", response_model=TimeSlotBulkResult)
+async def create_timeslots_bulk(schedule: TimeSlotSchedule):
+    """Create every slot of a recurring schedule, skipping those that overlap existing slots"""
+    step = schedule.step or schedule.duration
+    if step < schedule.duration:
+        raise HTTPException(status_code=400, detail="Step must not be shorter than duration")
+    if schedule.date_to < schedule.date_from:
+        raise HTTPException(status_code=400, detail="'date_to' must not be before 'date_from'")
+    if schedule.date_to - schedule.date_from > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Date range is limited to one year")
+    if not set(schedule.weekdays) <= set(range(7)):
+        raise HTTPException(status_code=400, detail="Weekdays must be between 0 (Monday) and 6 (Sunday)")
+    try:
+        planned = expand_schedule(
+            schedule.date_from, schedule.date_to, schedule.weekdays,
+            schedule.start_time, schedule.end_time, schedule.duration, step, schedule.exclude_dates
+        )
+        bounds = [slot_bounds(*slot) for slot in planned]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid schedule: {e}")
+    if len(planned) > MAX_BULK_SLOTS:
+        raise HTTPException(status_code=400, detail=f"Schedule produces {len(planned)} slots, the limit is {MAX_BULK_SLOTS}")
+    if not planned:
+        return {"created": 0, "skipped": 0}
+    
+    # One range scan on the start index: slots never cross midnight, so anything
+    # overlapping the schedule starts less than a day before its first slot
+    existing = await db.time_slots.find(
+        {"start": {"$gt": bounds[0][0] - timedelta(days=1), "$lt": bounds[-1][1]}},
+        {"_id": 0, "start": 1, "end": 1}
+    ).sort("start", 1).to_list(None)
+    starts = [slot["start"] for slot in existing]
+    latest_end = list(accumulate((slot["end"] for slot in existing), max))
+    
+    docs = []
+    for (day, start_time, end_time), (start, end) in zip(planned, bounds):
+        # Existing slots starting before this one ends overlap it if any of them ends after it starts
+        i = bisect_left(starts, end)
+        if i and latest_end[i - 1] > start:
+            continue
+        slot = TimeSlot(date=day, start_time=start_time, end_time=end_time,
+                        start=start, end=end, available=schedule.available)
+        docs.append(slot.model_dump())
+    if docs:
+        await db.time_slots.insert_many(docs, ordered=True)
+    return {"created": len(docs), "skipped": len(planned) - len(docs)}
+
+@admin_router.put("/timeslots/{slot_id}", response_model=TimeSlot)
 async def update_timeslot(slot_id: str, slot_data: TimeSlotUpdate):
     """Update time slot availability"""
     existing = await db.time_slots.find_one({"id": slot_id})
@@ -830,11 +1472,9 @@ async def update_timeslot(slot_id: str, slot_data: TimeSlotUpdate):
     await db.time_slots.update_one({"id": slot_id}, {"$set": update_dict})
     
     updated_slot = await db.time_slots.find_one({"id": slot_id}, {"_id": 0})
-    if isinstance(updated_slot.get('created_at'), str):
-        updated_slot['created_at'] = datetime.fromisoformat(updated_slot['created_at'])
     return updated_slot
 
-@api_router.delete("/admin/timeslots/{slot_id}")
+@admin_router.delete("/timeslots/{slot_id}")
 async def delete_timeslot(slot_id: str):
     """Delete a time slot"""
     result = await db.time_slots.delete_one({"id": slot_id})
@@ -843,41 +1483,99 @@ async def delete_timeslot(slot_id: str):
     return {"message": "Time slot deleted successfully"}
 
 @api_router.get("/timeslots/available", response_model=List[TimeSlot])
-async def get_available_timeslots():
-    """Get all available time slots for public booking"""
-    slots = await db.time_slots.find({"available": True}, {"_id": 0}).sort("date", 1).to_list(500)
-    for slot in slots:
-        if isinstance(slot.get('created_at'), str):
-            slot['created_at'] = datetime.fromisoformat(slot['created_at'])
-    return slots
-
-@api_router.get("/admin/appointments", response_model=List[Appointment])
-async def get_all_appointments():
+async def get_available_timeslots(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None
+):
+    """Get upcoming available time slots for public booking in the days from..to
+
+    Defaults to MAX_AVAILABLE_SLOT_DAYS days from today; longer ranges, or ranges
+    holding more than MAX_AVAILABLE_SLOTS slots, are rejected rather than cut short.
+    """
+    first = from_ or local_today()
+    last = to or first + timedelta(days=MAX_AVAILABLE_SLOT_DAYS - 1)
+    if (last - first).days >= MAX_AVAILABLE_SLOT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_AVAILABLE_SLOT_DAYS} days")
+    query = {"available": True, **timeslot_range(first, last, upcoming=True)}
+    slots = await db.time_slots.find(query, {"_id": 0}).sort(list(TIMESLOT_ORDER)).to_list(MAX_AVAILABLE_SLOTS + 1)
+    if len(slots) > MAX_AVAILABLE_SLOTS:
+        raise HTTPException(status_code=400, detail=f"More than {MAX_AVAILABLE_SLOTS} slots in range, request fewer days")
+    return ORJSONResponse(slots)
+
+@api_router.get("/timeslots/availability", response_model=List[DayAvailability])
+async def get_timeslot_availability(
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None
+):
+    """Number of bookable slots per day, for the month of 'from' (today) unless 'to' is given"""
+    first = from_ or local_today()
+    if to is None:
+        to = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if to - first > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Date range is limited to one year")
+    # Covered by the (available, start, date) index: the documents themselves are never read
+    pipeline = [
+        {"$match": {"available": True, **timeslot_range(first, to, upcoming=True)}},
+        {"$group": {"_id": "$date", "available": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ]
+    days = await db.time_slots.aggregate(pipeline).to_list(None)
+    return ORJSONResponse([{"date": day["_id"], "available": day["available"]} for day in days])
+
+@admin_router.get("/appointments", response_model=CursorPage[Appointment])
+async def get_all_appointments(
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
     """Get all appointments for admin"""
-    appointments = await db.appointments.find({}, {"_id": 0}).sort("created_at", -1).to_list(500)
-    for appointment in appointments:
-        if isinstance(appointment.get('created_at'), str):
-            appointment['created_at'] = datetime.fromisoformat(appointment['created_at'])
-    return appointments
+    if format == "ndjson":
+        return export_ndjson(db.appointments, {}, CREATED_DESC, "appointments")
+    return await fetch_page(db.appointments, {}, CREATED_DESC, limit, after)
+
+async def release_slot(slot_id: str, appointment_id: str):
+    """Make a slot bookable again, unless it has since been claimed by another appointment"""
+    await db.time_slots.update_one(
+        # appointment_id is missing on slots booked before claims were recorded
+        {"id": slot_id, "appointment_id": {"$in": [appointment_id, None]}},
+        {"$set": {"available": True}, "$unset": {"appointment_id": ""}}
+    )
 
 @api_router.post("/appointments", response_model=Appointment)
-async def create_appointment(appointment_data: AppointmentCreate):
+async def create_appointment(
+    appointment_data: AppointmentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=128)
+):
     """Create a new appointment (public endpoint)"""
-    # Check if slot exists and is available
-    slot = await db.time_slots.find_one({"id": appointment_data.slot_id})
+    appointment = Appointment(**appointment_data.model_dump())
+    
+    # Claim the slot with a single conditional update: of any number of
+    # concurrent bookings for the same slot exactly one matches available=True
+    slot = await db.time_slots.find_one_and_update(
+        {"id": appointment_data.slot_id, "available": True},
+        {"$set": {"available": False, "appointment_id": appointment.id}},
+        projection={"_id": 0}
+    )
     if not slot:
-        raise HTTPException(status_code=404, detail="Time slot not found")
-    if not slot.get("available"):
+        if idempotency_key:
+            # A retry of a booking that already went through
+            previous = await db.appointments.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+            if previous and previous["slot_id"] == appointment_data.slot_id:
+                return previous
+        if not await db.time_slots.find_one({"id": appointment_data.slot_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Time slot not found")
         raise HTTPException(status_code=400, detail="Time slot is not available")
     
-    # Create appointment
-    appointment = Appointment(**appointment_data.model_dump())
     doc = appointment.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.appointments.insert_one(doc)
-    
-    # Mark slot as unavailable
-    await db.time_slots.update_one({"id": appointment_data.slot_id}, {"$set": {"available": False}})
+    if idempotency_key:
+        doc["idempotency_key"] = idempotency_key
+    try:
+        await db.appointments.insert_one(doc)
+    except Exception as e:
+        await release_slot(appointment_data.slot_id, appointment.id)
+        if isinstance(e, DuplicateKeyError) and idempotency_key:
+            raise HTTPException(status_code=409, detail="Idempotency key already used for another booking")
+        raise
     
     # Send notification email to admin
     settings = await db.settings.find_one({"id": "site_settings"})
@@ -895,7 +1593,7 @@ async def create_appointment(appointment_data: AppointmentCreate):
             </body>
         </html>
         """
-        send_email_notification(
+        await send_email_notification(
             to_email=settings['admin_email'],
             subject="Новая запись на консультацию",
             content=email_content
@@ -903,7 +1601,7 @@ async def create_appointment(appointment_data: AppointmentCreate):
     
     return appointment
 
-@api_router.put("/admin/appointments/{appointment_id}", response_model=Appointment)
+@admin_router.put("/appointments/{appointment_id}", response_model=Appointment)
 async def update_appointment(appointment_id: str, appointment_data: AppointmentUpdate):
     """Update appointment status"""
     existing = await db.appointments.find_one({"id": appointment_id})
@@ -915,14 +1613,12 @@ async def update_appointment(appointment_id: str, appointment_data: AppointmentU
     
     # If appointment is cancelled, make slot available again
     if update_dict.get("status") == "cancelled":
-        await db.time_slots.update_one({"id": existing["slot_id"]}, {"$set": {"available": True}})
+        await release_slot(existing["slot_id"], appointment_id)
     
     updated_appointment = await db.appointments.find_one({"id": appointment_id}, {"_id": 0})
-    if isinstance(updated_appointment.get('created_at'), str):
-        updated_appointment['created_at'] = datetime.fromisoformat(updated_appointment['created_at'])
     return updated_appointment
 
-@api_router.delete("/admin/appointments/{appointment_id}")
+@admin_router.delete("/appointments/{appointment_id}")
 async def delete_appointment(appointment_id: str):
     """Delete an appointment"""
     appointment = await db.appointments.find_one({"id": appointment_id})
@@ -930,14 +1626,50 @@ async def delete_appointment(appointment_id: str):
         raise HTTPException(status_code=404, detail="Appointment not found")
     
     # Make slot available again
-    await db.time_slots.update_one({"id": appointment["slot_id"]}, {"$set": {"available": True}})
+    await release_slot(appointment["slot_id"], appointment_id)
     
     result = await db.appointments.delete_one({"id": appointment_id})
     return {"message": "Appointment deleted successfully"}
 
-# Include router
+# ============= DIAGNOSTICS ROUTES =============
+
+@admin_router.get("/slow-queries", response_model=List[SlowQuery])
+async def get_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    """Recent MongoDB commands over SLOW_QUERY_MS, newest first"""
+    return query_profiler.recent(limit)
+
+# Include routers
+api_router.include_router(admin_router)
 app.include_router(api_router)
 
+app.add_middleware(UploadSizeLimit, path="/api/admin/upload-file", max_bytes=MAX_UPLOAD_BYTES)
+
+# Browsers and nginx may reuse public content briefly and revalidate it with If-None-Match
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age={os.getenv('PUBLIC_CACHE_MAX_AGE', '30')}, "
+    f"stale-while-revalidate={os.getenv('PUBLIC_CACHE_STALE_WHILE_REVALIDATE', '300')}"
+)
+app.add_middleware(ConditionalGetMiddleware, rules=[
+    *((path, PUBLIC_CACHE_CONTROL) for path in (
+        "/api/pages", "/api/homepage-page", "/api/menu", "/api/settings",
+        "/api/services", "/api/home-content", "/api/blog", "/api/bootstrap", "/api/search",
+    )),
+    # Deterministic for a given day; the default range moves at midnight
+    ("/api/astro", "public, max-age=3600"),
+    # The deck never changes between deploys; draws and the card of the day set their own
+    ("/api/tarot", "public, max-age=86400"),
+    # Bookable slots change with every booking: always revalidate
+    ("/api/timeslots", "no-cache"),
+])
+
+# Outside ConditionalGetMiddleware so every public body has an ETag to key its compressed copy on
+compressed_bodies = CompressedBodies(int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024))))
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    stored=compressed_bodies,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -946,12 +1678,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lets the slow-query log name the route behind each command
+app.add_middleware(QueryRouteMiddleware)
+
+# Outermost, so request timings include compression and CORS
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+for name, cache in (("content", content_cache), ("media", media_cache), ("astro_days", astro_days),
+                    ("compressed_bodies", compressed_bodies), ("tokens", token_cache), ("principals", principal_cache)):
+    metrics.watch_cache(name, cache)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def backfill_legacy_slots():
+    # Slots saved before start/end existed never match the public range queries
+    count = await backfill_slot_times(db)
+    if count:
+        logger.info(f"Filled in start/end on {count} legacy time slots")
+
+@app.on_event("startup")
+async def start_email_worker():
+    email_outbox.start()
+
+@app.on_event("startup")
+async def start_derivative_worker():
+    derivative_worker.start()
+
+@app.on_event("startup")
+async def start_prerenderer():
+    # Renders every snapshot once, then again after content writes
+    prerenderer.start()
+
+@app.on_event("startup")
+async def start_metrics():
+    metrics.start()
+    query_profiler.start(client)
+
+@app.on_event("startup")
+async def calibrate_password_hasher():
+    await password_hasher.calibrate()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await email_outbox.stop()
+    await derivative_worker.stop()
+    await prerenderer.stop()
+    await metrics.stop()
+    await query_profiler.stop()
+    password_hasher.shutdown()
     client.close()
\ No newline at end of file
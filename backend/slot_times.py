@@ -0,0 +1,64 @@
+"""Wall-clock slot times to and from the UTC datetimes stored on time slots.
+
+Slots are entered as a local ``YYYY-MM-DD`` date plus ``HH:MM`` start/end
+times in SLOTS_TIMEZONE. Alongside those strings every slot stores ``start``
+and ``end`` as real datetimes, which is what range queries, sorting and the
+per-day availability index use.
+"""
+
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+SLOTS_TIMEZONE = ZoneInfo(os.getenv("SLOTS_TIMEZONE", "Europe/Moscow"))
+# Slot listings run in start order, id breaking ties for the cursor
+TIMESLOT_ORDER = (("start", 1), ("id", 1))
+
+
+def slot_bounds(day: str, start_time: str, end_time: str) -> Tuple[datetime, datetime]:
+    """UTC start/end of a slot; raises ValueError on malformed or empty ranges"""
+    slot_date = date.fromisoformat(day)
+    start = datetime.combine(slot_date, time.fromisoformat(start_time), SLOTS_TIMEZONE)
+    end = datetime.combine(slot_date, time.fromisoformat(end_time), SLOTS_TIMEZONE)
+    if end <= start:
+        raise ValueError("End time must be after start time")
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def local_today() -> date:
+    return datetime.now(SLOTS_TIMEZONE).date()
+
+
+def day_range(first: Optional[date], last: Optional[date]) -> dict:
+    """Mongo condition on ``start`` covering whole local days first..last (inclusive)"""
+    condition = {}
+    if first is not None:
+        condition["$gte"] = datetime.combine(first, time.min, SLOTS_TIMEZONE).astimezone(timezone.utc)
+    if last is not None:
+        next_day = last + timedelta(days=1)
+        condition["$lt"] = datetime.combine(next_day, time.min, SLOTS_TIMEZONE).astimezone(timezone.utc)
+    return condition
+
+
+def expand_schedule(first: date, last: date, weekdays: Iterable[int], day_start: str, day_end: str,
+                    duration: int, step: int, exclude: Iterable[date] = ()) -> List[Tuple[str, str, str]]:
+    """(date, start_time, end_time) of every slot a recurring schedule produces, in order
+
+    Slots of ``duration`` minutes start every ``step`` minutes from day_start on
+    the given weekdays (0 = Monday) and must end by day_end.
+    """
+    weekdays, exclude = set(weekdays), set(exclude)
+    opens, closes = time.fromisoformat(day_start), time.fromisoformat(day_end)
+    slots = []
+    day = first
+    while day <= last:
+        if day.weekday() in weekdays and day not in exclude:
+            start = datetime.combine(day, opens)
+            close = datetime.combine(day, closes)
+            while start + timedelta(minutes=duration) <= close:
+                end = start + timedelta(minutes=duration)
+                slots.append((day.isoformat(), start.strftime("%H:%M"), end.strftime("%H:%M")))
+                start += timedelta(minutes=step)
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,171 @@
+"""Tarot deck, spreads and the card of the day.
+
+The 78 cards are built once at import as frozen slotted dataclasses and never
+touch the database. draw() lays out a spread with random.Random(seed): the
+same seed always gives the same cards and orientations, and an unseeded draw
+picks a seed and returns it, so any reading can be replayed. The card of the
+day is seeded with the local date; CardOfTheDay encodes it once per day and
+hands out the same bytes and ETag until midnight.
+"""
+
+import hashlib
+import random
+import secrets
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+REVERSAL_CHANCE = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class Card:
+    id: str
+    name: str
+    arcana: str  # major, minor
+    suit: Optional[str]  # wands, cups, swords, pentacles; None for the major arcana
+    rank: int  # 0..21 for the major arcana, 1..14 (ace..king) for the minor
+    upright: str
+    reversed: str
+
+
+@dataclass(frozen=True, slots=True)
+class Spread:
+    id: str
+    name: str
+    positions: Tuple[str, ...]
+
+
+_MAJOR_ARCANA = [
+    ("Шут", "Новое начало, спонтанность, доверие к пути", "Безрассудство, риск без оглядки"),
+    ("Маг", "Воля, мастерство, умение воплощать задуманное", "Манипуляция, нераскрытые способности"),
+    ("Верховная Жрица", "Интуиция, тайное знание, внутренний голос", "Скрытность, отказ слушать себя"),
+    ("Императрица", "Изобилие, забота, плодородие", "Зависимость, творческий застой"),
+    ("Император", "Порядок, власть, структура", "Жёсткость, контроль ради контроля"),
+    ("Иерофант", "Традиция, наставничество, духовные правила", "Догматизм, бунт против устоев"),
+    ("Влюблённые", "Любовь, союз, выбор сердцем", "Разлад, неверный выбор"),
+    ("Колесница", "Победа, целеустремлённость, движение вперёд", "Потеря направления, агрессия"),
+    ("Сила", "Мужество, терпение, мягкая сила", "Неуверенность, слабость духа"),
+    ("Отшельник", "Поиск истины, уединение, мудрость", "Изоляция, одиночество"),
+    ("Колесо Фортуны", "Судьба, поворот, удача", "Невезение, сопротивление переменам"),
+    ("Справедливость", "Честность, равновесие, последствия поступков", "Несправедливость, уход от ответственности"),
+    ("Повешенный", "Пауза, жертва, новый взгляд", "Бесполезная жертва, промедление"),
+    ("Смерть", "Завершение, трансформация, обновление", "Страх перемен, застревание в прошлом"),
+    ("Умеренность", "Гармония, мера, исцеление", "Крайности, дисбаланс"),
+    ("Дьявол", "Искушение, привязанность, тень", "Освобождение, разрыв оков"),
+    ("Башня", "Внезапные перемены, крушение иллюзий", "Отсроченный кризис, страх разрушения"),
+    ("Звезда", "Надежда, вдохновение, исцеление", "Разочарование, потеря веры"),
+    ("Луна", "Иллюзии, интуиция, подсознание", "Прояснение, выход из тумана"),
+    ("Солнце", "Радость, успех, ясность", "Временные трудности, омрачённая радость"),
+    ("Суд", "Пробуждение, призыв, переоценка", "Сомнения в себе, глухота к призыву"),
+    ("Мир", "Завершённость, целостность, достижение", "Незавершённость, задержка итога"),
+]
+
+_SUITS = [
+    ("wands", "Жезлов", "в делах и творческих замыслах"),
+    ("cups", "Кубков", "в чувствах и отношениях"),
+    ("swords", "Мечей", "в мыслях и решениях"),
+    ("pentacles", "Пентаклей", "в деньгах, работе и здоровье"),
+]
+
+_RANKS = [
+    ("Туз", "Новое начало и свежий импульс", "Упущенный шанс, задержка начала"),
+    ("Двойка", "Выбор и равновесие двух сил", "Нерешительность и разлад"),
+    ("Тройка", "Рост и первые плоды", "Задержки и несогласованность"),
+    ("Четвёрка", "Устойчивость и опора", "Застой и цепляние за привычное"),
+    ("Пятёрка", "Испытание и конфликт", "Выход из кризиса и примирение"),
+    ("Шестёрка", "Гармония и поддержка", "Неравный обмен и тоска по прошлому"),
+    ("Семёрка", "Проверка стойкости", "Сомнения и растраченные силы"),
+    ("Восьмёрка", "Движение и усердие", "Спешка или пробуксовка"),
+    ("Девятка", "Близость к цели", "Тревога и неудовлетворённость"),
+    ("Десятка", "Завершение цикла", "Перегрузка и тяжёлый итог"),
+    ("Паж", "Весть и ученичество", "Незрелость и пустые обещания"),
+    ("Рыцарь", "Порыв и действие", "Поспешность и непостоянство"),
+    ("Королева", "Зрелая забота и чуткость", "Холодность или ревность"),
+    ("Король", "Власть и ответственность", "Самоуправство и злоупотребление силой"),
+]
+
+
+def _build_deck() -> Tuple[Card, ...]:
+    major = [
+        Card(id=f"major-{number:02d}", name=name, arcana="major", suit=None, rank=number,
+             upright=upright, reversed=reversed_)
+        for number, (name, upright, reversed_) in enumerate(_MAJOR_ARCANA)
+    ]
+    minor = [
+        Card(id=f"{suit}-{rank:02d}", name=f"{rank_name} {suit_name}", arcana="minor", suit=suit, rank=rank,
+             upright=f"{upright} {sphere}", reversed=f"{reversed_} {sphere}")
+        for suit, suit_name, sphere in _SUITS
+        for rank, (rank_name, upright, reversed_) in enumerate(_RANKS, start=1)
+    ]
+    return tuple(major + minor)
+
+
+DECK = _build_deck()
+CARDS: Dict[str, Card] = {card.id: card for card in DECK}
+
+SPREADS: Dict[str, Spread] = {spread.id: spread for spread in (
+    Spread("single", "Одна карта", ("Карта",)),
+    Spread("three_card", "Три карты", ("Прошлое", "Настоящее", "Будущее")),
+    Spread("celtic_cross", "Кельтский крест", (
+        "Суть ситуации", "Препятствие", "Основа", "Прошлое", "Сознательная цель",
+        "Ближайшее будущее", "Вы сами", "Окружение", "Надежды и страхи", "Итог",
+    )),
+)}
+
+
+def card_payload(card: Card) -> dict:
+    return asdict(card)
+
+
+def _drawn(card: Card, position: str, is_reversed: bool) -> dict:
+    return {
+        "position": position,
+        "card": card_payload(card),
+        "reversed": is_reversed,
+        "meaning": card.reversed if is_reversed else card.upright,
+    }
+
+
+def draw(spread_id: str, seed: Optional[int] = None, reversals: bool = True) -> dict:
+    """A reading of the given spread; raises KeyError for an unknown spread"""
+    spread = SPREADS[spread_id]
+    if seed is None:
+        seed = secrets.randbits(32)
+    rng = random.Random(seed)
+    cards = rng.sample(DECK, len(spread.positions))
+    return {
+        "spread": spread.id,
+        "name": spread.name,
+        "seed": seed,
+        "cards": [
+            _drawn(card, position, reversals and rng.random() < REVERSAL_CHANCE)
+            for card, position in zip(cards, spread.positions)
+        ],
+    }
+
+
+def card_of_the_day(day: date, salt: str = "") -> dict:
+    """The same card and orientation for everyone on a given day"""
+    rng = random.Random(f"{salt}:{day.isoformat()}")
+    card = rng.choice(DECK)
+    return {"date": day, **_drawn(card, "Карта дня", rng.random() < REVERSAL_CHANCE)}
+
+
+class CardOfTheDay:
+    """Encoded card of the day and its ETag, recomputed only when the date changes"""
+
+    def __init__(self, salt: str = ""):
+        self.salt = salt
+        self._day: Optional[date] = None
+        self._body = b""
+        self._etag = ""
+
+    def get(self, day: date) -> Tuple[bytes, str]:
+        if day != self._day:
+            self._body = orjson.dumps(card_of_the_day(day, self.salt))
+            self._etag = f'"tarot-day-{day.isoformat()}-{hashlib.sha256(self._body).hexdigest()[:12]}"'
+            self._day = day
+        return self._body, self._etag
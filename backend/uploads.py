@@ -0,0 +1,123 @@
+"""Streaming, content-addressed storage for admin file uploads.
+
+The upload is copied in chunks to a temp file next to its destination, with
+disk writes and hashing done on a worker thread so the event loop never
+blocks. The finished file is named after its SHA-256 and moved into place
+with an atomic rename; if a file with that hash already exists the temp copy
+is simply discarded.
+
+UploadSizeLimit caps the raw request body before Starlette has spooled the
+multipart form, so an oversized upload is cut off while it is still arriving.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import PlainTextResponse
+
+CHUNK_SIZE = 1024 * 1024
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File exceeds the {max_bytes} byte upload limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredFile:
+    name: str  # <sha256><ext> inside the upload directory
+    sha256: str
+    size: int
+    created: bool  # False if identical content was already stored
+
+
+class _HashingWriter:
+    def __init__(self, directory: Path):
+        fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        self.path = Path(path)
+        self.file = os.fdopen(fd, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        self.path.unlink(missing_ok=True)
+
+    def commit(self, target: Path) -> bool:
+        """Move into place; False (and the temp copy removed) if target already exists"""
+        if target.exists():
+            self.path.unlink()
+            return False
+        os.replace(self.path, target)
+        return True
+
+
+async def store_upload(upload: UploadFile, directory: Path, max_bytes: int) -> StoredFile:
+    """Stream an upload into directory under its content hash; raises UploadTooLarge"""
+    writer = await asyncio.to_thread(_HashingWriter, directory)
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            if writer.size + len(chunk) > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await asyncio.to_thread(writer.write, chunk)
+        await asyncio.to_thread(writer.close)
+        sha256 = writer.digest.hexdigest()
+        extension = os.path.splitext(upload.filename or "")[1].lower()
+        name = f"{sha256}{extension}"
+        created = await asyncio.to_thread(writer.commit, directory / name)
+    except BaseException:
+        await asyncio.to_thread(writer.discard)
+        raise
+    return StoredFile(name=name, sha256=sha256, size=writer.size, created=created)
+
+
+class UploadSizeLimit:
+    """ASGI middleware rejecting request bodies over max_bytes on one path with 413"""
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = PlainTextResponse("Request body too large", status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while FastAPI parses the form; HTTPExceptions pass through as-is
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
+import { fetchAllPages } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
@@ -30,8 +31,7 @@ const AdminBlog = () => {
 
   const fetchPosts = async () => {
     try {
-      const response = await axios.get(`${API}/admin/blog`);
-      setPosts(response.data);
+      setPosts(await fetchAllPages(`${API}/admin/blog`));
     } catch (error) {
       toast.error('Ошибка загрузки постов');
     } finally {
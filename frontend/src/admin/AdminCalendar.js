@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
+import { fetchAllPages } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
@@ -8,9 +9,23 @@ import { toast } from 'sonner';
 import { ArrowLeft, Plus, Trash2, Calendar as CalendarIcon, Clock } from 'lucide-react';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const WEEKDAYS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'];
+
+const currentMonth = () => {
+  const now = new Date();
+  return `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}`;
+};
+
+// First and last day of a YYYY-MM month, as the from/to the slot listing filters on
+const monthRange = (month) => {
+  const [year, monthNumber] = month.split('-').map(Number);
+  const lastDay = new Date(year, monthNumber, 0).getDate();
+  return { from: `${month}-01`, to: `${month}-${String(lastDay).padStart(2, '0')}` };
+};
 
 const AdminCalendar = () => {
   const [timeSlots, setTimeSlots] = useState([]);
+  const [month, setMonth] = useState(currentMonth);
   const [appointments, setAppointments] = useState([]);
   const [loading, setLoading] = useState(false);
   const [newSlot, setNewSlot] = useState({
@@ -19,16 +34,27 @@ const AdminCalendar = () => {
     end_time: '',
     available: true
   });
+  const [schedule, setSchedule] = useState({
+    date_from: '',
+    date_to: '',
+    weekdays: [0, 1, 2, 3, 4],
+    start_time: '10:00',
+    end_time: '18:00',
+    duration: 60,
+    exclude_dates: ''
+  });
 
   useEffect(() => {
-    fetchTimeSlots();
     fetchAppointments();
   }, []);
 
+  useEffect(() => {
+    fetchTimeSlots();
+  }, [month]);
+
   const fetchTimeSlots = async () => {
     try {
-      const response = await axios.get(`${API}/admin/timeslots`);
-      setTimeSlots(response.data);
+      setTimeSlots(await fetchAllPages(`${API}/admin/timeslots`, monthRange(month)));
     } catch (error) {
       console.error('Failed to fetch time slots:', error);
     }
@@ -36,8 +62,7 @@ const AdminCalendar = () => {
 
   const fetchAppointments = async () => {
     try {
-      const response = await axios.get(`${API}/admin/appointments`);
-      setAppointments(response.data);
+      setAppointments(await fetchAllPages(`${API}/admin/appointments`));
     } catch (error) {
       console.error('Failed to fetch appointments:', error);
     }
@@ -62,6 +87,36 @@ const AdminCalendar = () => {
     }
   };
 
+  const toggleWeekday = (day) => {
+    const weekdays = schedule.weekdays.includes(day)
+      ? schedule.weekdays.filter((d) => d !== day)
+      : [...schedule.weekdays, day];
+    setSchedule({ ...schedule, weekdays });
+  };
+
+  const handleBulkCreate = async () => {
+    if (!schedule.date_from || !schedule.date_to || schedule.weekdays.length === 0) {
+      toast.error('Укажите период и дни недели');
+      return;
+    }
+
+    setLoading(true);
+    try {
+      const response = await axios.post(`${API}/admin/timeslots/bulk`, {
+        ...schedule,
+        duration: Number(schedule.duration),
+        exclude_dates: schedule.exclude_dates.split(',').map((d) => d.trim()).filter(Boolean)
+      });
+      const { created, skipped } = response.data;
+      toast.success(`Создано слотов: ${created}, пропущено (пересекаются): ${skipped}`);
+      fetchTimeSlots();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Ошибка создания расписания');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleDeleteSlot = async (slotId) => {
     if (!window.confirm('Удалить этот временной слот?')) return;
 
@@ -183,16 +238,115 @@ const AdminCalendar = () => {
           </CardContent>
         </Card>
 
-        {/* Time Slots List */}
+        {/* Recurring Schedule */}
         <Card className="glass-card mb-6">
           <CardHeader>
+            <CardTitle style={{ color: 'var(--text-primary)' }}>Создать Расписание</CardTitle>
+          </CardHeader>
+          <CardContent className="space-y-4">
+            <div className="grid md:grid-cols-5 gap-4">
+              <div>
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  С даты
+                </label>
+                <Input
+                  type="date"
+                  value={schedule.date_from}
+                  onChange={(e) => setSchedule({ ...schedule, date_from: e.target.value })}
+                />
+              </div>
+              <div>
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  По дату
+                </label>
+                <Input
+                  type="date"
+                  value={schedule.date_to}
+                  onChange={(e) => setSchedule({ ...schedule, date_to: e.target.value })}
+                />
+              </div>
+              <div>
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  Начало дня
+                </label>
+                <Input
+                  type="time"
+                  value={schedule.start_time}
+                  onChange={(e) => setSchedule({ ...schedule, start_time: e.target.value })}
+                />
+              </div>
+              <div>
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  Конец дня
+                </label>
+                <Input
+                  type="time"
+                  value={schedule.end_time}
+                  onChange={(e) => setSchedule({ ...schedule, end_time: e.target.value })}
+                />
+              </div>
+              <div>
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  Длительность (мин)
+                </label>
+                <Input
+                  type="number"
+                  min="5"
+                  value={schedule.duration}
+                  onChange={(e) => setSchedule({ ...schedule, duration: e.target.value })}
+                />
+              </div>
+            </div>
+            <div className="flex flex-wrap gap-2">
+              {WEEKDAYS.map((label, day) => (
+                <Button
+                  key={day}
+                  type="button"
+                  variant={schedule.weekdays.includes(day) ? 'default' : 'outline'}
+                  onClick={() => toggleWeekday(day)}
+                >
+                  {label}
+                </Button>
+              ))}
+            </div>
+            <div className="grid md:grid-cols-4 gap-4">
+              <div className="md:col-span-3">
+                <label className="block mb-2 text-sm font-medium" style={{ color: 'var(--text-primary)' }}>
+                  Исключить даты (через запятую)
+                </label>
+                <Input
+                  value={schedule.exclude_dates}
+                  onChange={(e) => setSchedule({ ...schedule, exclude_dates: e.target.value })}
+                  placeholder="2025-01-01, 2025-01-07"
+                />
+              </div>
+              <div className="flex items-end">
+                <Button onClick={handleBulkCreate} disabled={loading} className="btn-primary w-full">
+                  <Plus className="mr-2" size={18} />
+                  Создать слоты
+                </Button>
+              </div>
+            </div>
+          </CardContent>
+        </Card>
+
+        {/* Time Slots List */}
+        <Card className="glass-card mb-6">
+          <CardHeader className="flex flex-row items-center justify-between gap-4">
             <CardTitle style={{ color: 'var(--text-primary)' }}>
               Временные Слоты ({timeSlots.length})
             </CardTitle>
+            <Input
+              type="month"
+              value={month}
+              onChange={(e) => e.target.value && setMonth(e.target.value)}
+              className="w-auto"
+              data-testid="slots-month-input"
+            />
           </CardHeader>
           <CardContent>
             {timeSlots.length === 0 ? (
-              <p style={{ color: 'var(--text-secondary)' }}>Нет временных слотов</p>
+              <p style={{ color: 'var(--text-secondary)' }}>Нет временных слотов в этом месяце</p>
             ) : (
               <div className="space-y-3">
                 {timeSlots
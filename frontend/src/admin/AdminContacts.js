@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
+import { fetchAllPages } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
@@ -18,8 +19,7 @@ const AdminContacts = () => {
 
   const fetchContacts = async () => {
     try {
-      const response = await axios.get(`${API}/admin/contacts`);
-      setContacts(response.data);
+      setContacts(await fetchAllPages(`${API}/admin/contacts`));
     } catch (error) {
       toast.error('Ошибка загрузки сообщений');
     }
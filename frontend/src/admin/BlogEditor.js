@@ -34,11 +34,8 @@ const BlogEditor = () => {
 
   const fetchPost = async () => {
     try {
-      const response = await axios.get(`${API}/admin/blog`);
-      const post = response.data.find(p => p.id === postId);
-      if (post) {
-        setPostData(post);
-      }
+      const response = await axios.get(`${API}/admin/blog/${postId}`);
+      setPostData(response.data);
     } catch (error) {
       toast.error('Ошибка загрузки поста');
     }
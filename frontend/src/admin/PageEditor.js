@@ -416,6 +416,14 @@ const PageEditor = () => {
             case 'tarot_card':
               return (
                 <div className="space-y-2" data-testid={`tarot-card-editor-${block.id}`}>
+                  <select
+                    value={block.content.mode || 'static'}
+                    onChange={(e) => updateContent({ ...block.content, mode: e.target.value })}
+                    className="admin-select w-full"
+                  >
+                    <option value="static">Своя карта</option>
+                    <option value="card_of_the_day">Карта дня (меняется каждый день)</option>
+                  </select>
                   <Input
                     placeholder="Название карты"
                     value={block.content.card_name || ''}
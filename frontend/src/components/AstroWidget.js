@@ -0,0 +1,142 @@
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+import { Star } from 'lucide-react';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+const TITLES = {
+  moon_phase: 'Фаза Луны',
+  zodiac_signs: 'Знаки Зодиака',
+  planetary_hours: 'Планетарные Часы',
+};
+
+const ENDPOINTS = {
+  moon_phase: '/astro/moon',
+  zodiac_signs: '/astro/zodiac',
+  planetary_hours: '/astro/planetary-hours',
+};
+
+const toISODate = (d) =>
+  `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
+const formatTime = (value) =>
+  new Date(value).toLocaleTimeString('ru-RU', { hour: '2-digit', minute: '2-digit' });
+
+const formatDay = (value) =>
+  new Date(`${value}T00:00:00`).toLocaleDateString('ru-RU', { weekday: 'short', day: 'numeric', month: 'short' });
+
+const MoonPhase = ({ days }) => {
+  const [today, ...next] = days;
+  return (
+    <div>
+      <div className="text-center mb-4">
+        <p className="text-2xl font-bold" style={{ color: 'var(--text-accent)' }}>{today.moon_phase}</p>
+        <p style={{ color: 'var(--text-secondary)' }}>
+          Освещённость {Math.round(today.moon_illumination * 100)}% · возраст {today.moon_age} дн. · Луна в знаке {today.moon_sign}
+        </p>
+      </div>
+      <div className="grid grid-cols-3 md:grid-cols-6 gap-2 text-sm text-center">
+        {next.map((day) => (
+          <div key={day.date} style={{ color: 'var(--text-secondary)' }}>
+            <div className="font-semibold" style={{ color: 'var(--text-primary)' }}>{formatDay(day.date)}</div>
+            <div>{day.moon_phase}</div>
+            <div>{Math.round(day.moon_illumination * 100)}%</div>
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+};
+
+const ZodiacSigns = ({ days }) => {
+  const [today] = days;
+  return (
+    <div className="grid grid-cols-2 gap-4 text-center">
+      <div>
+        <p style={{ color: 'var(--text-secondary)' }}>Солнце</p>
+        <p className="text-2xl font-bold" style={{ color: 'var(--text-accent)' }}>{today.sun_sign}</p>
+        <p className="text-sm" style={{ color: 'var(--text-secondary)' }}>{(today.sun_longitude % 30).toFixed(1)}°</p>
+      </div>
+      <div>
+        <p style={{ color: 'var(--text-secondary)' }}>Луна</p>
+        <p className="text-2xl font-bold" style={{ color: 'var(--text-accent)' }}>{today.moon_sign}</p>
+        <p className="text-sm" style={{ color: 'var(--text-secondary)' }}>{(today.moon_longitude % 30).toFixed(1)}°</p>
+      </div>
+    </div>
+  );
+};
+
+const PlanetaryHours = ({ days }) => {
+  const [today] = days;
+  if (!today.planetary_hours.length) {
+    return <p className="text-center" style={{ color: 'var(--text-secondary)' }}>Сегодня Солнце не восходит или не заходит</p>;
+  }
+  const now = Date.now();
+  return (
+    <div>
+      <p className="text-center mb-4" style={{ color: 'var(--text-secondary)' }}>
+        Восход {formatTime(today.sunrise)} · Закат {formatTime(today.sunset)}
+      </p>
+      <div className="grid grid-cols-2 md:grid-cols-4 gap-2 text-sm">
+        {today.planetary_hours.map((hour) => {
+          const current = new Date(hour.start).getTime() <= now && now < new Date(hour.end).getTime();
+          return (
+            <div
+              key={hour.start}
+              className="rounded px-2 py-1"
+              style={{
+                color: current ? 'var(--button-text)' : 'var(--text-primary)',
+                background: current ? 'var(--button-bg)' : 'transparent',
+              }}
+            >
+              {formatTime(hour.start)} {hour.planet}
+            </div>
+          );
+        })}
+      </div>
+    </div>
+  );
+};
+
+const AstroWidget = ({ widgetType = 'moon_phase' }) => {
+  const [days, setDays] = useState(null);
+  const [error, setError] = useState(false);
+
+  useEffect(() => {
+    const from = new Date();
+    const to = new Date(from);
+    // The moon widget also shows the coming week
+    if (widgetType === 'moon_phase') to.setDate(to.getDate() + 6);
+    axios
+      .get(`${API}${ENDPOINTS[widgetType] || ENDPOINTS.moon_phase}`, {
+        params: { from: toISODate(from), to: toISODate(to) },
+      })
+      .then((response) => setDays(response.data))
+      .catch((err) => {
+        console.error('Failed to fetch astro data:', err);
+        setError(true);
+      });
+  }, [widgetType]);
+
+  return (
+    <div className="glass-card mb-6">
+      <h3 className="text-xl font-bold mb-4 flex items-center gap-2" style={{ color: 'var(--text-primary)' }}>
+        <Star size={24} style={{ color: 'var(--text-accent)' }} />
+        {TITLES[widgetType] || TITLES.moon_phase}
+      </h3>
+      {error ? (
+        <p className="text-center" style={{ color: 'var(--text-secondary)' }}>Не удалось загрузить данные</p>
+      ) : !days || days.length === 0 ? (
+        <p className="text-center" style={{ color: 'var(--text-secondary)' }}>Загрузка...</p>
+      ) : widgetType === 'zodiac_signs' ? (
+        <ZodiacSigns days={days} />
+      ) : widgetType === 'planetary_hours' ? (
+        <PlanetaryHours days={days} />
+      ) : (
+        <MoonPhase days={days} />
+      )}
+    </div>
+  );
+};
+
+export default AstroWidget;
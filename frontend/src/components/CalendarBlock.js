@@ -3,13 +3,21 @@ import axios from 'axios';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Textarea } from '@/components/ui/textarea';
-import { Calendar, Clock, Check } from 'lucide-react';
+import { Calendar, Clock, Check, ChevronLeft, ChevronRight } from 'lucide-react';
 import { toast } from 'sonner';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
+const toISODate = (d) =>
+  `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
+const monthStart = (d) => new Date(d.getFullYear(), d.getMonth(), 1);
+
 const CalendarBlock = ({ title }) => {
-  const [availableSlots, setAvailableSlots] = useState([]);
+  const [month, setMonth] = useState(() => monthStart(new Date()));
+  const [availableDays, setAvailableDays] = useState([]);
+  const [selectedDate, setSelectedDate] = useState(null);
+  const [daySlots, setDaySlots] = useState([]);
   const [selectedSlot, setSelectedSlot] = useState(null);
   const [showForm, setShowForm] = useState(false);
   const [submitted, setSubmitted] = useState(false);
@@ -21,26 +29,40 @@ const CalendarBlock = ({ title }) => {
   });
 
   useEffect(() => {
-    fetchAvailableSlots();
-  }, []);
+    fetchAvailableDays(month);
+  }, [month]);
+
+  // One small query per month: slot counts per day, not the slots themselves
+  const fetchAvailableDays = async (first) => {
+    const last = new Date(first.getFullYear(), first.getMonth() + 1, 0);
+    try {
+      const response = await axios.get(`${API}/timeslots/availability`, {
+        params: { from: toISODate(first), to: toISODate(last) }
+      });
+      setAvailableDays(response.data);
+      setSelectedDate(null);
+      setDaySlots([]);
+    } catch (error) {
+      console.error('Failed to fetch availability:', error);
+    }
+  };
 
-  const fetchAvailableSlots = async () => {
+  const fetchDaySlots = async (date) => {
     try {
-      const response = await axios.get(`${API}/timeslots/available`);
-      // Group slots by date
-      const groupedSlots = response.data.reduce((acc, slot) => {
-        if (!acc[slot.date]) {
-          acc[slot.date] = [];
-        }
-        acc[slot.date].push(slot);
-        return acc;
-      }, {});
-      setAvailableSlots(groupedSlots);
+      const response = await axios.get(`${API}/timeslots/available`, {
+        params: { from: date, to: date }
+      });
+      setSelectedDate(date);
+      setDaySlots(response.data);
     } catch (error) {
       console.error('Failed to fetch available slots:', error);
     }
   };
 
+  const shiftMonth = (delta) => {
+    setMonth(new Date(month.getFullYear(), month.getMonth() + delta, 1));
+  };
+
   const handleSlotSelect = (slot) => {
     setSelectedSlot(slot);
     setShowForm(true);
@@ -63,7 +85,7 @@ const CalendarBlock = ({ title }) => {
       setSubmitted(true);
       setShowForm(false);
       setFormData({ name: '', email: '', phone: '', message: '' });
-      fetchAvailableSlots(); // Refresh available slots
+      fetchAvailableDays(month); // Refresh available slots
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Ошибка при создании записи');
     }
@@ -171,52 +193,89 @@ const CalendarBlock = ({ title }) => {
         {title || 'Запись на консультацию'}
       </h3>
       
-      {Object.keys(availableSlots).length === 0 ? (
+      <div className="flex items-center justify-between mb-4">
+        <Button
+          type="button"
+          variant="outline"
+          onClick={() => shiftMonth(-1)}
+          disabled={month <= monthStart(new Date())}
+        >
+          <ChevronLeft size={18} />
+        </Button>
+        <span className="font-semibold capitalize" style={{ color: 'var(--text-primary)' }}>
+          {month.toLocaleDateString('ru-RU', { year: 'numeric', month: 'long' })}
+        </span>
+        <Button type="button" variant="outline" onClick={() => shiftMonth(1)}>
+          <ChevronRight size={18} />
+        </Button>
+      </div>
+
+      {availableDays.length === 0 ? (
         <div className="text-center py-8" style={{ color: 'var(--text-secondary)' }}>
           <Calendar size={48} className="mx-auto mb-4" style={{ color: 'var(--text-accent)' }} />
-          <p>В данный момент нет доступных слотов для записи</p>
+          <p>В этом месяце нет доступных слотов для записи</p>
         </div>
       ) : (
         <div className="space-y-4">
-          {Object.entries(availableSlots)
-            .sort(([dateA], [dateB]) => new Date(dateA) - new Date(dateB))
-            .map(([date, slots]) => (
-              <div key={date}>
-                <h4 className="font-semibold mb-3" style={{ color: 'var(--text-primary)' }}>
-                  {new Date(date).toLocaleDateString('ru-RU', {
-                    year: 'numeric',
-                    month: 'long',
-                    day: 'numeric',
-                    weekday: 'long'
-                  })}
-                </h4>
-                <div className="grid grid-cols-2 md:grid-cols-3 gap-2">
-                  {slots.map((slot) => (
-                    <button
-                      key={slot.id}
-                      onClick={() => handleSlotSelect(slot)}
-                      className="p-3 rounded border-2 transition-all hover:scale-105"
-                      style={{
-                        background: 'var(--bg-secondary)',
-                        borderColor: 'var(--border-color)',
-                        color: 'var(--text-primary)'
-                      }}
-                      onMouseEnter={(e) => {
-                        e.currentTarget.style.borderColor = 'var(--text-accent)';
-                        e.currentTarget.style.background = 'var(--card-bg)';
-                      }}
-                      onMouseLeave={(e) => {
-                        e.currentTarget.style.borderColor = 'var(--border-color)';
-                        e.currentTarget.style.background = 'var(--bg-secondary)';
-                      }}
-                    >
-                      <Clock size={16} className="inline mr-1" />
-                      {slot.start_time} - {slot.end_time}
-                    </button>
-                  ))}
+          <div className="grid grid-cols-3 md:grid-cols-5 gap-2">
+            {availableDays.map(({ date, available }) => (
+              <button
+                key={date}
+                onClick={() => fetchDaySlots(date)}
+                className="p-2 rounded border-2 transition-all"
+                style={{
+                  background: date === selectedDate ? 'var(--card-bg)' : 'var(--bg-secondary)',
+                  borderColor: date === selectedDate ? 'var(--text-accent)' : 'var(--border-color)',
+                  color: 'var(--text-primary)'
+                }}
+              >
+                <div className="font-medium">
+                  {new Date(date).toLocaleDateString('ru-RU', { day: 'numeric', month: 'short', weekday: 'short' })}
                 </div>
-              </div>
+                <div className="text-sm" style={{ color: 'var(--text-secondary)' }}>
+                  свободно: {available}
+                </div>
+              </button>
             ))}
+          </div>
+
+          {selectedDate && (
+            <div>
+              <h4 className="font-semibold mb-3" style={{ color: 'var(--text-primary)' }}>
+                {new Date(selectedDate).toLocaleDateString('ru-RU', {
+                  year: 'numeric',
+                  month: 'long',
+                  day: 'numeric',
+                  weekday: 'long'
+                })}
+              </h4>
+              <div className="grid grid-cols-2 md:grid-cols-3 gap-2">
+                {daySlots.map((slot) => (
+                  <button
+                    key={slot.id}
+                    onClick={() => handleSlotSelect(slot)}
+                    className="p-3 rounded border-2 transition-all hover:scale-105"
+                    style={{
+                      background: 'var(--bg-secondary)',
+                      borderColor: 'var(--border-color)',
+                      color: 'var(--text-primary)'
+                    }}
+                    onMouseEnter={(e) => {
+                      e.currentTarget.style.borderColor = 'var(--text-accent)';
+                      e.currentTarget.style.background = 'var(--card-bg)';
+                    }}
+                    onMouseLeave={(e) => {
+                      e.currentTarget.style.borderColor = 'var(--border-color)';
+                      e.currentTarget.style.background = 'var(--bg-secondary)';
+                    }}
+                  >
+                    <Clock size={16} className="inline mr-1" />
+                    {slot.start_time} - {slot.end_time}
+                  </button>
+                ))}
+              </div>
+            </div>
+          )}
         </div>
       )}
     </div>
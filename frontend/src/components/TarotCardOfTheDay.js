@@ -0,0 +1,43 @@
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+import { Sparkles } from 'lucide-react';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+const TarotCardOfTheDay = ({ title }) => {
+  const [draw, setDraw] = useState(null);
+  const [error, setError] = useState(false);
+
+  useEffect(() => {
+    axios
+      .get(`${API}/tarot/card-of-the-day`)
+      .then((response) => setDraw(response.data))
+      .catch((err) => {
+        console.error('Failed to fetch card of the day:', err);
+        setError(true);
+      });
+  }, []);
+
+  return (
+    <div className="glass-card mb-6 text-center">
+      <Sparkles size={48} className="mx-auto mb-4" style={{ color: 'var(--text-accent)' }} />
+      <h3 className="text-2xl font-bold mb-3" style={{ color: 'var(--text-primary)' }}>
+        {title || 'Карта Дня'}
+      </h3>
+      {error ? (
+        <p style={{ color: 'var(--text-secondary)' }}>Не удалось загрузить карту</p>
+      ) : !draw ? (
+        <p style={{ color: 'var(--text-secondary)' }}>Загрузка...</p>
+      ) : (
+        <>
+          <p className="text-xl font-semibold mb-2" style={{ color: 'var(--text-accent)' }}>
+            {draw.card.name}{draw.reversed ? ' (перевёрнутая)' : ''}
+          </p>
+          <p style={{ color: 'var(--text-secondary)' }}>{draw.meaning}</p>
+        </>
+      )}
+    </div>
+  );
+};
+
+export default TarotCardOfTheDay;
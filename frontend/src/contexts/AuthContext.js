@@ -5,6 +5,17 @@ const AuthContext = createContext();
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
+// Admin API routes require the bearer token on every request
+const setAuthHeader = (token) => {
+  if (token) {
+    axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
+  } else {
+    delete axios.defaults.headers.common['Authorization'];
+  }
+};
+
+setAuthHeader(localStorage.getItem('token'));
+
 export const useAuth = () => {
   const context = useContext(AuthContext);
   if (!context) throw new Error('useAuth must be used within AuthProvider');
@@ -32,6 +43,7 @@ export const AuthProvider = ({ children }) => {
       setUser(response.data);
     } catch (error) {
       localStorage.removeItem('token');
+      setAuthHeader(null);
       setToken(null);
     } finally {
       setLoading(false);
@@ -42,12 +54,14 @@ export const AuthProvider = ({ children }) => {
     const response = await axios.post(`${API}/auth/login`, { username, password });
     const { access_token } = response.data;
     localStorage.setItem('token', access_token);
+    setAuthHeader(access_token);
     setToken(access_token);
     await fetchUser();
   };
 
   const logout = () => {
     localStorage.removeItem('token');
+    setAuthHeader(null);
     setToken(null);
     setUser(null);
   };
@@ -0,0 +1,32 @@
+import axios from 'axios';
+
+// Follow next_cursor until a cursor-paginated listing is exhausted
+export async function fetchAllPages(url, params = {}) {
+  const items = [];
+  let after = null;
+  do {
+    const response = await axios.get(url, { params: { ...params, ...(after ? { after } : {}) } });
+    items.push(...response.data.items);
+    after = response.data.next_cursor;
+  } while (after);
+  return items;
+}
+
+// Uploaded images are served in precomputed widths; other URLs pass through unchanged
+export function mediaUrl(url, width) {
+  if (!url || !url.includes('/api/media/') || url.includes('?')) return url;
+  return `${url}?w=${width}`;
+}
+
+// Data inlined into a prerendered snapshot of the current page. It only answers
+// for the path the snapshot was rendered for; once the visitor navigates
+// elsewhere it is dropped and views fetch fresh data.
+let prerendered = typeof window !== 'undefined' ? window.__PRERENDERED__ : null;
+
+export function takePrerendered(path) {
+  if (!prerendered || prerendered.path !== path) {
+    prerendered = null;
+    return null;
+  }
+  return prerendered;
+}
@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { Link, useNavigate } from 'react-router-dom';
+import { Link, useNavigate, useSearchParams } from 'react-router-dom';
 import { useTheme } from '@/contexts/ThemeContext';
+import { mediaUrl, takePrerendered } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Moon, Sun, ArrowLeft, Calendar, Tag } from 'lucide-react';
 
@@ -10,29 +11,76 @@ const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 const BlogListPage = () => {
   const { theme, toggleTheme, settings } = useTheme();
   const navigate = useNavigate();
-  const [posts, setPosts] = useState([]);
-  const [pages, setPages] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const [searchParams, setSearchParams] = useSearchParams();
+  const tag = searchParams.get('tag') || '';
+  // A prerendered snapshot carries the first page of (unfiltered) posts and the navigation
+  const [initial] = useState(() => (tag ? null : takePrerendered('/blog')));
+  const [posts, setPosts] = useState(initial?.blog.items || []);
+  const [pages, setPages] = useState(initial?.bootstrap.pages || []);
+  const [tags, setTags] = useState([]);
+  const [loadedTag, setLoadedTag] = useState(initial ? '' : null);
+  const [loading, setLoading] = useState(!initial);
+  const [nextCursor, setNextCursor] = useState(initial?.blog.next_cursor || null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
-    fetchData();
+    if (!initial) fetchPages();
+    fetchTags();
   }, []);
 
-  const fetchData = async () => {
+  useEffect(() => {
+    if (loadedTag !== tag) fetchPosts();
+  }, [tag]);
+
+  const fetchPages = async () => {
+    try {
+      const { data } = await axios.get(`${API}/bootstrap`, { params: { include_page: false } });
+      setPages(data.pages);
+    } catch (error) {
+      console.error('Failed to fetch pages:', error);
+    }
+  };
+
+  const fetchTags = async () => {
+    try {
+      const { data } = await axios.get(`${API}/blog/tags`);
+      setTags(data);
+    } catch (error) {
+      console.error('Failed to fetch tags:', error);
+    }
+  };
+
+  const fetchPosts = async () => {
+    setLoading(true);
     try {
-      const [postsRes, pagesRes] = await Promise.all([
-        axios.get(`${API}/blog`),
-        axios.get(`${API}/pages`)
-      ]);
-      setPosts(postsRes.data);
-      setPages(pagesRes.data);
+      const { data } = await axios.get(`${API}/blog`, { params: tag ? { tags: tag } : {} });
+      setPosts(data.items);
+      setNextCursor(data.next_cursor);
+      setLoadedTag(tag);
     } catch (error) {
-      console.error('Failed to fetch data:', error);
+      console.error('Failed to fetch posts:', error);
     } finally {
       setLoading(false);
     }
   };
 
+  const selectTag = (value) => {
+    setSearchParams(value ? { tag: value } : {});
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/blog`, { params: { after: nextCursor, ...(tag ? { tags: tag } : {}) } });
+      setPosts((prev) => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch more posts:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString) => {
     const date = new Date(dateString);
     return date.toLocaleDateString('ru-RU', {
@@ -95,6 +143,24 @@ const BlogListPage = () => {
             <p style={{ color: 'var(--text-secondary)' }}>
               Статьи о таро, астрологии и духовном развитии
             </p>
+            {tags.length > 0 && (
+              <div className="flex flex-wrap gap-2 mt-6">
+                <Button size="sm" variant={tag ? 'outline' : 'default'} onClick={() => selectTag('')}>
+                  Все
+                </Button>
+                {tags.map(({ tag: name, count }) => (
+                  <Button
+                    key={name}
+                    size="sm"
+                    variant={tag === name ? 'default' : 'outline'}
+                    onClick={() => selectTag(name)}
+                  >
+                    <Tag />
+                    {name} ({count})
+                  </Button>
+                ))}
+              </div>
+            )}
           </div>
 
           {/* Blog Posts Grid */}
@@ -118,7 +184,7 @@ const BlogListPage = () => {
                 >
                   {post.image_url && (
                     <img 
-                      src={post.image_url} 
+                      src={mediaUrl(post.image_url, 640)} 
                       alt={post.title}
                       className="w-full h-48 object-cover rounded-t-lg mb-4"
                     />
@@ -149,6 +215,13 @@ const BlogListPage = () => {
               ))}
             </div>
           )}
+          {nextCursor && (
+            <div className="text-center mt-10">
+              <Button onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+              </Button>
+            </div>
+          )}
         </div>
       </main>
 
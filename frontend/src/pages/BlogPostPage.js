@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { useTheme } from '@/contexts/ThemeContext';
+import { takePrerendered } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Moon, Sun, ArrowLeft, Calendar, Tag } from 'lucide-react';
 
@@ -11,23 +12,28 @@ const BlogPostPage = () => {
   const { postId } = useParams();
   const { theme, toggleTheme, settings } = useTheme();
   const navigate = useNavigate();
-  const [post, setPost] = useState(null);
-  const [pages, setPages] = useState([]);
-  const [loading, setLoading] = useState(true);
+  // A prerendered snapshot carries the post and the navigation
+  const [initial] = useState(() => takePrerendered(`/blog/${postId}`));
+  const [post, setPost] = useState(initial?.post || null);
+  const [pages, setPages] = useState(initial?.bootstrap.pages || []);
+  const [loading, setLoading] = useState(!initial);
   const [error, setError] = useState(null);
 
   useEffect(() => {
+    if (initial && initial.post.id === postId) return;
     fetchData();
   }, [postId]);
 
   const fetchData = async () => {
+    setLoading(true);
+    setError(null);
     try {
-      const [postRes, pagesRes] = await Promise.all([
+      const [postRes, bootstrapRes] = await Promise.all([
         axios.get(`${API}/blog/${postId}`),
-        axios.get(`${API}/pages`)
+        axios.get(`${API}/bootstrap`, { params: { include_page: false } })
       ]);
       setPost(postRes.data);
-      setPages(pagesRes.data);
+      setPages(bootstrapRes.data.pages);
     } catch (error) {
       console.error('Failed to fetch data:', error);
       setError('Пост не найден');
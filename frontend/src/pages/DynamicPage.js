@@ -2,10 +2,13 @@ import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import axios from 'axios';
 import { useTheme } from '@/contexts/ThemeContext';
+import { takePrerendered } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { ArrowLeft, X } from 'lucide-react';
 import * as LucideIcons from 'lucide-react';
 import CalendarBlock from '@/components/CalendarBlock';
+import AstroWidget from '@/components/AstroWidget';
+import TarotCardOfTheDay from '@/components/TarotCardOfTheDay';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -64,20 +67,25 @@ const ServiceModal = ({ service, onClose }) => {
 const DynamicPage = () => {
   const { slug } = useParams();
   const { settings } = useTheme();
-  const [page, setPage] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [services, setServices] = useState([]);
+  // A prerendered snapshot of this page already carries the bootstrap payload
+  const [initial] = useState(() => takePrerendered(`/page/${slug}`)?.bootstrap);
+  const [page, setPage] = useState(initial?.page || null);
+  const [loading, setLoading] = useState(!initial);
+  const [services, setServices] = useState(initial?.services || []);
   const [selectedService, setSelectedService] = useState(null);
 
   useEffect(() => {
+    if (initial && initial.page?.slug === slug) return;
     fetchPage();
-    fetchServices();
   }, [slug]);
 
   const fetchPage = async () => {
+    setLoading(true);
     try {
-      const response = await axios.get(`${API}/pages/${slug}`);
-      setPage(response.data);
+      // The page and the services its blocks may list, in one request
+      const { data } = await axios.get(`${API}/bootstrap`, { params: { slug } });
+      setPage(data.page);
+      setServices(data.services);
     } catch (error) {
       console.error('Failed to fetch page:', error);
     } finally {
@@ -85,15 +93,6 @@ const DynamicPage = () => {
     }
   };
 
-  const fetchServices = async () => {
-    try {
-      const response = await axios.get(`${API}/services`);
-      setServices(response.data);
-    } catch (error) {
-      console.error('Failed to fetch services:', error);
-    }
-  };
-
   const getBlockGridClass = (block) => {
     // Используем column_span для определения ширины в grid системе
     const span = block.column_span || 3;
@@ -256,6 +255,10 @@ const DynamicPage = () => {
         );
         break;
       case 'tarot_card':
+        if (block.content.mode === 'card_of_the_day') {
+          content = <TarotCardOfTheDay title={block.content.card_name} />;
+          break;
+        }
         content = (
           <div className="glass-card mb-6 text-center">
             <LucideIcons.Sparkles size={48} className="mx-auto mb-4" style={{ color: 'var(--text-accent)' }} />
@@ -268,17 +271,7 @@ const DynamicPage = () => {
         break;
       case 'astro_widget':
         content = (
-          <div className="glass-card mb-6">
-            <h3 className="text-xl font-bold mb-4 flex items-center gap-2" style={{ color: 'var(--text-primary)' }}>
-              <LucideIcons.Star size={24} style={{ color: 'var(--text-accent)' }} />
-              {block.content.widget_type === 'moon_phase' && 'Фаза Луны'}
-              {block.content.widget_type === 'zodiac_signs' && 'Знаки Зодиака'}
-              {block.content.widget_type === 'planetary_hours' && 'Планетарные Часы'}
-            </h3>
-            <div className="text-center" style={{ color: 'var(--text-secondary)' }}>
-              <p>Астрологическая информация будет отображаться здесь</p>
-            </div>
-          </div>
+          <AstroWidget widgetType={block.content.widget_type} />
         );
         break;
       case 'calendar':
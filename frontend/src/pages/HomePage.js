@@ -2,12 +2,15 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { Link } from 'react-router-dom';
 import { useTheme } from '@/contexts/ThemeContext';
+import { takePrerendered } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Textarea } from '@/components/ui/textarea';
 import { toast } from 'sonner';
 import { Moon, Sun, Mail, Send, X } from 'lucide-react';
 import * as LucideIcons from 'lucide-react';
+import AstroWidget from '@/components/AstroWidget';
+import TarotCardOfTheDay from '@/components/TarotCardOfTheDay';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -65,31 +68,29 @@ const ServiceModal = ({ service, onClose }) => {
 
 const HomePage = () => {
   const { theme, toggleTheme, settings } = useTheme();
-  const [pages, setPages] = useState([]);
-  const [services, setServices] = useState([]);
-  const [homeContent, setHomeContent] = useState(null);
-  const [homepagePage, setHomepagePage] = useState(null);
-  const [loading, setLoading] = useState(true);
+  // A prerendered snapshot of this page already carries the bootstrap payload
+  const [initial] = useState(() => takePrerendered('/')?.bootstrap);
+  const [pages, setPages] = useState(initial?.pages || []);
+  const [services, setServices] = useState(initial?.services || []);
+  const [homeContent, setHomeContent] = useState(initial?.home_content || null);
+  const [homepagePage, setHomepagePage] = useState(initial?.page || null);
+  const [loading, setLoading] = useState(!initial);
   const [selectedService, setSelectedService] = useState(null);
   const [contactForm, setContactForm] = useState({ name: '', email: '', message: '' });
   const [sending, setSending] = useState(false);
 
   useEffect(() => {
-    fetchData();
+    if (!initial) fetchData();
   }, []);
 
   const fetchData = async () => {
     try {
-      const [pagesRes, servicesRes, homeContentRes, homepagePageRes] = await Promise.all([
-        axios.get(`${API}/pages`),
-        axios.get(`${API}/services`),
-        axios.get(`${API}/home-content`),
-        axios.get(`${API}/homepage-page`)
-      ]);
-      setPages(pagesRes.data);
-      setServices(servicesRes.data);
-      setHomeContent(homeContentRes.data);
-      setHomepagePage(homepagePageRes.data);
+      // Navigation, services, home content and the homepage page in one request
+      const { data } = await axios.get(`${API}/bootstrap`);
+      setPages(data.pages);
+      setServices(data.services);
+      setHomeContent(data.home_content);
+      setHomepagePage(data.page);
     } catch (error) {
       console.error('Failed to fetch data:', error);
     } finally {
@@ -307,6 +308,14 @@ const HomePage = () => {
         break;
 
       case 'tarot_card':
+        if (block.content.mode === 'card_of_the_day') {
+          content = (
+            <div className="my-8" data-testid="block-tarot">
+              <TarotCardOfTheDay title={block.content.card_name} />
+            </div>
+          );
+          break;
+        }
         content = (
           <div className="my-8 glass-card text-center" data-testid="block-tarot">
             <h3 className="text-2xl font-bold mb-4" style={{ color: 'var(--text-primary)' }}>
@@ -326,6 +335,15 @@ const HomePage = () => {
         break;
 
       case 'astro_widget':
+        // Blocks from the page editor pick a computed widget; older ones carry hand-written text
+        if (block.content.widget_type) {
+          content = (
+            <div className="my-8" data-testid="block-astro">
+              <AstroWidget widgetType={block.content.widget_type} />
+            </div>
+          );
+          break;
+        }
         content = (
           <div className="my-8 glass-card text-center" data-testid="block-astro">
             <h3 className="text-2xl font-bold mb-4" style={{ color: 'var(--text-primary)' }}>
@@ -0,0 +1,9 @@
+#!/bin/sh
+# Hand this build's index.html to the backend prerenderer. Snapshots from the
+# previous build reference bundles that no longer exist, so drop them; nginx
+# serves the plain SPA until the backend has rendered new ones.
+set -e
+dir=/usr/share/nginx/html/prerendered
+mkdir -p "$dir"
+find "$dir" -name '*.html' -delete
+cp /usr/share/nginx/html/index.html "$dir/_template.html"
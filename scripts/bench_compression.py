@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and compression cost per public endpoint.
+
+For each endpoint fetches the body once per Accept-Encoding (identity, gzip,
+br) and reports the transferred size and median latency, then times
+compressing the identity body locally at the per-request and the stored
+(once per ETag) levels used by backend/compression.py, i.e. what a cache miss
+costs the server in CPU.
+
+    python scripts/bench_compression.py --url http://localhost:8001/api \
+        --endpoint /bootstrap --endpoint "/pages/about" --endpoint /blog
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from compression import ENCODINGS, FAST_LEVEL, STORED_LEVEL, compress  # noqa: E402
+
+DEFAULT_ENDPOINTS = ["/bootstrap", "/pages", "/menu", "/settings", "/services", "/home-content", "/blog"]
+
+
+def fetch(session, url, encoding, repeat):
+    latencies = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = session.get(url, headers={"Accept-Encoding": encoding}, stream=True, timeout=30)
+        # Raw bytes as sent, before requests decodes them
+        raw = response.raw.read(decode_content=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        size = len(raw)
+        served = response.headers.get("Content-Encoding", "identity")
+    return size, served, statistics.median(latencies)
+
+
+def cpu_cost(body, encoding, level, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress(body, encoding, level)
+    return len(compressed), (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8001/api")
+    parser.add_argument("--endpoint", action="append", help="public GET to measure (repeatable)")
+    parser.add_argument("--repeat", type=int, default=20, help="requests / compressions per measurement")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    for endpoint in args.endpoint or DEFAULT_ENDPOINTS:
+        url = f"{args.url}{endpoint}"
+        body = session.get(url, headers={"Accept-Encoding": "identity"}, timeout=30).content
+        print(f"=== GET {url} ({len(body)} bytes) ===")
+        for encoding in ("identity",) + ENCODINGS:
+            size, served, latency = fetch(session, url, encoding, args.repeat)
+            ratio = size / len(body) if body else 1
+            print(f"  wire {encoding:8} -> {served:8} {size:8d} bytes ({ratio:5.1%}) p50={latency:.1f}ms")
+        for encoding in ENCODINGS:
+            for label, levels in (("per-request", FAST_LEVEL), ("stored", STORED_LEVEL)):
+                size, ms = cpu_cost(body, encoding, levels[encoding], args.repeat)
+                print(f"  cpu  {encoding:5} {label:11} level={levels[encoding]} {size:8d} bytes {ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Public GET latency under a concurrent login flood.
+
+Measures p50/p99 of a public endpoint on an idle server, then again while
+FLOOD_THREADS threads hammer /api/auth/login. With bcrypt off the event loop
+the two distributions should stay close; logins beyond the hash queue are
+answered with fast 503/429s instead of stalling the site.
+
+    python scripts/bench_login_flood.py --url http://localhost:8001/api \
+        --username admin --password admin123
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def sample_latency(url, duration, stop=None):
+    session = requests.Session()
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline and not (stop and stop.is_set()):
+        start = time.perf_counter()
+        session.get(url, timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def flood(url, username, password, stop, statuses, lock):
+    session = requests.Session()
+    while not stop.is_set():
+        try:
+            status = session.post(url, json={"username": username, "password": password}, timeout=30).status_code
+        except requests.RequestException:
+            status = "error"
+        with lock:
+            statuses[status] += 1
+
+
+def report(label, latencies):
+    print(f"{label}: n={len(latencies)} "
+          f"p50={statistics.median(latencies):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms "
+          f"max={max(latencies):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8001/api")
+    parser.add_argument("--endpoint", default="/settings", help="public GET to sample")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--threads", type=int, default=32, help="concurrent login threads")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per phase")
+    args = parser.parse_args()
+
+    target = f"{args.url}{args.endpoint}"
+    print(f"=== Baseline: GET {target} ===")
+    report("idle", sample_latency(target, args.duration))
+
+    print(f"=== Flood: {args.threads} threads on POST {args.url}/auth/login ===")
+    stop = threading.Event()
+    statuses, lock = Counter(), threading.Lock()
+    threads = [
+        threading.Thread(target=flood, args=(f"{args.url}/auth/login", args.username, args.password, stop, statuses, lock))
+        for _ in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        time.sleep(1)  # let the flood ramp up
+        report("flood", sample_latency(target, args.duration))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    print("login responses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
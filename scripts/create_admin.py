@@ -30,7 +30,7 @@ async def create_admin():
         "username": "admin",
         "email": "admin@example.com",
         "password_hash": pwd_context.hash("admin123"),
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(admin_user)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for POST /api/appointments.
+
+Creates one fresh time slot, releases N simultaneous bookings for it and
+asserts that exactly one succeeds while every other request is rejected with
+400. It then retries the winner with its Idempotency-Key (must return the same
+appointment), reports throughput, and cleans up the slot and appointment.
+
+    python scripts/stress_booking.py --url http://localhost:8001/api \
+        --username admin --password admin123 --concurrency 300
+"""
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def login(url, username, password):
+    response = requests.post(f"{url}/auth/login", json={"username": username, "password": password}, timeout=30)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8001/api")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=300)
+    args = parser.parse_args()
+
+    admin = login(args.url, args.username, args.password)
+    slot = requests.post(f"{args.url}/admin/timeslots", headers=admin, timeout=30, json={
+        "date": "2099-12-31", "start_time": "10:00", "end_time": "11:00"
+    }).json()
+    print(f"=== {args.concurrency} concurrent bookings of slot {slot['id']} ===")
+
+    barrier = threading.Barrier(args.concurrency)
+
+    def book(i):
+        key = str(uuid.uuid4())
+        body = {"slot_id": slot["id"], "name": f"Stress {i}", "email": f"stress{i}@example.com"}
+        session = requests.Session()
+        barrier.wait()
+        response = session.post(f"{args.url}/appointments", json=body, headers={"Idempotency-Key": key}, timeout=60)
+        return response, key, body
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(book, range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(response.status_code for response, _, _ in results)
+    winners = [(response, key, body) for response, key, body in results if response.status_code == 200]
+    print(f"responses: {dict(statuses)}")
+    print(f"throughput: {args.concurrency / elapsed:.0f} bookings/s ({elapsed * 1000:.0f} ms total)")
+
+    ok = len(winners) == 1 and statuses[400] == args.concurrency - 1
+    if winners:
+        response, key, body = winners[0]
+        retry = requests.post(f"{args.url}/appointments", json=body, headers={"Idempotency-Key": key}, timeout=30)
+        same = retry.status_code == 200 and retry.json()["id"] == response.json()["id"]
+        print(f"idempotent retry returns the same appointment: {same}")
+        ok = ok and same
+        requests.delete(f"{args.url}/admin/appointments/{response.json()['id']}", headers=admin, timeout=30)
+    requests.delete(f"{args.url}/admin/timeslots/{slot['id']}", headers=admin, timeout=30)
+
+    print("✓ exactly one booking won" if ok else "✗ booking race detected")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
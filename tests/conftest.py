@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend is a flat set of modules run from its own directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server():
+    """The application module on an in-memory MongoDB, with fast bcrypt and no outgoing email"""
+    import motor.motor_asyncio
+    from mongomock_motor import AsyncMongoMockClient
+
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("EMAIL_TRANSPORT", "memory")
+    os.environ.setdefault("SLOW_QUERY_EXPLAIN", "false")
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    import server
+    return server
+
+
+@pytest.fixture(scope="session")
+def api(server):
+    """TestClient logged in as an admin"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        response = client.post("/api/auth/register", json={
+            "username": "admin", "email": "admin@example.com", "password": "admin-password",
+        })
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield client
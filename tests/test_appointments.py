@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from slot_times import local_today
+
+
+@pytest.fixture
+def slot_id(api):
+    def create(offset, start="10:00"):
+        date = (local_today() + timedelta(days=offset)).isoformat()
+        response = api.post("/api/admin/timeslots", json={"date": date, "start_time": start, "end_time": "23:00"})
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return create
+
+
+def booking(slot_id, name="Client"):
+    return {"slot_id": slot_id, "name": name, "email": "client@example.com"}
+
+
+def new_key():
+    # mongomock ignores partialFilterExpression, so keyless bookings would collide
+    # on the unique idempotency_key index; every booking here carries its own key
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+def get_slot(api, server, slot_id):
+    return api.portal.call(server.db.time_slots.find_one, {"id": slot_id}, {"_id": 0})
+
+
+def test_concurrent_bookings_claim_a_slot_once(api, server, slot_id):
+    slot = slot_id(300)
+
+    async def book_all():
+        return await asyncio.gather(*(
+            server.create_appointment(server.AppointmentCreate(**booking(slot, f"Client {i}")), str(uuid.uuid4()))
+            for i in range(10)
+        ), return_exceptions=True)
+
+    results = api.portal.call(book_all)
+    booked = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(booked) == 1 and len(rejected) == 9
+    assert {error.status_code for error in rejected} == {400}
+    stored = get_slot(api, server, slot)
+    assert stored["available"] is False and stored["appointment_id"] == booked[0].id
+    assert api.post("/api/appointments", json=booking(slot), headers=new_key()).status_code == 400
+
+
+def test_unknown_slot_is_404(api):
+    assert api.post("/api/appointments", json=booking("no-such-slot"), headers=new_key()).status_code == 404
+
+
+def test_idempotent_retry_returns_the_first_booking(api, server, slot_id):
+    slot = slot_id(301)
+    headers = {"Idempotency-Key": "retry-key"}
+    first = api.post("/api/appointments", json=booking(slot), headers=headers)
+    retry = api.post("/api/appointments", json=booking(slot), headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    stored = api.portal.call(server.db.appointments.count_documents, {"idempotency_key": "retry-key"})
+    assert stored == 1
+
+
+def test_reused_key_for_another_slot_releases_that_slot(api, server, slot_id):
+    first_slot, second_slot = slot_id(302), slot_id(303)
+    headers = {"Idempotency-Key": "reused-key"}
+    assert api.post("/api/appointments", json=booking(first_slot), headers=headers).status_code == 200
+    response = api.post("/api/appointments", json=booking(second_slot), headers=headers)
+    assert response.status_code == 409
+    # The claim made before the failed insert is undone
+    stored = get_slot(api, server, second_slot)
+    assert stored["available"] is True and "appointment_id" not in stored
+
+
+def test_cancelling_releases_the_slot_only_for_its_own_appointment(api, server, slot_id):
+    slot = slot_id(304)
+    appointment = api.post("/api/appointments", json=booking(slot), headers=new_key()).json()
+    assert api.put(f"/api/admin/appointments/{appointment['id']}", json={"status": "cancelled"}).status_code == 200
+    assert get_slot(api, server, slot)["available"] is True
+
+    # Rebooked by someone else: removing the old appointment must not free it
+    rebooked = api.post("/api/appointments", json=booking(slot, "Second"), headers=new_key()).json()
+    assert api.delete(f"/api/admin/appointments/{appointment['id']}").status_code == 200
+    stored = get_slot(api, server, slot)
+    assert stored["available"] is False and stored["appointment_id"] == rebooked["id"]
+    assert api.delete(f"/api/admin/appointments/{rebooked['id']}").status_code == 200
+    assert get_slot(api, server, slot)["available"] is True
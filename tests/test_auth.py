@@ -0,0 +1,25 @@
+import time
+
+import jwt
+
+
+def auth(server, **claims):
+    return {"Authorization": f"Bearer {jwt.encode(claims, server.SECRET_KEY, algorithm=server.ALGORITHM)}"}
+
+
+def test_admin_routes_require_a_valid_token(api, server):
+    assert api.get("/api/admin/pages").status_code == 200
+    assert api.get("/api/admin/pages", headers={"Authorization": "Bearer nope"}).status_code == 401
+    expired = auth(server, sub="admin", exp=int(time.time()) - 60)
+    assert api.get("/api/admin/pages", headers=expired).status_code == 401
+
+
+def test_token_without_exp_is_rejected(api, server):
+    response = api.get("/api/admin/pages", headers=auth(server, sub="admin"))
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid token"
+
+
+def test_token_without_subject_is_rejected(api, server):
+    response = api.get("/api/admin/pages", headers=auth(server, exp=int(time.time()) + 60))
+    assert response.status_code == 401
@@ -0,0 +1,105 @@
+import gzip
+
+import brotli
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from compression import CompressedBodies, CompressionMiddleware, negotiate
+from http_cache import ConditionalGetMiddleware
+
+BODY = b'{"items":[' + b",".join(b'{"title":"entry %d"}' % n for n in range(200)) + b"]}"
+
+
+@pytest.fixture
+def client():
+    async def content(request):
+        return Response(BODY, media_type="application/json")
+
+    async def tiny(request):
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    async def export(request):
+        async def lines():
+            for n in range(100):
+                yield b'{"n":%d}\n' % n
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app = Starlette(routes=[Route("/content", content), Route("/tiny", tiny), Route("/export", export)])
+    stored = CompressedBodies(1024 * 1024)
+    # Same order as server.py: conditional GET inside compression
+    app.add_middleware(ConditionalGetMiddleware, rules=[("/content", "public, max-age=30"), ("/tiny", "no-cache")])
+    app.add_middleware(CompressionMiddleware, stored=stored)
+    test_client = TestClient(app)
+    test_client.stored = stored
+    return test_client
+
+
+def raw(response):
+    return b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_compressed_body_carries_a_weak_etag_and_vary(client, encoding, decompress):
+    with client.stream("GET", "/content", headers={"Accept-Encoding": encoding}) as response:
+        body = raw(response)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"].startswith('W/"')
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) == len(body) < len(BODY)
+    assert decompress(body) == BODY
+
+
+def test_identity_keeps_the_strong_etag(client):
+    response = client.get("/content", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].startswith('"')
+    assert response.content == BODY
+    # gzip;q=0 is a refusal, not a preference
+    assert "content-encoding" not in client.get("/content", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_compressed_body_is_reused_per_etag_and_encoding(client):
+    first = client.get("/content", headers={"Accept-Encoding": "br"})
+    second = client.get("/content", headers={"Accept-Encoding": "br"})
+    assert first.headers["etag"] == second.headers["etag"]
+    assert client.stored.stats()["entries"] == 1 and client.stored.hits == 1
+    client.get("/content", headers={"Accept-Encoding": "gzip"})
+    assert client.stored.stats()["entries"] == 2
+
+
+def test_weak_etag_revalidates_to_304(client):
+    etag = client.get("/content", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert etag.startswith("W/")
+    for encoding in ("gzip", "br", "identity"):
+        with client.stream("GET", "/content", headers={"Accept-Encoding": encoding, "If-None-Match": etag}) as response:
+            assert response.status_code == 304
+            assert raw(response) == b""
+        assert "content-encoding" not in response.headers
+    # The strong tag from an uncompressed response matches the compressed one too
+    strong = etag.removeprefix("W/")
+    assert client.get("/content", headers={"Accept-Encoding": "br", "If-None-Match": strong}).status_code == 304
+    assert client.get("/content", headers={"Accept-Encoding": "br", "If-None-Match": '"other"'}).status_code == 200
+
+
+def test_small_bodies_are_sent_as_is(client):
+    response = client.get("/tiny", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/export", headers={"Accept-Encoding": "gzip"}) as response:
+        body = raw(response)
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).count(b"\n") == 100
+
+
+def test_negotiate_prefers_br_and_honours_q_values():
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("br;q=0, gzip") == "gzip"
+    assert negotiate("*") == "br"
+    assert negotiate("identity") is None
+    assert negotiate(None) is None
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from content_cache import ContentCache
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ContentCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b'{"ok":true}'
+
+        entries = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        assert calls == 1
+        assert {entry.body for entry in entries} == {b'{"ok":true}'}
+        assert (await cache.get_or_load("k", loader)).etag == entries[0].etag
+        assert cache.hits == 1 and cache.misses == 5
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_hands_the_load_to_a_follower():
+    async def scenario():
+        cache = ContentCache()
+        started = asyncio.Event()
+        calls = 0
+
+        async def slow_loader():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(10)
+            return b"leader"
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return b"follower"
+
+        leader = asyncio.create_task(cache.get_or_load("k", slow_loader))
+        await started.wait()
+        followers = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        entries = await asyncio.gather(*followers)
+        assert [entry.body for entry in entries] == [b"follower"] * 3
+        # One follower took over; the others waited for it
+        assert calls == 2
+        assert cache.get("k").body == b"follower"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_without_followers_leaves_nothing_behind():
+    async def scenario():
+        cache = ContentCache()
+
+        async def loader():
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert cache.get("k") is None
+        assert (await cache.get_or_load("k", lambda: asyncio.sleep(0, b"x"))).body == b"x"
+
+    asyncio.run(scenario())
+
+
+def test_load_started_before_invalidation_is_not_stored():
+    async def scenario():
+        cache = ContentCache()
+
+        async def loader():
+            cache.invalidate("k")
+            return b"stale"
+
+        assert (await cache.get_or_load("k", loader)).body == b"stale"
+        assert cache.get("k") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+
+from PIL import Image
+
+from media_variants import DerivativeWorker, choose_variant, generate_variants
+
+VARIANTS = [
+    {"format": mime, "width": width, "filename": f"{width}.{mime}"}
+    for mime in ("image/avif", "image/webp", "image/jpeg")
+    for width in (320, 640)
+]
+
+
+def test_choose_variant_honours_accept_q_values():
+    assert choose_variant(VARIANTS, 300, "image/avif,image/webp,*/*")["format"] == "image/avif"
+    assert choose_variant(VARIANTS, 300, "image/avif;q=0,image/webp,*/*")["format"] == "image/webp"
+    assert choose_variant(VARIANTS, 300, "image/avif;q=0, image/webp;q=0")["format"] == "image/jpeg"
+    assert choose_variant(VARIANTS, 300, "*/*")["format"] == "image/jpeg"
+    assert choose_variant(VARIANTS, 500, "image/webp")["width"] == 640
+
+
+def test_animated_images_keep_the_original(tmp_path):
+    frames = [Image.new("RGB", (800, 600), color) for color in ("red", "blue")]
+    frames[0].save(tmp_path / "animated.gif", save_all=True, append_images=frames[1:])
+    frames[0].save(tmp_path / "still.gif")
+
+    animated = generate_variants(str(tmp_path / "animated.gif"), str(tmp_path), "animated", [320])
+    assert animated == {"width": 800, "height": 600, "variants": []}
+    assert choose_variant(animated["variants"], 320, "image/webp") is None
+    still = generate_variants(str(tmp_path / "still.gif"), str(tmp_path), "still", [320])
+    assert {v["format"] for v in still["variants"]} >= {"image/webp", "image/png"}
+
+
+class FakeMedia:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append(update["$set"])
+
+
+class FakeDb:
+    def __init__(self):
+        self.media = FakeMedia()
+
+
+def test_failed_job_still_calls_on_done(tmp_path):
+    done = []
+    db = FakeDb()
+    worker = DerivativeWorker(db, tmp_path, widths=[320], on_done=done.append)
+    media = {"id": "m1", "url": "/api/media/missing.png"}
+    # No executor: the job runs on the loop's default thread pool
+    asyncio.run(worker._process(media))
+    assert db.media.updates[0]["variants_status"] == "failed"
+    assert done == [media]
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import CREATED_DESC, decode_cursor, encode_cursor, keyset_filter, paginate
+
+STAMP = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trips_datetimes():
+    cursor = encode_cursor({"created_at": STAMP, "id": "b"}, CREATED_DESC)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, CREATED_DESC) == [STAMP, "b"]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "", "W10", encode_cursor({"start": 1}, (("start", 1),))])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, CREATED_DESC)
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter(CREATED_DESC, [STAMP, "b"]) == {"$or": [
+        {"created_at": {"$lt": STAMP}},
+        {"created_at": STAMP, "id": {"$lt": "b"}},
+    ]}
+    assert keyset_filter((("start", 1),), [3]) == {"start": {"$gt": 3}}
+
+
+def test_paginate_walks_every_document_once_across_equal_sort_keys():
+    async def scenario():
+        collection = AsyncMongoMockClient(tz_aware=True)["test"]["items"]
+        # Three documents share each timestamp, so pages split inside ties
+        await collection.insert_many([
+            {"id": f"{n:02d}", "created_at": STAMP.replace(minute=n // 3), "title": f"T{n}"}
+            for n in range(10)
+        ])
+        seen, after = [], None
+        while True:
+            docs, after = await paginate(collection, {}, CREATED_DESC, 4, after, {"_id": 0, "title": 1})
+            # The sort keys are fetched for the cursor but only the requested fields are returned
+            assert all(set(doc) == {"title"} for doc in docs)
+            seen += [doc["title"] for doc in docs]
+            if after is None:
+                return seen
+
+    seen = asyncio.run(scenario())
+    assert seen == [f"T{n}" for n in sorted(range(10), key=lambda n: (n // 3, f"{n:02d}"), reverse=True)]
+
+
+def test_invalid_cursor_is_a_400(api):
+    assert api.get("/api/blog", params={"after": "garbage"}).status_code == 400
+    assert api.get("/api/admin/contacts", params={"after": "garbage"}).status_code == 400
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from passwords import LoginThrottle, LoginThrottled, PasswordHasher, calibrate_rounds
+
+
+def test_calibration_never_goes_below_the_default_cost():
+    # Even an impossible target keeps passlib's default of 12 rounds
+    assert calibrate_rounds(target_ms=0.001) == 12
+    assert PasswordHasher().min_rounds == 12
+
+
+def test_hash_and_verify_off_the_loop():
+    async def scenario():
+        hasher = PasswordHasher(rounds=4)
+        try:
+            password_hash = await hasher.hash("secret")
+            assert await hasher.verify_and_update("secret", password_hash) == (True, None)
+            assert (await hasher.verify_and_update("wrong", password_hash))[0] is False
+        finally:
+            hasher.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_login_throttle_locks_out_after_repeated_failures():
+    throttle = LoginThrottle(max_failures=2, window=60)
+    for _ in range(2):
+        throttle.acquire("admin")
+        throttle.release("admin", False)
+    with pytest.raises(LoginThrottled):
+        throttle.acquire("admin")
+    throttle.acquire("someone-else")
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from slot_times import local_today
+
+
+def day(offset):
+    return (local_today() + timedelta(days=offset)).isoformat()
+
+
+def create_slot(api, date, start="10:00", end="11:00"):
+    response = api.post("/api/admin/timeslots", json={"date": date, "start_time": start, "end_time": end})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_admin_listing_is_limited_to_the_requested_days(api):
+    inside, outside = create_slot(api, day(100)), create_slot(api, day(140))
+    slots = api.get("/api/admin/timeslots", params={"from": day(95), "to": day(105)}).json()["items"]
+    ids = {slot["id"] for slot in slots}
+    assert inside["id"] in ids and outside["id"] not in ids
+    assert api.get("/api/admin/timeslots", params={"from": day(105), "to": day(95)}).status_code == 400
+
+
+def test_available_range_is_capped(api, server):
+    days = server.MAX_AVAILABLE_SLOT_DAYS
+    response = api.get("/api/timeslots/available", params={"from": day(1), "to": day(1 + days)})
+    assert response.status_code == 400
+
+
+def test_legacy_slots_are_backfilled_at_startup(api, server):
+    date = day(200)
+    api.portal.call(server.db.time_slots.insert_one, {
+        "id": "legacy-slot", "date": date, "start_time": "12:00", "end_time": "13:00", "available": True,
+    })
+    api.portal.call(server.backfill_legacy_slots)
+
+    available = api.get("/api/timeslots/available", params={"from": date, "to": date}).json()
+    assert [slot["id"] for slot in available] == ["legacy-slot"]
+    availability = api.get("/api/timeslots/availability", params={"from": date, "to": date}).json()
+    assert availability == [{"date": date, "available": 1}]
+    # Running it again changes nothing
+    api.portal.call(server.backfill_legacy_slots)
+    assert len(api.get("/api/timeslots/available", params={"from": date, "to": date}).json()) == 1